@@ -1,3 +1,4 @@
+import logging
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
@@ -8,6 +9,8 @@ import sys
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from app.core.config import settings
+from app.db import migrations
 from app.db.database import Base
 from app.models import *  # Import all models
 
@@ -24,6 +27,8 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+logger = logging.getLogger("alembic.env")
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -31,8 +36,15 @@ target_metadata = Base.metadata
 
 
 def get_url():
-    """Get database URL from environment or config."""
-    return os.getenv("DATABASE_URL", config.get_main_option("sqlalchemy.url"))
+    """Get database URL from the caller, environment or config."""
+    return config.attributes.get("database_url") or os.getenv(
+        "DATABASE_URL", config.get_main_option("sqlalchemy.url")
+    )
+
+
+def include_name(name, type_, parent_names):
+    """Leave the migration helpers' own tables out of autogenerate."""
+    return not (type_ == "table" and name in migrations.OWN_TABLES)
 
 
 def run_migrations_offline() -> None:
@@ -53,10 +65,15 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
+        transaction_per_migration=True,
     )
 
-    with context.begin_transaction():
-        context.run_migrations()
+    try:
+        with context.begin_transaction():
+            context.run_migrations()
+    except migrations.ContractPhase as stop:
+        logger.info("%s", stop)
 
 
 def run_migrations_online() -> None:
@@ -75,12 +92,27 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # Fail fast rather than queue every request behind a blocked ALTER.
+        migrations.set_timeouts(
+            connection,
+            lock_timeout=settings.migration_lock_timeout,
+            statement_timeout=settings.migration_statement_timeout,
+        )
+        connection.commit()
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            # Each migration commits on its own, so the ones before a
+            # failure, or before a contract migration, stay applied.
+            transaction_per_migration=True,
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        except migrations.ContractPhase as stop:
+            logger.info("%s", stop)
 
 
 if context.is_offline_mode():
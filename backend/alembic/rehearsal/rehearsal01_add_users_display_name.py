@@ -0,0 +1,26 @@
+"""Expand: add a nullable users.display_name
+
+Revision ID: rehearsal01
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'rehearsal01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable with no default: a catalog-only change, no table rewrite.
+    op.add_column("users", sa.Column("display_name", sa.String(101), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("display_name")
@@ -0,0 +1,41 @@
+"""Expand: backfill and index users.display_name
+
+Revision ID: rehearsal02
+Revises: rehearsal01
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db import migrations
+
+
+# revision identifiers, used by Alembic.
+revision = 'rehearsal02'
+down_revision = 'rehearsal01'
+branch_labels = None
+depends_on = None
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer),
+    sa.column("first_name", sa.String),
+    sa.column("last_name", sa.String),
+    sa.column("display_name", sa.String),
+)
+
+
+def upgrade() -> None:
+    migrations.backfill(
+        users,
+        {"display_name": users.c.first_name + " " + users.c.last_name},
+        where=users.c.display_name.is_(None),
+        name="rehearsal02_users_display_name",
+    )
+    migrations.create_index_concurrently(
+        "ix_users_display_name", "users", ["display_name"]
+    )
+
+
+def downgrade() -> None:
+    migrations.drop_index_concurrently("ix_users_display_name", "users")
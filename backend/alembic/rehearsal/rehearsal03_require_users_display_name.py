@@ -0,0 +1,27 @@
+"""Contract: make users.display_name NOT NULL
+
+Revision ID: rehearsal03
+Revises: rehearsal02
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db import migrations
+
+
+# revision identifiers, used by Alembic.
+revision = 'rehearsal03'
+down_revision = 'rehearsal02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    migrations.contract()
+    migrations.set_not_null("users", "display_name")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.alter_column("display_name", existing_type=sa.String(101), nullable=True)
@@ -1,7 +1,16 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import users, auth
+from app.api.api_v1.endpoints import (
+    users, auth, audit, avatars, assignments, batch, families, sync, tasks,
+)
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(families.router, prefix="/families", tags=["families"])
+api_router.include_router(tasks.router, prefix="/families", tags=["tasks"])
+api_router.include_router(assignments.router, prefix="/families", tags=["assignments"])
+api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(batch.router, prefix="/batch", tags=["batch"])
+api_router.include_router(avatars.router, prefix="/avatars", tags=["avatars"])
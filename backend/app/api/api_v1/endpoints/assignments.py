@@ -0,0 +1,79 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.config import Settings
+from app.core.deps import get_family_membership, get_settings
+from app.core.jobs import schedule_family
+from app.core.profiling import ProfilingRoute
+from app.crud.assignment import assignment_crud
+from app.crud.family import family_crud
+from app.db.database import get_db
+from app.models.family import FamilyMember
+from app.models.task import TaskAssignment
+from app.schemas.task import Assignment, AssignmentUpdate
+
+router = APIRouter(route_class=ProfilingRoute)
+
+MAX_ROTATION_DAYS = 366
+
+
+@router.post("/{family_id}/rotation", response_model=List[Assignment])
+def run_rotation(
+    family_id: int,
+    start: Optional[date] = Query(None, alias="from"),
+    days: Optional[int] = Query(None, ge=1, le=MAX_ROTATION_DAYS),
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> List[TaskAssignment]:
+    """
+    Assign the family's unassigned rotating chores for the next ``days`` days,
+    ``rotation_horizon_days`` by default.
+
+    Existing assignments are left alone; the background job does the same
+    for every family once per ``rotation_interval``.
+    """
+    return schedule_family(
+        db,
+        family_id=family_id,
+        start=start or date.today(),
+        horizon_days=days or app_settings.rotation_horizon_days,
+        lookback_days=app_settings.rotation_lookback_days,
+    )
+
+
+@router.get("/{family_id}/assignments", response_model=List[Assignment])
+def read_assignments(
+    family_id: int,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> List[TaskAssignment]:
+    """Get the family's chore assignments in a date range."""
+    return assignment_crud.get_in_range(db, family_id=family_id, start=start, end=end)
+
+
+@router.put(
+    "/{family_id}/tasks/{task_id}/assignments/{occurrence_date}", response_model=Assignment
+)
+def update_assignment(
+    family_id: int,
+    task_id: int,
+    occurrence_date: date,
+    assignment_in: AssignmentUpdate,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> TaskAssignment:
+    """Reassign one occurrence or mark it done; no other assignment changes."""
+    assignment = assignment_crud.get(db, id=(task_id, occurrence_date))
+    if assignment is None or assignment.family_id != family_id:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    if assignment_in.user_id is not None and family_crud.get_membership(
+        db, family_id=family_id, user_id=assignment_in.user_id
+    ) is None:
+        raise HTTPException(status_code=400, detail="Assignee is not a member of this family")
+    return assignment_crud.update(
+        db, db_obj=assignment, obj_in=assignment_in.model_dump(exclude_none=True)
+    )
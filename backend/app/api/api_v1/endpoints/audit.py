@@ -0,0 +1,36 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.deps import get_current_user
+from app.core.profiling import ProfilingRoute
+from app.crud.audit import audit_crud
+from app.db.database import get_db
+from app.models.audit import AuditEntry as AuditEntryModel
+from app.models.user import User
+from app.schemas.audit import AuditEntry
+
+router = APIRouter(route_class=ProfilingRoute)
+
+MAX_AUDIT_ENTRIES = 1000
+
+
+@router.get("/", response_model=List[AuditEntry])
+def read_audit_log(
+    entity: str,
+    entity_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=MAX_AUDIT_ENTRIES),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> List[AuditEntryModel]:
+    """
+    Get the changes made to one entity, newest first (times in UTC).
+
+    Entries are written in batches, so the latest second or so of changes
+    may not be listed yet.
+    """
+    return audit_crud.get_history(
+        db, entity=entity, entity_id=entity_id, since=since, until=until, limit=limit
+    )
@@ -1,36 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.core.deps import get_db
+from typing import Optional
+from app.core.deps import get_db, get_throttle
+from app.core.profiling import ProfilingRoute
 from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.throttle import LoginThrottle
 from app.crud.user import user_crud
 from app.schemas.auth import LoginRequest, SignupRequest, Token
 from app.schemas.user import User, UserCreate
 from app.models.user import User as UserModel
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client (the proxy headers are applied by the server)."""
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_throttle(
+    throttle: Optional[LoginThrottle], request: Request, email: str
+) -> None:
+    """Reject the attempt with 429 before any hashing if it is throttled."""
+    if throttle is None:
+        return
+    wait = throttle.check(client_ip(request), email)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
 
 
 @router.post("/login", response_model=Token)
 def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db),
+    throttle: Optional[LoginThrottle] = Depends(get_throttle),
 ) -> Token:
     """
     Login user and return JWT token.
     """
+    enforce_throttle(throttle, request, login_data.email)
     user = user_crud.get_by_email(db, email=login_data.email)
     if not user:
+        if throttle is not None:
+            throttle.failure(client_ip(request), login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
     if not verify_password(login_data.password, user.hashed_password):
+        if throttle is not None:
+            throttle.failure(client_ip(request), login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    if throttle is not None:
+        throttle.success(login_data.email)
     access_token = create_access_token(subject=user.email)
     return Token(access_token=access_token)
 
@@ -38,11 +71,14 @@ def login(
 @router.post("/signup", response_model=User, status_code=status.HTTP_201_CREATED)
 def signup(
     signup_data: SignupRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db),
+    throttle: Optional[LoginThrottle] = Depends(get_throttle),
 ) -> UserModel:
     """
     Create new user account.
     """
+    enforce_throttle(throttle, request, signup_data.email)
     # Check if user already exists
     db_user = user_crud.get_by_email(db, email=signup_data.email)
     if db_user:
@@ -0,0 +1,48 @@
+import asyncio
+import re
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from app.core.config import Settings
+from app.core.deps import get_settings
+from app.core.metrics import record_cache
+from app.core.profiling import ProfilingRoute
+from app.core.responses import ZeroCopyFileResponse
+
+router = APIRouter(route_class=ProfilingRoute)
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+# Variants are content-addressed, so a URL never changes meaning.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+VARIANT_MEDIA_TYPE = "image/webp"
+
+
+@router.get("/{digest}/{size}.webp", response_class=ZeroCopyFileResponse)
+async def read_avatar(
+    digest: str,
+    size: int,
+    request: Request,
+    app_settings: Settings = Depends(get_settings),
+) -> Response:
+    """Serve a pre-sized avatar variant."""
+    from app.core import avatars
+
+    if not DIGEST_RE.match(digest) or size not in app_settings.avatar_sizes:
+        raise HTTPException(status_code=404, detail="Avatar not found")
+
+    etag = f'"{digest}-{size}"'
+    headers = {"cache-control": IMMUTABLE_CACHE_CONTROL, "etag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = avatars.variant_path(app_settings, digest, size)
+    rendered = path.exists()
+    record_cache("avatar_variants", rendered)
+    if not rendered:
+        if not avatars.original_path(app_settings, digest).exists():
+            raise HTTPException(status_code=404, detail="Avatar not found")
+        # Variants are still being rendered (or were purged): wait for them.
+        pending = avatars.schedule_variants(app_settings, digest)
+        if pending is not None:
+            await asyncio.wrap_future(pending)
+
+    return ZeroCopyFileResponse(path, media_type=VARIANT_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+from time import perf_counter
+from typing import Any, Dict, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message
+from app.core.config import Settings
+from app.core.deps import get_settings
+from app.core.profiling import ProfilingRoute
+from app.db.database import get_db, shared_session
+from app.schemas.batch import (
+    BatchRequest,
+    BatchResponse,
+    BatchSubRequest,
+    BatchSubResponse,
+)
+
+router = APIRouter(route_class=ProfilingRoute)
+
+API_PREFIX = "/api/v1"
+# Headers forwarded from the batch request to every sub-request.
+INHERITED_HEADERS = ("authorization", "accept-language")
+
+
+def _skipped(sub: BatchSubRequest, detail: str) -> BatchSubResponse:
+    return BatchSubResponse(
+        id=sub.id,
+        status=status.HTTP_424_FAILED_DEPENDENCY,
+        body={"detail": detail},
+        duration_ms=0.0,
+    )
+
+
+def _decode_body(headers: Dict[str, str], body: bytes) -> Any:
+    if not body:
+        return None
+    if headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(
+    app: ASGIApp, parent: Request, sub: BatchSubRequest
+) -> BatchSubResponse:
+    """Run a sub-request through the ASGI app in-process."""
+    path, _, query = sub.url.partition("?")
+    body = b"" if sub.body is None else json.dumps(sub.body).encode()
+
+    headers = {
+        name: value
+        for name, value in parent.headers.items()
+        if name in INHERITED_HEADERS
+    }
+    headers.update({name.lower(): value for name, value in sub.headers.items()})
+    if sub.body is not None:
+        headers.setdefault("content-type", "application/json")
+    headers["content-length"] = str(len(body))
+
+    full_path = API_PREFIX + path
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub.method,
+        "scheme": parent.url.scheme,
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ],
+        "client": parent.scope.get("client"),
+        "server": parent.scope.get("server"),
+    }
+
+    request_sent = False
+    response_complete = asyncio.Event()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def receive() -> Message:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            response_headers.update(
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    start = perf_counter()
+    try:
+        await app(scope, receive, send)
+        response_body = _decode_body(response_headers, b"".join(chunks))
+    except Exception:
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        response_body = {"detail": "Internal Server Error"}
+    finally:
+        response_complete.set()
+    duration_ms = (perf_counter() - start) * 1000
+
+    return BatchSubResponse(
+        id=sub.id,
+        status=status_code,
+        headers={
+            name: value
+            for name, value in response_headers.items()
+            if name != "content-length"
+        },
+        body=response_body,
+        duration_ms=round(duration_ms, 3),
+    )
+
+
+async def _run_concurrent(
+    app: ASGIApp, parent: Request, requests: List[BatchSubRequest]
+) -> List[BatchSubResponse]:
+    """Run sub-requests concurrently, honouring ``depends_on`` ordering."""
+    tasks: Dict[str, "asyncio.Task[BatchSubResponse]"] = {}
+
+    async def run(sub: BatchSubRequest) -> BatchSubResponse:
+        for dependency in sub.depends_on:
+            result = await tasks[dependency]
+            if result.status >= 400:
+                return _skipped(sub, f"Dependency {dependency} failed")
+        return await _dispatch(app, parent, sub)
+
+    for sub in requests:
+        tasks[sub.id] = asyncio.ensure_future(run(sub))
+    return list(await asyncio.gather(*tasks.values()))
+
+
+async def _run_transaction(
+    app: ASGIApp, parent: Request, requests: List[BatchSubRequest], db: Session
+) -> Tuple[List[BatchSubResponse], bool]:
+    """
+    Run sub-requests in order on one shared session.
+
+    Stops at the first failing sub-request and rolls everything back.
+    Returns the results and whether the transaction was committed.
+    """
+    responses: List[BatchSubResponse] = []
+    failed = False
+    # Commits issued by the CRUD layer only end the inner session's work;
+    # the outer transaction on ``db`` decides whether anything is kept.
+    connection = db.connection()
+    with Session(
+        bind=connection, autoflush=False, join_transaction_mode="rollback_only"
+    ) as shared:
+        with shared_session(shared):
+            for sub in requests:
+                if failed:
+                    responses.append(_skipped(sub, "Batch transaction aborted"))
+                    continue
+                result = await _dispatch(app, parent, sub)
+                responses.append(result)
+                failed = result.status >= 400
+    if failed:
+        db.rollback()
+    else:
+        db.commit()
+    return responses, not failed
+
+
+@router.post("", response_model=BatchResponse)
+async def execute_batch(
+    batch: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    app_settings: Settings = Depends(get_settings),
+) -> BatchResponse:
+    """
+    Execute several API calls in one round trip.
+
+    Independent sub-requests run concurrently. With ``transaction`` set,
+    they run in order on one shared session and are committed together.
+    """
+    if len(batch.requests) > app_settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can contain at most {app_settings.batch_max_requests} requests",
+        )
+    seen: set[str] = set()
+    for sub in batch.requests:
+        if sub.id in seen:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate request id {sub.id}",
+            )
+        unknown = [dependency for dependency in sub.depends_on if dependency not in seen]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Request {sub.id} depends on unknown or later request {unknown[0]}",
+            )
+        seen.add(sub.id)
+
+    start = perf_counter()
+    committed = True
+    if batch.transaction:
+        responses, committed = await _run_transaction(
+            request.app, request, batch.requests, db
+        )
+    else:
+        responses = await _run_concurrent(request.app, request, batch.requests)
+    duration_ms = (perf_counter() - start) * 1000
+    return BatchResponse(
+        responses=responses,
+        committed=committed,
+        duration_ms=round(duration_ms, 3),
+    )
@@ -0,0 +1,194 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.config import Settings
+from app.core.deps import get_current_user, get_family_membership, get_settings
+from app.core.jobs import schedule_family
+from app.core.profiling import ProfilingRoute
+from app.crud.assignment import assignment_crud
+from app.crud.family import family_crud
+from app.crud.stats import range_bounds, stats_crud
+from app.crud.user import user_crud
+from app.db.database import get_db
+from app.models.family import OWNER, FamilyMember
+from app.models.family import Family as FamilyModel
+from app.models.user import User as UserModel
+from app.schemas.family import Family, FamilyCreate, Member, MemberAdd, MemberUpdate
+from app.schemas.stats import FamilyStats, MemberStats, StatsRange
+from app.schemas.user import User
+
+router = APIRouter(route_class=ProfilingRoute)
+
+
+@router.post("/", response_model=Family, status_code=status.HTTP_201_CREATED)
+def create_family(
+    family_in: FamilyCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+) -> FamilyModel:
+    """Create a family owned by the current user."""
+    return family_crud.create_with_owner(db, obj_in=family_in, owner_id=current_user.id)
+
+
+@router.get("/", response_model=List[Family])
+def read_families(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+) -> List[FamilyModel]:
+    """Get the families of the current user."""
+    return family_crud.get_multi_for_user(
+        db, user_id=current_user.id, skip=skip, limit=limit
+    )
+
+
+@router.get("/{family_id}", response_model=Family)
+def read_family(
+    family_id: int,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> FamilyModel:
+    """Get a family the current user belongs to."""
+    family = family_crud.get(db, id=family_id)
+    if not family:
+        raise HTTPException(status_code=404, detail="Family not found")
+    return family
+
+
+@router.get("/{family_id}/members", response_model=List[User])
+def read_members(
+    family_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> List[UserModel]:
+    """Get the members of a family."""
+    return family_crud.get_members(db, family_id=family_id, skip=skip, limit=limit)
+
+
+@router.get("/{family_id}/stats", response_model=FamilyStats)
+def read_stats(
+    family_id: int,
+    range_: StatsRange = Query("week", alias="range"),
+    on: Optional[date] = None,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> FamilyStats:
+    """
+    Get the tasks each member completed in the week, month or year containing ``on``.
+
+    Answered from the completion rollups, in time independent of how long
+    the family's history is.
+    """
+    period, start, end = range_bounds(range_, on or date.today())
+    totals = stats_crud.get_totals(
+        db, family_id=family_id, period=period, start=start, end=end
+    )
+    return FamilyStats(
+        range=range_,
+        start=start,
+        end=end,
+        members=[
+            MemberStats(user_id=user_id, done=done, effort=effort)
+            for user_id, done, effort in totals
+        ],
+    )
+
+
+@router.post(
+    "/{family_id}/members", response_model=User, status_code=status.HTTP_201_CREATED
+)
+def add_member(
+    family_id: int,
+    member_in: MemberAdd,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> UserModel:
+    """Add an existing user to a family; owners only."""
+    if membership.role != OWNER:
+        raise HTTPException(status_code=403, detail="Only family owners can add members")
+    user = user_crud.get_by_email(db, email=member_in.email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        family_crud.add_member(db, family_id=family_id, user_id=user.id, role=member_in.role)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return user
+
+
+@router.put("/{family_id}/members/{user_id}", response_model=Member)
+def update_member(
+    family_id: int,
+    user_id: int,
+    member_in: MemberUpdate,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> FamilyMember:
+    """
+    Change a member's share of rotating chores; owners, or members themselves.
+
+    At capacity 0 the member's pending chores from today on are released and
+    handed to the others; no other assignment changes.
+    """
+    if membership.role != OWNER and user_id != membership.user_id:
+        raise HTTPException(status_code=403, detail="Only family owners can update members")
+    member = family_crud.get_membership(db, family_id=family_id, user_id=user_id)
+    if member is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    member.capacity = member_in.capacity
+    db.commit()
+    if member.capacity == 0:
+        today = date.today()
+        if assignment_crud.release(db, family_id=family_id, user_id=user_id, start=today):
+            schedule_family(
+                db,
+                family_id=family_id,
+                start=today,
+                horizon_days=app_settings.rotation_horizon_days,
+                lookback_days=app_settings.rotation_lookback_days,
+            )
+    db.refresh(member)
+    return member
+
+
+@router.delete("/{family_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_member(
+    family_id: int,
+    user_id: int,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> Response:
+    """
+    Remove a member; owners may remove anyone, members only themselves.
+    A family keeps at least one owner, so its last owner cannot leave.
+
+    The member's pending chores from today on are handed to the others,
+    as for a member at capacity 0; past ones are left as they are.
+    """
+    if membership.role != OWNER and user_id != membership.user_id:
+        raise HTTPException(status_code=403, detail="Only family owners can remove members")
+    target = family_crud.get_membership(db, family_id=family_id, user_id=user_id)
+    if target is None:
+        raise HTTPException(status_code=404, detail="Member not found")
+    if target.role == OWNER and family_crud.count_owners(db, family_id=family_id) == 1:
+        raise HTTPException(status_code=409, detail="A family must keep at least one owner")
+    try:
+        family_crud.remove_member(db, family_id=family_id, user_id=user_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Member not found")
+    today = date.today()
+    if assignment_crud.release(db, family_id=family_id, user_id=user_id, start=today):
+        schedule_family(
+            db,
+            family_id=family_id,
+            start=today,
+            horizon_days=app_settings.rotation_horizon_days,
+            lookback_days=app_settings.rotation_lookback_days,
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.config import Settings
+from app.core.deps import get_current_user, get_settings
+from app.core.profiling import ProfilingRoute
+from app.crud.sync import sync_crud
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.sync import SyncPage
+
+router = APIRouter(route_class=ProfilingRoute)
+
+MAX_SYNC_PAGE = 1000
+
+
+@router.get("/", response_model=SyncPage)
+def read_changes(
+    since: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_SYNC_PAGE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    app_settings: Settings = Depends(get_settings),
+) -> SyncPage:
+    """
+    Get what changed after ``since``, a previous page's ``cursor``.
+
+    Start from 0 for a full download; keep requesting while ``has_more``.
+    Pages hold up to ``limit`` changes, ``sync_page_size`` by default.
+    Only the current user and the members of their families are synced.
+    """
+    changes = sync_crud.get_changes(
+        db, user_id=current_user.id, since=since, limit=limit or app_settings.sync_page_size
+    )
+    return SyncPage.model_validate({
+        **changes.changed,
+        "deleted": changes.deleted,
+        "cursor": changes.cursor,
+        "has_more": changes.has_more,
+    })
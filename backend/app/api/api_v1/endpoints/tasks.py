@@ -0,0 +1,245 @@
+from collections import defaultdict
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from app.core import reminders
+from app.core.config import Settings
+from app.core.deps import get_family_membership, get_settings
+from app.core.profiling import ProfilingRoute
+from app.crud.assignment import assignment_crud
+from app.crud.family import family_crud
+from app.crud.reminder import reminder_crud
+from app.crud.task import task_crud
+from app.db.database import get_db
+from app.models.family import FamilyMember
+from app.models.reminder import Reminder as ReminderModel
+from app.models.task import Task as TaskModel
+from app.models.task import TaskException as TaskExceptionModel
+from app.schemas.task import (
+    Board, BoardMember, BoardTask, Task, TaskCreate, TaskException, TaskExceptionCreate, TaskUpdate,
+)
+from app.schemas.reminder import Reminder
+from app.schemas.user import User
+
+router = APIRouter(route_class=ProfilingRoute)
+
+MAX_BOARD_DAYS = 366
+
+
+def check_assignee(db: Session, family_id: int, assignee_id: Optional[int]) -> None:
+    """Tasks can only be assigned to members of their family."""
+    if assignee_id is None:
+        return
+    if family_crud.get_membership(db, family_id=family_id, user_id=assignee_id) is None:
+        raise HTTPException(status_code=400, detail="Assignee is not a member of this family")
+
+
+def sync_reminders(db: Session, task: TaskModel, app_settings: Settings) -> None:
+    """Materialize a task's reminders and reschedule the ones that changed."""
+    reminders.reschedule(reminders.sync_task(
+        db,
+        task,
+        reminders.utcnow().date(),
+        app_settings.reminder_horizon_days,
+        app_settings.reminder_day_start_hour,
+    ))
+
+
+@router.get("/{family_id}/board", response_model=Board)
+def read_board(
+    family_id: int,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> Board:
+    """
+    Get a family's members and their tasks due in a date range.
+
+    One query loads the members, and a fixed number of range scans load the
+    family's one-off tasks, recurring tasks and their exceptions, whatever the
+    number of members. Each task appears once with the days it falls due.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days >= MAX_BOARD_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_BOARD_DAYS} days")
+
+    members = family_crud.get_members(db, family_id=family_id, limit=None)
+    occurrences = task_crud.get_occurrences(db, family_id=family_id, start=start, end=end)
+    # Each occurrence of a rotating chore shows under the member it is assigned to.
+    assignees: Dict[Tuple[int, date], int] = {}
+    if any(task.rotate for task, _ in occurrences):
+        assignees = {
+            (assignment.task_id, assignment.occurrence_date): assignment.user_id
+            for assignment in assignment_crud.get_in_range(
+                db, family_id=family_id, start=start, end=end
+            )
+        }
+    by_assignee: Dict[Optional[int], List[BoardTask]] = defaultdict(list)
+    for task, days in occurrences:
+        fields = Task.model_validate(task).model_dump()
+        if not task.rotate:
+            by_assignee[task.assignee_id].append(BoardTask(**fields, occurs_on=days))
+            continue
+        days_by_assignee: Dict[Optional[int], List[date]] = defaultdict(list)
+        for day in days:
+            days_by_assignee[assignees.get((task.id, day), task.assignee_id)].append(day)
+        for assignee_id, assigned_days in days_by_assignee.items():
+            fields["assignee_id"] = assignee_id
+            by_assignee[assignee_id].append(BoardTask(**fields, occurs_on=assigned_days))
+
+    # Tasks of former members are shown as unassigned.
+    member_ids = {member.id for member in members}
+    unassigned = [
+        task for assignee_id, assigned in by_assignee.items()
+        if assignee_id not in member_ids for task in assigned
+    ]
+    for tasks in (unassigned, *by_assignee.values()):
+        tasks.sort(key=lambda task: (task.occurs_on[0], task.id))
+    return Board(
+        family_id=family_id,
+        start=start,
+        end=end,
+        members=[
+            BoardMember(**User.model_validate(member).model_dump(), tasks=by_assignee[member.id])
+            for member in members
+        ],
+        unassigned=unassigned,
+    )
+
+
+@router.get("/{family_id}/tasks", response_model=List[Task])
+def read_tasks(
+    family_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> List[TaskModel]:
+    """Get a family's tasks."""
+    return task_crud.get_multi_by_family(db, family_id=family_id, skip=skip, limit=limit)
+
+
+@router.post("/{family_id}/tasks", response_model=Task, status_code=status.HTTP_201_CREATED)
+def create_task(
+    family_id: int,
+    task_in: TaskCreate,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> TaskModel:
+    """Create a task in a family."""
+    check_assignee(db, family_id, task_in.assignee_id)
+    task = task_crud.create_in_family(db, obj_in=task_in, family_id=family_id)
+    if task.remind_before is not None:
+        sync_reminders(db, task, app_settings)
+    return task
+
+
+@router.get("/{family_id}/tasks/{task_id}", response_model=Task)
+def read_task(
+    family_id: int,
+    task_id: int,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> TaskModel:
+    """Get a task by ID."""
+    task = task_crud.get_in_family(db, family_id=family_id, id=task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.put("/{family_id}/tasks/{task_id}", response_model=Task)
+def update_task(
+    family_id: int,
+    task_id: int,
+    task_in: TaskUpdate,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> TaskModel:
+    """Update a task."""
+    task = task_crud.get_in_family(db, family_id=family_id, id=task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if "assignee_id" in task_in.model_fields_set:
+        check_assignee(db, family_id, task_in.assignee_id)
+    task = task_crud.update(db, db_obj=task, obj_in=task_in)
+    sync_reminders(db, task, app_settings)
+    return task
+
+
+@router.delete("/{family_id}/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_task(
+    family_id: int,
+    task_id: int,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> Response:
+    """Delete a task."""
+    task = task_crud.get_in_family(db, family_id=family_id, id=task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    reminders.reschedule(reminder_crud.remove_for_task(db, task_id=task.id))
+    task_crud.remove(db, id=task.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.put("/{family_id}/tasks/{task_id}/exceptions", response_model=TaskException)
+def set_task_exception(
+    family_id: int,
+    task_id: int,
+    exception_in: TaskExceptionCreate,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> TaskExceptionModel:
+    """Skip one occurrence of a recurring task, or move it to another day."""
+    task = task_crud.get_in_family(db, family_id=family_id, id=task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        exception = task_crud.set_exception(db, task=task, obj_in=exception_in)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    sync_reminders(db, task, app_settings)
+    return exception
+
+
+@router.delete(
+    "/{family_id}/tasks/{task_id}/exceptions/{occurrence_date}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def delete_task_exception(
+    family_id: int,
+    task_id: int,
+    occurrence_date: date,
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+    app_settings: Settings = Depends(get_settings),
+) -> Response:
+    """Restore a skipped or moved occurrence."""
+    task = task_crud.get_in_family(db, family_id=family_id, id=task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        task_crud.remove_exception(db, task_id=task.id, occurrence_date=occurrence_date)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Exception not found")
+    sync_reminders(db, task, app_settings)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{family_id}/reminders", response_model=List[Reminder])
+def read_reminders(
+    family_id: int,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    membership: FamilyMember = Depends(get_family_membership),
+) -> List[ReminderModel]:
+    """Get the family's reminders, sent or pending, in a time range (UTC)."""
+    return reminder_crud.get_in_range(db, family_id=family_id, start=start, end=end)
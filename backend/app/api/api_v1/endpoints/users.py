@@ -1,23 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 from typing import List
+from app.core.config import Settings
+from app.core.coalesce import CoalescingRoute, coalesced
+from app.core.deps import get_settings
+from app.core.responses import RowsResponse
 from app.db.database import get_db
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.models.user import User as UserModel
 from app.crud.user import user_crud
 
-router = APIRouter()
+router = APIRouter(route_class=CoalescingRoute)
 
 
 @router.get("/", response_model=List[User])
+@coalesced
 def read_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
-) -> List[UserModel]:
-    """Get all users."""
-    users = user_crud.get_multi(db, skip=skip, limit=limit)
-    return users
+) -> RowsResponse:
+    """Get all users, serialized straight from read-only rows."""
+    users = user_crud.get_multi_rows(db, skip=skip, limit=limit)
+    return RowsResponse(users, User)
 
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -38,6 +43,7 @@ def create_user(
 
 
 @router.get("/{user_id}", response_model=User)
+@coalesced
 def read_user(
     user_id: int,
     db: Session = Depends(get_db)
@@ -63,6 +69,42 @@ def update_user(
     return user
 
 
+@router.put("/{user_id}/avatar", response_model=User)
+def upload_avatar(
+    user_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    app_settings: Settings = Depends(get_settings),
+) -> UserModel:
+    """Upload an avatar image and point the user at its resized variant."""
+    # Deferred: pulls in Pillow, which most requests never need.
+    from app.core import avatars
+
+    user = user_crud.get(db, id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Avatar must be an image",
+        )
+    data = file.file.read(app_settings.avatar_max_upload_bytes + 1)
+    if len(data) > app_settings.avatar_max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Avatar image is too large",
+        )
+    try:
+        digest = avatars.store_original(app_settings, data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    avatars.schedule_variants(app_settings, digest)
+    user = user_crud.update(
+        db, db_obj=user, obj_in={"avatar_url": avatars.avatar_url(app_settings, digest)}
+    )
+    return user
+
+
 @router.delete("/{user_id}")
 def delete_user(
     user_id: int,
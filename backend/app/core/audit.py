@@ -0,0 +1,290 @@
+"""
+Audit log of entity mutations.
+
+CRUD methods report field-level diffs with ``stage``, which holds them on
+the session until its outermost transaction commits and drops them if it
+rolls back: a session joined to a transaction begun elsewhere (a
+transactional batch) hands them to the session owning that transaction.
+Committed entries go onto a bounded in-process queue, and a writer thread
+inserts them in multi-row batches, every ``audit_batch_size`` entries or
+``audit_flush_interval`` seconds, so a write request pays for a queue put
+rather than another INSERT and commit.
+
+A batch that cannot be written (the database is unavailable) is appended
+to a JSON-lines spill file, as are entries arriving while the queue is
+full; the file is replayed ahead of the next batch that can be written.
+Entries still queued when the process dies without a clean shutdown are
+lost.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Collection, Dict, List, Mapping, Optional, Tuple, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Connection, Engine, event, insert
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.metrics import AUDIT_ENTRIES
+from app.core.security import verify_token
+from app.models.audit import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+Entry = Dict[str, Any]
+
+REDACTED = "***"
+
+# Bearer token of the request being served, decoded only if it audits something.
+_token: ContextVar[Optional[str]] = ContextVar("audit_token", default=None)
+
+# Session.info key of the entries staged in its transaction, and
+# Connection.info key of the session owning the connection's transaction.
+_PENDING = "audit_pending"
+_OWNER = "audit_owner"
+
+
+class AuditContextMiddleware:
+    """Make the request's bearer token available to ``record``."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer":
+                    token = credentials
+                break
+        reset = _token.set(token)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _token.reset(reset)
+
+
+def diff(
+    before: Mapping[str, Any], after: Mapping[str, Any], redacted: Collection[str] = ()
+) -> Dict[str, List[Any]]:
+    """Field -> [old, new] for the fields that differ; redacted values are masked."""
+    changes = {}
+    for field in sorted(before.keys() | after.keys()):
+        old, new = before.get(field), after.get(field)
+        if old == new:
+            continue
+        if field in redacted:
+            old = None if old is None else REDACTED
+            new = None if new is None else REDACTED
+        changes[field] = jsonable_encoder([old, new])
+    return changes
+
+
+def _entry(
+    entity: str, entity_id: int, action: str, changes: Dict[str, List[Any]]
+) -> Entry:
+    token = _token.get()
+    return {
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "actor": verify_token(token) if token else None,
+        "changes": changes,
+        "ts": datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+
+
+def record(entity: str, entity_id: int, action: str, changes: Dict[str, List[Any]]) -> None:
+    """Queue an audit entry with the running audit log; a no-op without one."""
+    log = _log
+    if log is None or not changes:
+        return
+    log.put(_entry(entity, entity_id, action, changes))
+
+
+def stage(
+    db: Session, entity: str, entity_id: int, action: str, changes: Dict[str, List[Any]]
+) -> None:
+    """Queue an audit entry once ``db``'s outermost transaction commits."""
+    if _log is None or not changes:
+        return
+    db.info.setdefault(_PENDING, []).append(_entry(entity, entity_id, action, changes))
+
+
+@event.listens_for(Session, "after_begin")
+def _own_connection(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    if not isinstance(session.bind, Connection):
+        connection.info[_OWNER] = weakref.ref(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed(session: Session) -> None:
+    entries = session.info.pop(_PENDING, None)
+    if not entries:
+        return
+    bind = session.bind
+    if isinstance(bind, Connection) and bind.in_transaction():
+        # Still inside a transaction the session only joined: its owner
+        # commits or rolls them back.
+        owner = bind.info.get(_OWNER)
+        outer = owner() if owner is not None else None
+        if outer is not None:
+            outer.info.setdefault(_PENDING, []).extend(entries)
+        return
+    log = _log
+    if log is not None:
+        for entry in entries:
+            log.put(entry)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted(session: Session, transaction: SessionTransaction) -> None:
+    # Runs after after_commit, so whatever is left was rolled back.
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+class AuditLog:
+    """Bounded queue of audit entries and the thread writing them in batches."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        queue_size: int,
+        batch_size: int,
+        interval: float,
+        spill_path: str,
+    ) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spill_path = spill_path
+        self._queue: "queue.Queue[Union[Entry, threading.Event]]" = queue.Queue(queue_size)
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+
+    def start(self) -> None:
+        global _log
+        _log = self
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop taking entries and write the queued ones."""
+        global _log
+        if _log is self:
+            _log = None
+        self._stop.set()
+        self.flush()
+        self._thread.join()
+
+    def put(self, entry: Entry) -> None:
+        """Queue an entry without blocking; spill it if the queue is full."""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._spill([entry])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been written or spilled."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _collect(self) -> Tuple[List[Entry], List[threading.Event]]:
+        """Wait for a batch: full, an interval old, or cut short by a flush."""
+        batch: List[Entry] = []
+        waiters: List[threading.Event] = []
+        try:
+            item = self._queue.get(timeout=self.interval)
+        except queue.Empty:
+            return batch, waiters
+        deadline = time.monotonic() + self.interval
+        while True:
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+                break
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        return batch, waiters
+
+    def _write(self, batch: List[Entry]) -> None:
+        try:
+            self._replay()
+            with self.engine.begin() as connection:
+                connection.execute(insert(AuditEntry), batch)
+        except Exception:
+            logger.exception("Writing %d audit entries failed; spilling them", len(batch))
+            self._spill(batch)
+        else:
+            AUDIT_ENTRIES.inc("written", amount=len(batch))
+
+    def _spill(self, entries: List[Entry]) -> None:
+        self._append([
+            json.dumps({**entry, "ts": entry["ts"].isoformat()}) + "\n" for entry in entries
+        ])
+        AUDIT_ENTRIES.inc("spilled", amount=len(entries))
+
+    def _append(self, lines: List[str]) -> None:
+        with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as file:
+            file.write("".join(lines))
+
+    def _replay(self) -> None:
+        """
+        Write the spilled entries, putting them back in the spill file if that fails.
+
+        The file is read and removed under the lock, so request threads
+        spilling meanwhile wait for a file read, never for the inserts.
+        """
+        if not os.path.exists(self.spill_path):
+            return
+        with self._spill_lock:
+            with open(self.spill_path, encoding="utf-8") as file:
+                lines = file.readlines()
+            os.remove(self.spill_path)
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash mid-write.
+                logger.warning("Skipping an unreadable spilled audit entry")
+                continue
+            entries.append({**entry, "ts": datetime.fromisoformat(entry["ts"])})
+        try:
+            with self.engine.begin() as connection:
+                for i in range(0, len(entries), self.batch_size):
+                    connection.execute(insert(AuditEntry), entries[i:i + self.batch_size])
+        except Exception:
+            self._append(lines)
+            raise
+        AUDIT_ENTRIES.inc("replayed", amount=len(entries))
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch, waiters = self._collect()
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+
+_log: Optional[AuditLog] = None
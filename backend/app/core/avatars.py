@@ -0,0 +1,133 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageOps
+from app.core.config import Settings
+
+AVATAR_URL_PREFIX = "/api/v1/avatars"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, "Future[None]"] = {}
+_lock = Lock()
+
+
+def avatar_root(app_settings: Settings) -> Path:
+    """Directory holding avatar originals and variants."""
+    return Path(app_settings.media_root) / "avatars"
+
+
+def original_path(app_settings: Settings, digest: str) -> Path:
+    """Location of the original upload for a content digest."""
+    return avatar_root(app_settings) / "originals" / digest[:2] / digest
+
+
+def variant_path(app_settings: Settings, digest: str, size: int) -> Path:
+    """Location of the square WebP variant of ``size`` pixels."""
+    return avatar_root(app_settings) / str(size) / digest[:2] / f"{digest}.webp"
+
+
+def avatar_url(app_settings: Settings, digest: str, size: Optional[int] = None) -> str:
+    """Public URL of a variant, the largest one by default."""
+    return f"{AVATAR_URL_PREFIX}/{digest}/{size or max(app_settings.avatar_sizes)}.webp"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def store_original(app_settings: Settings, data: bytes) -> str:
+    """
+    Store an uploaded image under its SHA-256 digest.
+
+    Identical uploads map to the same file, so duplicates are free.
+    Raises ``ValueError`` if the data is not a readable image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except Exception as exc:
+        raise ValueError("Uploaded file is not a supported image") from exc
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = original_path(app_settings, digest)
+    if not path.exists():
+        _write_atomic(path, data)
+    return digest
+
+
+def render_variants(source: str, targets: List[Tuple[int, str]]) -> None:
+    """Render square WebP variants of ``source``; runs in a worker process."""
+    with Image.open(source) as original:
+        oriented = ImageOps.exif_transpose(original)
+        has_alpha = oriented.mode in ("RGBA", "LA") or "transparency" in oriented.info
+        image = oriented.convert("RGBA" if has_alpha else "RGB")
+        for size, target in sorted(targets, reverse=True):
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format="WEBP", quality=80, method=4)
+            _write_atomic(Path(target), buffer.getvalue())
+
+
+def _get_executor(app_settings: Settings) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned workers avoid forking a process that is running threads.
+        _executor = ProcessPoolExecutor(
+            max_workers=app_settings.avatar_process_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def schedule_variants(app_settings: Settings, digest: str) -> "Optional[Future[None]]":
+    """
+    Render any missing variants for ``digest`` in the process pool.
+
+    Returns the pending future, or ``None`` if every variant exists.
+    Concurrent calls for the same digest share one job.
+    """
+    with _lock:
+        pending = _pending.get(digest)
+        if pending is not None:
+            return pending
+        targets = [
+            (size, str(variant_path(app_settings, digest, size)))
+            for size in app_settings.avatar_sizes
+            if not variant_path(app_settings, digest, size).exists()
+        ]
+        if not targets:
+            return None
+        future = _get_executor(app_settings).submit(
+            render_variants, str(original_path(app_settings, digest)), targets
+        )
+        _pending[digest] = future
+
+    def _done(_: "Future[None]") -> None:
+        with _lock:
+            _pending.pop(digest, None)
+
+    future.add_done_callback(_done)
+    return future
+
+
+def shutdown() -> None:
+    """Stop the variant worker pool."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
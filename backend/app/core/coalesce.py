@@ -0,0 +1,224 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+While a call with a given key is in flight, further callers with the same
+key wait for it and share its result, or its exception, instead of running
+their own. Nothing is cached: the next call after it returns runs afresh.
+
+Two ways in:
+
+* ``coalesce(name)`` decorates a CRUD read method; the key is the
+  session's engine and the method's other arguments. Every caller gets
+  the leader's result, so only decorate reads returning immutable,
+  session-free values such as Core rows, never ORM objects.
+* ``coalesced`` marks a GET endpoint on a ``CoalescingRoute`` router;
+  requests with the same path, query, and credentials share the
+  leader's serialized response, dependencies and validation included.
+  The endpoint must return a body, not stream.
+
+Reads that may see uncommitted writes are never shared: neither layer
+coalesces inside a shared session (a transactional batch), and
+``coalesce`` also runs sessions with pending changes on their own.
+
+``coalesced_calls_total`` counts leaders and followers per group; the
+coalesce ratio is followers / (leaders + followers).
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+from app.core.metrics import COALESCED_CALLS
+from app.core.profiling import ProfilingRoute
+from app.db.database import get_shared_session
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Call:
+    """An in-flight synchronous call and, once done, its outcome."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """One in-flight call per key; concurrent callers with the key share it."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Futures belong to one event loop, so the loop is part of the key.
+        self._futures: Dict[
+            Tuple[asyncio.AbstractEventLoop, Hashable], "asyncio.Future[Any]"
+        ] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Run ``func``, or wait for the thread already running it for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not leader:
+            COALESCED_CALLS.inc(self.name, "follower")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[no-any-return]
+        COALESCED_CALLS.inc(self.name, "leader")
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Await ``func()``, or the call already in flight for ``key`` on this loop."""
+        loop = asyncio.get_running_loop()
+        loop_key = (loop, key)
+        with self._lock:
+            future = self._futures.get(loop_key)
+            leader = future is None
+            if future is None:
+                future = self._futures[loop_key] = loop.create_future()
+        if not leader:
+            COALESCED_CALLS.inc(self.name, "follower")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The leader was cancelled, not us: run it ourselves.
+                    return await self.do_async(key, func)
+                raise
+        COALESCED_CALLS.inc(self.name, "leader")
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Retrieved, so a leader without followers logs nothing.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
+
+
+def _key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _session_key(
+    self: Any, db: Session, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Optional[Hashable]:
+    """The coalescing key of a read on ``db``; ``None`` if it must run on its own."""
+    if get_shared_session() is not None or db.new or db.dirty or db.deleted:
+        return None
+    return _key((id(self), db.get_bind()) + args, kwargs)
+
+
+def coalesce(name: str) -> Callable[[F], F]:
+    """Coalesce concurrent calls of a ``(self, db, ...)`` read method with equal arguments."""
+    group = SingleFlight(name)
+
+    def decorator(method: F) -> F:
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self: Any, db: Session, *args: Any, **kwargs: Any) -> Any:
+                key = _session_key(self, db, args, kwargs)
+                if key is None:
+                    return await method(self, db, *args, **kwargs)
+                return await group.do_async(key, lambda: method(self, db, *args, **kwargs))
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(method)
+        def wrapper(self: Any, db: Session, *args: Any, **kwargs: Any) -> Any:
+            key = _session_key(self, db, args, kwargs)
+            if key is None:
+                return method(self, db, *args, **kwargs)
+            return group.do(key, lambda: method(self, db, *args, **kwargs))
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def coalesced(endpoint: F) -> F:
+    """Mark a GET endpoint for request coalescing by ``CoalescingRoute``."""
+    endpoint.__coalesced__ = True  # type: ignore[attr-defined]
+    return endpoint
+
+
+# Status, body and headers of a rendered response; immutable, so shareable.
+Snapshot = Tuple[int, bytes, Tuple[Tuple[bytes, bytes], ...]]
+
+
+def _snapshot(response: Response) -> Snapshot:
+    return response.status_code, response.body, tuple(response.raw_headers)
+
+
+def _restore(snapshot: Snapshot) -> Response:
+    # Middleware may append headers to a response as it goes out, so every
+    # request gets its own copy.
+    status_code, body, headers = snapshot
+    response = Response(content=body, status_code=status_code)
+    response.raw_headers = list(headers)
+    return response
+
+
+def request_key(request: Request) -> Hashable:
+    """What identifies a request's response: path, sorted query, and credentials."""
+    return (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        request.headers.get("authorization"),
+        request.headers.get("cookie"),
+    )
+
+
+class CoalescingRoute(ProfilingRoute):
+    """ProfilingRoute coalescing concurrent identical GETs of ``coalesced`` endpoints."""
+
+    def get_route_handler(self) -> Callable[..., Any]:
+        handler = super().get_route_handler()
+        if not getattr(self.endpoint, "__coalesced__", False):
+            return handler
+        group = SingleFlight(f"route:{self.path_format}")
+
+        async def render(request: Request) -> Snapshot:
+            return _snapshot(await handler(request))
+
+        async def coalescing_handler(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD") or get_shared_session() is not None:
+                return await handler(request)  # type: ignore[no-any-return]
+            key = (request.method, request_key(request))
+            return _restore(await group.do_async(key, lambda: render(request)))
+
+        return coalescing_handler
+
@@ -0,0 +1,152 @@
+"""
+Adaptive per-route-class concurrency limits.
+
+Each route class (auth, reads, writes) gets its own in-flight limit. A
+request over the limit is answered at once with 503 and ``Retry-After``
+instead of queueing for a worker thread or a database connection. Limits
+move AIMD-style on observed latency: one step up when a busy class stays
+fast, a multiplicative cut when latency climbs past ``tolerance`` times its
+long-run average, at most once per round trip.
+"""
+import json
+import math
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Collection, Dict, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.metrics import CONCURRENCY_IN_FLIGHT, CONCURRENCY_LIMIT, REQUESTS_REJECTED
+
+AUTH = "auth"
+READS = "reads"
+WRITES = "writes"
+ROUTE_CLASSES = (AUTH, READS, WRITES)
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+AUTH_PREFIX = "/api/v1/auth/"
+
+# Set while a request holds a slot, so in-process sub-requests (batch) are not
+# admitted a second time.
+_admitted: ContextVar[bool] = ContextVar("concurrency_admitted", default=False)
+
+
+class AdaptiveLimit:
+    """AIMD limit on concurrent requests driven by observed latency."""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        smoothing: float = 0.01,
+        clock: Callable[[], float] = perf_counter,
+    ) -> None:
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.clock = clock
+        self.in_flight = 0
+        # Long-run average latency, the yardstick for "too slow".
+        self.average: Optional[float] = None
+        self._last_decrease = -math.inf
+
+    def try_acquire(self) -> bool:
+        """Take a slot, or return ``False`` if the class is at its limit."""
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, dropped: bool = False) -> None:
+        """Return a slot and adapt the limit to how long the request took."""
+        busy = self.in_flight * 2 >= self.limit
+        self.in_flight -= 1
+        now = self.clock()
+        slow = self.average is not None and latency > self.average * self.tolerance
+        if dropped or slow:
+            if now - self._last_decrease >= latency:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        elif busy:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        if not dropped:
+            if self.average is None:
+                self.average = latency
+            else:
+                self.average += self.smoothing * (latency - self.average)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying."""
+        return max(1, math.ceil(2 * (self.average or 0.0)))
+
+
+def route_class(scope: Scope) -> str:
+    """Classify a request as auth, a read or a write."""
+    if scope["path"].startswith(AUTH_PREFIX):
+        return AUTH
+    return READS if scope["method"] in SAFE_METHODS else WRITES
+
+
+class ConcurrencyLimitMiddleware:
+    """Pure ASGI middleware shedding requests over their class's limit."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float,
+        backoff: float,
+        bypass: Collection[str] = ("/health",),
+    ) -> None:
+        self.app = app
+        self.bypass = frozenset(bypass)
+        self.limits: Dict[str, AdaptiveLimit] = {
+            name: AdaptiveLimit(initial, min_limit, max_limit, tolerance, backoff)
+            for name in ROUTE_CLASSES
+        }
+        for name, limit in self.limits.items():
+            CONCURRENCY_LIMIT.set(int(limit.limit), name)
+            CONCURRENCY_IN_FLIGHT.set(0, name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.bypass or _admitted.get():
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope)
+        limit = self.limits[name]
+        if not limit.try_acquire():
+            REQUESTS_REJECTED.inc(name)
+            await self.reject(send, limit.retry_after())
+            return
+
+        CONCURRENCY_IN_FLIGHT.inc(name)
+        token = _admitted.set(True)
+        start = perf_counter()
+        dropped = True
+        try:
+            await self.app(scope, receive, send)
+            dropped = False
+        finally:
+            _admitted.reset(token)
+            limit.release(perf_counter() - start, dropped)
+            CONCURRENCY_IN_FLIGHT.dec(name)
+            CONCURRENCY_LIMIT.set(int(limit.limit), name)
+
+    async def reject(self, send: Send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +8,9 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "postgresql://family_user:family_password@db:5432/family_planner"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_warmup_connections: int = 2
     
     # Security
     secret_key: str = "your-secret-key-change-this-in-production"
@@ -16,9 +20,137 @@ class Settings(BaseSettings):
     # Application
     debug: bool = True
     environment: str = "development"
+    cors_origins: List[str] = ["http://localhost:3000"]
+    warmup_on_startup: bool = True
+
+    # Server
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 sizes the worker pool from the available CPUs
+    server_threadpool_size: int = 40
+    server_keepalive: int = 5
+    server_backlog: int = 2048
+    server_loop: Literal["auto", "uvloop", "asyncio"] = "auto"
+    server_http: Literal["auto", "httptools", "h11"] = "auto"
+    server_graceful_timeout: int = 30
+    # Run the background jobs (chore rotation, stats compaction, reminder
+    # dispatch) in this process; with several workers, app.server leaves
+    # it set in the first worker only
+    background_jobs_enabled: bool = True
+
+    # Metrics
+    metrics_enabled: bool = True
+    metrics_multiprocess_dir: Optional[str] = None
+    metrics_flush_interval: float = 5.0
+
+    # Logging: records queued on the request path, written by a background thread
+    logging_enabled: bool = True
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_queue_size: int = 10_000  # records beyond this are dropped, never waited for
+    log_flush_interval: float = 0.05  # seconds between batched writes
+    log_access: bool = True
+    log_access_sample_rate: float = 1.0
+    # Per route template, overriding log_access_sample_rate; 5xx are always logged
+    log_access_route_rates: Dict[str, float] = {"/health": 0.0, "/metrics": 0.0}
+    log_sql: bool = False  # every statement at DEBUG, with its duration and request id
+
+    # Tracing: head-sampled spans, exported in batches by a background thread
+    tracing_enabled: bool = False
+    trace_sample_rate: float = 0.01  # of new traces; an incoming traceparent decides its own
+    trace_exporter: Literal["console", "file", "otlp"] = "console"
+    trace_file: Optional[str] = None  # JSON lines, for the file exporter
+    trace_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    trace_service_name: str = "family-planner-api"
+    trace_queue_size: int = 10_000  # spans beyond this are dropped, never waited for
+    trace_batch_size: int = 512
+    trace_flush_interval: float = 1.0
+
+    # Profiling
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None  # value of the X-Profile request header
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "profiles"
+    profiling_max_files: int = 50
+
+    # Adaptive concurrency limits, one per route class (auth, reads, writes)
+    concurrency_limit_enabled: bool = True
+    concurrency_initial_limit: int = 20
+    concurrency_min_limit: int = 1
+    concurrency_max_limit: int = 200
+    concurrency_latency_tolerance: float = 2.0  # x long-run latency counts as slow
+    concurrency_backoff: float = 0.9
+
+    # Login and signup throttling
+    throttle_enabled: bool = True
+    throttle_ip_burst: int = 20
+    throttle_ip_per_minute: float = 10.0
+    throttle_email_burst: int = 5
+    throttle_email_per_minute: float = 2.0
+    throttle_free_failures: int = 3
+    throttle_backoff_base: float = 1.0
+    throttle_backoff_max: float = 900.0
+    throttle_max_keys: int = 100_000
+    throttle_redis_url: Optional[str] = None  # share state between workers
+
+    # Recurring tasks: expanded occurrence windows cached per rule
+    recurrence_cache_rules: int = 10_000
+    recurrence_cache_windows_per_rule: int = 4
+
+    # Chore rotation: rotating tasks are assigned this far ahead, balancing
+    # each member's load over the lookback window plus the horizon
+    rotation_interval: float = 3600.0  # seconds between background runs; 0 disables
+    rotation_horizon_days: int = 14
+    rotation_lookback_days: int = 28
+
+    # Completion stats: days before the current week and month are folded
+    # into week and month rollups
+    stats_compaction_interval: float = 3600.0  # seconds between background runs; 0 disables
+
+    # Task reminders: materialized this far ahead and dispatched in process
+    reminders_enabled: bool = True
+    reminder_tick: float = 1.0  # dispatch resolution, seconds
+    reminder_window: float = 300.0  # seconds of pending reminders loaded at a time
+    reminder_horizon_days: int = 30
+    reminder_batch_size: int = 100
+    reminder_day_start_hour: int = 8  # occurrences fall due at this UTC hour
+    reminder_max_lateness: float = 3600.0  # older reminders are dropped on startup
+    reminder_notifier: Literal["log", "file"] = "log"
+    reminder_file: Optional[str] = None  # JSON lines, for the file notifier
+
+    # Audit log: entries are queued and written in batches by a background thread
+    audit_enabled: bool = True
+    audit_queue_size: int = 10_000
+    audit_batch_size: int = 500
+    audit_flush_interval: float = 1.0
+    audit_spill_path: str = "audit-spill.jsonl"  # written while the database is unavailable
+
+    # Migrations: guards on every migration connection, and backfill pacing
+    migration_lock_timeout: float = 5.0  # seconds DDL may wait for a lock; 0 waits forever
+    migration_statement_timeout: float = 300.0  # seconds per statement; 0 for no limit
+    migration_backfill_batch_size: int = 1000
+    migration_backfill_pause: float = 0.1  # seconds between backfill batches
+
+    # Delta sync
+    sync_page_size: int = 200
+
+    # Batch requests
+    batch_max_requests: int = 20
+
+    # Media
+    media_root: str = "media"
+    avatar_sizes: List[int] = [32, 64, 128]
+    avatar_max_upload_bytes: int = 5 * 1024 * 1024
+    avatar_process_workers: int = 2
     
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Get the process-wide settings."""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,23 +1,23 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from typing import Optional
+from app.core.config import Settings
+from app.db.database import get_db
+from app.core.profiling import profiled
+from app.core.tracing import traced
 from app.core.security import verify_token
+from app.core.throttle import LoginThrottle
+from app.crud.family import family_crud
 from app.crud.user import user_crud
+from app.models.family import FamilyMember
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
-
-
+@profiled
+@traced("depends get_current_user")
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -38,3 +38,32 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     return user
+
+
+@profiled
+@traced("depends get_family_membership")
+def get_family_membership(
+    family_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> FamilyMember:
+    """
+    Get the current user's membership of ``family_id``.
+
+    Non-members get 404, so they cannot tell whether the family exists.
+    """
+    membership = family_crud.get_membership(db, family_id=family_id, user_id=current_user.id)
+    if membership is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Family not found")
+    return membership
+
+
+def get_settings(request: Request) -> Settings:
+    """Get the settings the app was built with."""
+    app_settings: Settings = request.app.state.settings
+    return app_settings
+
+
+def get_throttle(request: Request) -> Optional[LoginThrottle]:
+    """Get the app's login throttle, if throttling is enabled."""
+    return getattr(request.app.state, "throttle", None)
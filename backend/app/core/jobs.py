@@ -0,0 +1,126 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Callable, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.crud.assignment import assignment_crud
+from app.crud.stats import stats_crud
+from app.models.stats import MONTH, WEEK, period_start
+from app.models.task import Task, TaskAssignment
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_family(
+    db: Session, *, family_id: int, start: date, horizon_days: int, lookback_days: int
+) -> List[TaskAssignment]:
+    """Assign a family's rotating chores for ``horizon_days`` from ``start``."""
+    return assignment_crud.schedule(
+        db,
+        family_id=family_id,
+        start=start,
+        end=start + timedelta(days=horizon_days - 1),
+        since=start - timedelta(days=lookback_days),
+    )
+
+
+def schedule_rotations(
+    db: Session, *, today: date, horizon_days: int, lookback_days: int
+) -> int:
+    """Assign the next ``horizon_days`` of rotating chores in every family."""
+    family_ids = db.execute(
+        select(Task.family_id).where(Task.rotate.is_(True)).distinct()
+    ).scalars().all()
+    return sum(
+        len(schedule_family(
+            db, family_id=family_id, start=today,
+            horizon_days=horizon_days, lookback_days=lookback_days,
+        ))
+        for family_id in family_ids
+    )
+
+
+def compact_stats(db: Session, *, today: date) -> int:
+    """Fold completion days before the current week and month into rollups."""
+    before = min(period_start(WEEK, today), period_start(MONTH, today))
+    return stats_crud.compact(db, before=before)
+
+
+class IntervalJob(ABC):
+    """Background thread calling ``run_once`` every ``interval`` seconds."""
+
+    # Names the job in the thread name and in logs.
+    name = "job"
+    title = "Job"
+    # Logged with run_once's result after each successful run.
+    summary = "%d"
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    @abstractmethod
+    def run_once(self) -> int:
+        """Do one run; the result is logged with ``summary``."""
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                result = self.run_once()
+            except Exception:
+                logger.exception("%s run failed", self.title)
+            else:
+                logger.info(f"{self.title} {self.summary}", result)
+
+
+class RotationJob(IntervalJob):
+    """Background thread keeping rotating chores assigned ahead of time."""
+
+    name = "rotation-job"
+    title = "Chore rotation"
+    summary = "assigned %d occurrences"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float,
+        horizon_days: int,
+        lookback_days: int,
+    ) -> None:
+        super().__init__(session_factory, interval)
+        self.horizon_days = horizon_days
+        self.lookback_days = lookback_days
+
+    def run_once(self) -> int:
+        """Schedule every family now; returns the number of new assignments."""
+        with self.session_factory() as db:
+            return schedule_rotations(
+                db,
+                today=date.today(),
+                horizon_days=self.horizon_days,
+                lookback_days=self.lookback_days,
+            )
+
+
+class StatsCompactionJob(IntervalJob):
+    """Background thread folding past completion days into week and month rollups."""
+
+    name = "stats-compaction-job"
+    title = "Stats compaction"
+    summary = "folded %d days"
+
+    def run_once(self) -> int:
+        """Compact now; returns the number of day rollups folded."""
+        with self.session_factory() as db:
+            return compact_stats(db, today=date.today())
@@ -0,0 +1,301 @@
+"""
+Structured logging that never blocks the request path.
+
+``configure`` routes the root logger through a queue. A record is prepared
+on the thread that logs it (message merged, traceback rendered, request id
+attached) and put on a bounded queue without waiting; a writer thread
+formats the queued records, as one JSON object per line by default, and
+writes them in batches. When the queue is full the record is dropped and
+counted in ``log_records_dropped_total`` instead of stalling the request.
+
+``AccessLogMiddleware`` gives every request a correlation id, taken from a
+well-formed ``X-Request-ID`` header or generated, and returns it in the
+response. The id lives in a context variable, which the threadpool copies
+into sync endpoints and dependencies, so records logged from ``get_db``,
+CRUD calls and their SQL statements carry it. One access record per
+request goes to ``app.access``, sampled per route template; server errors
+are always logged.
+"""
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Mapping, Optional, TextIO
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import Settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client-supplied ids are kept only if they look like ids.
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s"
+
+access_logger = logging.getLogger("app.access")
+sql_logger = logging.getLogger("app.sql")
+# Third-party loggers chatty at INFO (pool recycling, every HTTP call);
+# held at WARNING so they do not crowd access records out of the queue.
+# SQLAlchemy names pool loggers after the pool class, hence TimedQueuePool's.
+QUIET_LOGGERS = ("sqlalchemy", "app.db.database.TimedQueuePool", "httpx", "httpcore")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_exception_formatter = logging.Formatter()
+
+# Attributes every record has; any others were passed with ``extra``.
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "request_id"}
+
+
+def get_request_id() -> Optional[str]:
+    """Correlation id of the request being served, if any."""
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id, extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue records for the writer thread; drop them when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks are rendered now: by the time the writer
+        # gets to them the objects they refer to may have changed. In place,
+        # which leaves the record as any formatter would render it anyway.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class LogWriter:
+    """
+    Thread writing queued records as formatted lines, a batch at a time.
+
+    It wakes every ``interval`` seconds and writes what has queued up
+    since with one write and flush, so the request threads it shares the
+    interpreter with are interrupted per batch rather than per record.
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[logging.LogRecord]",
+        stream: TextIO,
+        formatter: logging.Formatter,
+        *,
+        interval: float,
+    ) -> None:
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write what is queued, then stop."""
+        self._stop.set()
+        self._thread.join()
+
+    def _write(self) -> None:
+        lines = []
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                lines.append(self.formatter.format(record) + "\n")
+            except Exception:
+                LOG_RECORDS_DROPPED.inc()
+        if lines:
+            self.stream.write("".join(lines))
+            self.stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
+        self._write()
+
+
+def configure(app_settings: Settings, stream: Optional[TextIO] = None) -> Callable[[], None]:
+    """
+    Send the root logger's records through a queue to a writer thread.
+
+    Other handlers on the root logger are left alone. Returns a function
+    that writes out what is queued and undoes the configuration.
+    """
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(app_settings.log_queue_size)
+    formatter = JsonFormatter() if app_settings.log_json else logging.Formatter(TEXT_FORMAT)
+    writer = LogWriter(
+        log_queue, stream or sys.stderr, formatter, interval=app_settings.log_flush_interval
+    )
+    handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    root_level, sql_level = root.level, sql_logger.level
+    quiet = [logging.getLogger(name) for name in QUIET_LOGGERS]
+    quiet_levels = [logger.level for logger in quiet]
+    root.setLevel(app_settings.log_level)
+    for logger in quiet:
+        logger.setLevel(max(logging.WARNING, logging.getLevelName(app_settings.log_level)))
+    if app_settings.log_sql:
+        sql_logger.setLevel(logging.DEBUG)
+    root.addHandler(handler)
+    writer.start()
+
+    def undo() -> None:
+        root.removeHandler(handler)
+        root.setLevel(root_level)
+        sql_logger.setLevel(sql_level)
+        for logger, level in zip(quiet, quiet_levels):
+            logger.setLevel(level)
+        writer.stop()
+
+    return undo
+
+
+def install_sql_logging(engine: Engine) -> Callable[[], None]:
+    """Log every statement of ``engine`` at DEBUG on ``app.sql``, with its duration."""
+
+    def before(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    def after(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        start = conn.info["query_start"].pop()
+        if sql_logger.isEnabledFor(logging.DEBUG):
+            sql_logger.debug(
+                "%s", statement, extra={"duration_ms": round((perf_counter() - start) * 1000, 3)}
+            )
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+
+    def remove() -> None:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+    return remove
+
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware: request ids, and sampled access records."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        log_access: bool = True,
+        sample_rate: float = 1.0,
+        route_rates: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.app = app
+        self.log_access = log_access
+        self.sample_rate = sample_rate
+        # Route template -> sample rate, overriding ``sample_rate``.
+        self.route_rates = dict(route_rates or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or secrets.token_hex(8)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers: List[Any] = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_id.set(request_id)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._log(scope, status_code, perf_counter() - start)
+            _request_id.reset(token)
+
+    def _log(self, scope: Scope, status_code: int, elapsed: float) -> None:
+        if not (self.log_access and access_logger.isEnabledFor(logging.INFO)):
+            return
+        route = getattr(scope.get("route"), "path", None)
+        rate = self.route_rates.get(route, self.sample_rate) if route else self.sample_rate
+        if status_code < 500 and not (rate >= 1 or random.random() < rate):
+            return
+        client = scope.get("client")
+        # Built directly: the access record's caller is always this method,
+        # so the stack walk ``Logger.info`` would do is skipped.
+        record = access_logger.makeRecord(
+            access_logger.name,
+            logging.INFO,
+            __file__,
+            0,
+            "%s %s %d",
+            (scope["method"], scope["path"], status_code),
+            None,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 3),
+                "client": client[0] if client else None,
+            },
+        )
+        access_logger.handle(record)
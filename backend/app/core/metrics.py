@@ -0,0 +1,427 @@
+"""
+In-process Prometheus metrics.
+
+Counters, gauges and histograms are plain dicts guarded by a lock, so
+recording a sample costs a dict lookup and an addition. With a
+multiprocess directory configured, every worker periodically writes its
+snapshot to ``<dir>/<pid>.json`` and ``/metrics`` sums the files, so any
+worker can answer a scrape for the whole pool.
+"""
+import json
+import os
+import tempfile
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from anyio import CapacityLimiter
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = Tuple[str, ...]
+Snapshot = Dict[str, Dict[str, Any]]
+
+
+class Metric:
+    """Base class for a named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, Any] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(labels), _copy(value)] for labels, value in self._values.items()]
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, list):
+        return [list(value[0]), value[1]]
+    return value
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+
+class Histogram(Metric):
+    """Distribution of observations in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, +Inf last, then the sum.
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class Registry:
+    """Collection of metrics plus callbacks that refresh sampled gauges."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> Callable[[], None]:
+        """Run ``collector`` before every snapshot; returns an unregister hook."""
+        with self._lock:
+            self._collectors.append(collector)
+
+        def remove() -> None:
+            with self._lock:
+                if collector in self._collectors:
+                    self._collectors.remove(collector)
+
+        return remove
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            collector()
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def clear(self) -> None:
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    metric = Counter(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    metric = Gauge(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    metric = Histogram(name, documentation, labelnames, buckets)
+    REGISTRY.register(metric)
+    return metric
+
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+THREADPOOL_BORROWED = gauge(
+    "threadpool_tokens_borrowed", "Worker threads busy running sync endpoints."
+)
+THREADPOOL_TOTAL = gauge(
+    "threadpool_tokens_total", "Worker thread limit for sync endpoints."
+)
+DB_POOL_CHECKOUT_WAIT = histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+DB_POOL_CHECKED_OUT = gauge(
+    "db_pool_connections_checked_out", "Database connections currently in use."
+)
+PASSWORD_HASH_DURATION = histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt hashing and verification.",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+CACHE_REQUESTS = counter(
+    "cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+CONCURRENCY_LIMIT = gauge(
+    "http_concurrency_limit",
+    "Adaptive in-flight request limit by route class.",
+    ("route_class",),
+)
+CONCURRENCY_IN_FLIGHT = gauge(
+    "http_concurrency_in_flight",
+    "Requests holding a concurrency slot by route class.",
+    ("route_class",),
+)
+REQUESTS_REJECTED = counter(
+    "http_requests_rejected_total",
+    "Requests shed with 503 by the concurrency limiter.",
+    ("route_class",),
+)
+COALESCED_CALLS = counter(
+    "coalesced_calls_total",
+    "Coalesced calls by group and role; followers shared a leader's result.",
+    ("group", "role"),
+)
+AUDIT_ENTRIES = counter(
+    "audit_entries_total", "Audit entries by outcome (written, spilled, replayed).", ("result",)
+)
+REMINDERS = counter(
+    "reminders_total", "Task reminders by outcome.", ("result",)
+)
+LOG_RECORDS_DROPPED = counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+)
+TRACE_SPANS_DROPPED = counter(
+    "trace_spans_dropped_total", "Finished spans dropped: queue full or export failed."
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; the hit ratio is hits / all lookups."""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def install_collectors(limiter: CapacityLimiter, engine: Engine) -> Callable[[], None]:
+    """Sample threadpool and connection pool usage at every snapshot."""
+
+    def collect() -> None:
+        THREADPOOL_BORROWED.set(limiter.borrowed_tokens)
+        THREADPOOL_TOTAL.set(limiter.total_tokens)
+        if isinstance(engine.pool, QueuePool):
+            DB_POOL_CHECKED_OUT.set(engine.pool.checkedout())
+
+    return REGISTRY.add_collector(collect)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency and concurrency."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # Route templates keep label cardinality bounded.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.observe(
+                perf_counter() - start, scope["method"], route, str(status_code)
+            )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str, registry: Registry = REGISTRY) -> None:
+    """Write this process's snapshot to ``directory`` atomically."""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    data = {"pid": os.getpid(), "metrics": registry.snapshot()}
+    fd, tmp = tempfile.mkstemp(dir=path, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path / f"{os.getpid()}.json")
+
+
+def aggregate(directory: str) -> Snapshot:
+    """
+    Merge every worker snapshot in ``directory``.
+
+    Counters and histograms are summed across all files, including those
+    of workers that have exited. Gauges only count live workers.
+    """
+    merged: Snapshot = {}
+    for file in sorted(Path(directory).glob("*.json")):
+        try:
+            data = json.loads(file.read_text())
+        except (OSError, ValueError):
+            continue
+        alive = _pid_alive(int(data["pid"]))
+        for name, metric in data["metrics"].items():
+            if metric["kind"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "values": []})
+            values = {tuple(labels): value for labels, value in target["values"]}
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = _copy(value)
+                elif metric["kind"] == "histogram":
+                    counts, total = values[key]
+                    values[key] = [
+                        [a + b for a, b in zip(counts, value[0])],
+                        total + value[1],
+                    ]
+                else:
+                    values[key] += value
+            target["values"] = [[list(key), value] for key, value in values.items()]
+    return merged
+
+
+class SnapshotWriter:
+    """Background thread flushing the registry to a multiprocess directory."""
+
+    def __init__(self, directory: str, interval: float) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-writer", daemon=True
+        )
+
+    def start(self) -> None:
+        write_snapshot(self.directory)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        write_snapshot(self.directory)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            write_snapshot(self.directory)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _lines(snapshot: Snapshot) -> Iterator[str]:
+    for name, metric in sorted(snapshot.items()):
+        yield f"# HELP {name} {metric['help']}"
+        yield f"# TYPE {name} {metric['kind']}"
+        labelnames = metric["labelnames"]
+        for labels, value in sorted(metric["values"], key=lambda item: item[0]):
+            if metric["kind"] != "histogram":
+                yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+                continue
+            counts, total = value
+            cumulative = 0
+            bounds = list(metric["buckets"]) + [float("inf")]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}"
+            yield f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(total)}"
+            yield f"{name}_count{_format_labels(labelnames, labels)} {cumulative}"
+
+
+def render(multiprocess_dir: Optional[str] = None) -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    if multiprocess_dir:
+        write_snapshot(multiprocess_dir)
+        snapshot = aggregate(multiprocess_dir)
+    else:
+        snapshot = REGISTRY.snapshot()
+    return "\n".join(_lines(snapshot)) + "\n"
@@ -0,0 +1,395 @@
+"""
+On-demand per-request profiling.
+
+With ``profiling_enabled`` set, a request is profiled when it carries
+``X-Profile: <profiling_token>`` or is picked by ``profiling_sample_rate``.
+On the event loop only the steps of the request's own task are profiled,
+so other requests interleaved with it stay out, and sync endpoints and
+dependencies get their own segment on the worker thread they run on. One
+segment is profiled at a time: from Python 3.12 cProfile runs on
+``sys.monitoring``, which allows a single active profiler per process.
+The merged profile is written to ``profiling_dir`` as ``<id>.pstats``,
+``<id>.speedscope.json`` and a ``<id>.json`` summary, and the id is
+returned in the ``X-Profile-Id`` response header.
+
+With profiling disabled the middleware is not installed and the only cost
+left is one context variable lookup per sync endpoint call.
+"""
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import pstats
+import random
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import (
+    Any, Awaitable, Callable, Dict, Generator, Iterator, List, Optional, Set, Tuple, TypeVar,
+)
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# pstats key: (filename, line, function name)
+FuncKey = Tuple[str, int, str]
+
+# Entry points of each phase, as (file suffix, function name). A phase's time
+# is the cumulative time of its outermost entry points, so phases can nest
+# (SQL issued by a CRUD call counts towards both).
+CATEGORIES: Dict[str, Tuple[Tuple[str, Optional[str]], ...]] = {
+    "dependencies": (
+        ("fastapi/dependencies/utils.py", "solve_dependencies"),
+        ("app/core/deps.py", None),
+        ("app/db/database.py", "get_db"),
+    ),
+    "validation": (
+        ("fastapi/dependencies/utils.py", "request_params_to_args"),
+        ("fastapi/dependencies/utils.py", "request_body_to_args"),
+    ),
+    "crud": (("app/crud/base.py", None), ("app/crud/user.py", None)),
+    "sql": (
+        ("sqlalchemy/engine/default.py", "do_execute"),
+        ("sqlalchemy/engine/default.py", "do_executemany"),
+        ("sqlalchemy/engine/default.py", "do_execute_no_params"),
+    ),
+    "serialization": (
+        ("fastapi/routing.py", "serialize_response"),
+        ("starlette/responses.py", "render"),
+    ),
+}
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+# Only one request per process is profiled at a time; others simply run
+# unprofiled.
+_busy = threading.Lock()
+# Held while a segment's profiler is enabled. A segment starting meanwhile
+# (a batch sub-request on another worker thread) runs unprofiled.
+_active = threading.Lock()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class ProfileSession:
+    """Profiles collected for one request, one per thread segment."""
+
+    def __init__(self, profile_id: str) -> None:
+        self.id = profile_id
+        self._lock = threading.Lock()
+        # Enabled for each step of the request's task on the event loop.
+        self._loop = cProfile.Profile()
+        self._profiles: List[cProfile.Profile] = [self._loop]
+
+    @contextmanager
+    def segment(self, profile: Optional[cProfile.Profile] = None) -> Iterator[None]:
+        """Profile the current thread for the duration of the block."""
+        if not _active.acquire(blocking=False):
+            yield
+            return
+        try:
+            current = profile or cProfile.Profile()
+            try:
+                current.enable()
+            except ValueError:
+                # Another tool (a debugger or coverage) holds sys.monitoring's
+                # profiler slot.
+                yield
+                return
+            try:
+                yield
+            finally:
+                current.disable()
+        finally:
+            _active.release()
+        if profile is None:
+            with self._lock:
+                self._profiles.append(current)
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """
+        Await ``awaitable``, profiling only the steps it runs on this task.
+
+        Between steps the event loop runs other tasks; resuming it by hand,
+        as the task itself would, keeps them out of the profile.
+        """
+        coro = awaitable.__await__()
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            with self.segment(self._loop):
+                try:
+                    yielded = coro.send(value) if error is None else coro.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+            try:
+                value, error = await _Suspend(yielded), None
+            except BaseException as exc:
+                value, error = None, exc
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Merged statistics of every segment, or ``None`` if nothing ran."""
+        merged: Optional[pstats.Stats] = None
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if merged is None:
+                merged = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+        return merged
+
+
+class _Suspend:
+    """Pass what a coroutine step yielded on to the event loop and wait for it."""
+
+    def __init__(self, yielded: Any) -> None:
+        self.yielded = yielded
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        return (yield self.yielded)
+
+
+def current_session() -> Optional[ProfileSession]:
+    """The profile session of the current request, if it is being profiled."""
+    return _current.get()
+
+
+def profiled(call: F) -> F:
+    """
+    Profile ``call`` on whatever worker thread runs it.
+
+    Coroutine functions are returned unchanged: they run on the request's
+    task, whose steps the middleware already profiles.
+    """
+    if inspect.iscoroutinefunction(call) or getattr(call, "__profiled__", False):
+        return call
+
+    @functools.wraps(call)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        session = _current.get()
+        if session is None:
+            return call(*args, **kwargs)
+        with session.segment():
+            return call(*args, **kwargs)
+
+    wrapper.__profiled__ = True  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
+
+
+class ProfilingRoute(APIRoute):
+    """APIRoute whose sync endpoint is profiled on its worker thread, and traced."""
+
+    def get_route_handler(self) -> Callable[..., Any]:
+        if self.dependant.call is not None:
+            call = traced(f"endpoint {self.name}")(self.dependant.call)
+            self.dependant.call = profiled(call)
+        return super().get_route_handler()
+
+
+def _matches(key: FuncKey, entries: Tuple[Tuple[str, Optional[str]], ...]) -> bool:
+    filename, _, name = key
+    filename = filename.replace(os.sep, "/")
+    return any(
+        filename.endswith(suffix) and (function is None or name == function)
+        for suffix, function in entries
+    )
+
+
+def breakdown(stats: pstats.Stats) -> Dict[str, float]:
+    """Seconds spent in each phase of ``CATEGORIES``."""
+    data = stats.stats  # type: ignore[attr-defined]
+    result: Dict[str, float] = {}
+    for category, entries in CATEGORIES.items():
+        members = {key for key in data if _matches(key, entries)}
+        seconds = 0.0
+        for key in members:
+            _, _, _, cumulative, callers = data[key]
+            if not callers:
+                seconds += cumulative
+                continue
+            # Only count calls made from outside the phase.
+            seconds += sum(
+                edge[3] for caller, edge in callers.items() if caller not in members
+            )
+        result[category] = seconds
+    return result
+
+
+def _frame_name(key: FuncKey) -> Dict[str, Any]:
+    filename, line, name = key
+    if filename == "~":
+        return {"name": name}
+    return {"name": name, "file": filename, "line": line}
+
+
+def to_speedscope(stats: pstats.Stats, name: str, min_weight: float = 1e-6) -> Dict[str, Any]:
+    """
+    Convert ``stats`` to a speedscope sampled profile.
+
+    cProfile keeps caller/callee edges rather than stacks, so each stack's
+    weight is apportioned from the edges it is made of, like a flame graph.
+    """
+    data = stats.stats  # type: ignore[attr-defined]
+    children: Dict[FuncKey, List[FuncKey]] = defaultdict(list)
+    for key, (_, _, _, _, callers) in data.items():
+        for caller in callers:
+            children[caller].append(key)
+
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[FuncKey, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    def index(key: FuncKey) -> int:
+        if key not in frame_index:
+            frame_index[key] = len(frames)
+            frames.append(_frame_name(key))
+        return frame_index[key]
+
+    def walk(key: FuncKey, stack: List[int], path: Set[FuncKey], share: float) -> None:
+        _, _, own, cumulative, _ = data[key]
+        stack = stack + [index(key)]
+        if own * share >= min_weight:
+            samples.append(stack)
+            weights.append(own * share)
+        for child in children[key]:
+            if child in path:
+                continue
+            child_cumulative = data[child][3]
+            edge_cumulative = data[child][4][key][3]
+            if child_cumulative <= 0 or edge_cumulative * share < min_weight:
+                continue
+            walk(child, stack, path | {child}, edge_cumulative * share / child_cumulative)
+
+    for key, (_, _, _, _, callers) in data.items():
+        if not callers:
+            walk(key, [], {key}, 1.0)
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "family-planner",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def rotate(directory: Path, keep: int) -> None:
+    """Delete the oldest profiles so at most ``keep`` remain."""
+    groups: Dict[str, List[Path]] = defaultdict(list)
+    for path in directory.iterdir():
+        if not path.name.startswith("."):
+            groups[path.name.split(".", 1)[0]].append(path)
+    oldest_first = sorted(groups, key=lambda pid: max(p.stat().st_mtime for p in groups[pid]))
+    for profile_id in oldest_first[:max(0, len(groups) - keep)]:
+        for path in groups[profile_id]:
+            path.unlink(missing_ok=True)
+
+
+def save(session: ProfileSession, directory: str, keep: int, summary: Dict[str, Any]) -> None:
+    """Write the profile of ``session`` and rotate ``directory``."""
+    stats = session.stats()
+    if stats is None:
+        return
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    name = f"{summary['method']} {summary['path']}"
+    summary["breakdown"] = breakdown(stats)
+    stats.dump_stats(path / f"{session.id}.pstats")
+    (path / f"{session.id}.speedscope.json").write_text(json.dumps(to_speedscope(stats, name)))
+    (path / f"{session.id}.json").write_text(json.dumps(summary, indent=2))
+    rotate(path, keep)
+    logger.info("Profiled %s as %s: %s", name, session.id, summary["breakdown"])
+
+
+def new_profile_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(4)}"
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests that ask for it or are sampled."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        keep: int = 50,
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.keep = keep
+
+    def selected(self, scope: Scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return secrets.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Batch sub-requests are part of the parent's profile.
+        if scope["type"] != "http" or _current.get() is not None or not self.selected(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(new_profile_id())
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, session.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(session)
+        start = time.perf_counter()
+        try:
+            await session.run(self.app(scope, receive, send_wrapper))
+        finally:
+            duration = time.perf_counter() - start
+            _current.reset(token)
+            _busy.release()
+        summary = {
+            "id": session.id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(scope.get("route"), "path", None),
+            "status": status_code,
+            "duration": duration,
+        }
+        # The response is already sent; writing it out only delays this task.
+        await run_in_threadpool(save, session, self.directory, self.keep, summary)
@@ -0,0 +1,138 @@
+"""
+Recurring task expansion.
+
+A recurring task stores its rule (frequency, interval, optional end date)
+and its first due date; occurrences are never stored. ``occurrences`` is a
+generator that jumps straight to the first occurrence of a window and yields
+dates lazily, so expanding a month of a years-old daily rule costs the same
+as a new one. Skipped and moved occurrences are stored sparsely as task
+exceptions and applied on top of the expansion.
+
+Expanded windows are kept in an LRU per task. An entry is only served for
+the exact rule it was expanded from, so an edit made through another worker
+(or a reused task id) can never return stale dates; edits also drop the
+task's windows in the process that made them.
+"""
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from itertools import takewhile
+from typing import Iterator, NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+FREQUENCIES = (DAILY, WEEKLY, MONTHLY)
+
+Window = Tuple[date, date]
+
+
+class Rule(NamedTuple):
+    """When a recurring task falls due."""
+
+    first: date
+    frequency: str
+    interval: int = 1
+    until: Optional[date] = None
+
+
+def _add_months(day: date, months: int, anchor_day: int) -> date:
+    """``day`` moved by ``months``, on ``anchor_day`` or the month's last day."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(rule: Rule, start: Optional[date] = None) -> Iterator[date]:
+    """Lazily yield the rule's dates from ``start`` (or its first date) on."""
+    start = max(start or rule.first, rule.first)
+    if rule.frequency == MONTHLY:
+        months = (start.year - rule.first.year) * 12 + start.month - rule.first.month
+        n = max(0, months // rule.interval)
+        while True:
+            day = _add_months(rule.first, n * rule.interval, rule.first.day)
+            if rule.until is not None and day > rule.until:
+                return
+            if day >= start:
+                yield day
+            n += 1
+    else:
+        step = rule.interval * (7 if rule.frequency == WEEKLY else 1)
+        # Jump to the first occurrence on or after ``start``.
+        n = -(-(start - rule.first).days // step)
+        day = rule.first + timedelta(days=n * step)
+        delta = timedelta(days=step)
+        while rule.until is None or day <= rule.until:
+            yield day
+            day += delta
+
+
+def expand(rule: Rule, start: date, end: date) -> Tuple[date, ...]:
+    """The rule's dates from ``start`` to ``end`` inclusive."""
+    return tuple(takewhile(lambda day: day <= end, occurrences(rule, start)))
+
+
+def occurs_on(rule: Rule, day: date) -> bool:
+    """Whether the rule falls due on ``day``."""
+    return next(occurrences(rule, day), None) == day
+
+
+class WindowCache:
+    """LRU of expanded windows per task, dropped when the task's rule changes."""
+
+    def __init__(self, max_rules: int, windows_per_rule: int) -> None:
+        self.max_rules = max_rules
+        self.windows_per_rule = windows_per_rule
+        self._rules: "OrderedDict[int, Tuple[Rule, OrderedDict[Window, Tuple[date, ...]]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, task_id: int, rule: Rule, start: date, end: date) -> Tuple[date, ...]:
+        """Occurrences of ``rule`` from ``start`` to ``end``, expanded at most once."""
+        window = (start, end)
+        with self._lock:
+            entry = self._rules.get(task_id)
+            if entry is not None and entry[0] == rule:
+                self._rules.move_to_end(task_id)
+                windows = entry[1]
+                if window in windows:
+                    windows.move_to_end(window)
+                    record_cache("recurrence", hit=True)
+                    return windows[window]
+        record_cache("recurrence", hit=False)
+
+        days = expand(rule, start, end)
+        with self._lock:
+            entry = self._rules.get(task_id)
+            if entry is None or entry[0] != rule:
+                entry = (rule, OrderedDict())
+            self._rules[task_id] = entry
+            self._rules.move_to_end(task_id)
+            windows = entry[1]
+            windows[window] = days
+            if len(windows) > self.windows_per_rule:
+                windows.popitem(last=False)
+            if len(self._rules) > self.max_rules:
+                self._rules.popitem(last=False)
+        return days
+
+    def invalidate(self, task_id: int) -> None:
+        """Forget every window of a task, after it was edited or deleted."""
+        with self._lock:
+            self._rules.pop(task_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rules.clear()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+window_cache = WindowCache(
+    settings.recurrence_cache_rules, settings.recurrence_cache_windows_per_rule
+)
@@ -0,0 +1,354 @@
+"""
+Task reminders.
+
+Reminders are materialized per task occurrence (``reminder_crud.sync_task``)
+up to ``reminder_horizon_days`` ahead. A single in-process dispatcher loads
+the pending ones ``reminder_window`` seconds at a time with a range query
+over a partial index, and keeps them in a hierarchical timing wheel, where
+scheduling and cancelling are O(1) however many reminders are loaded. Task
+edits in the dispatcher's process reschedule just the reminders they
+changed; the loaded window is re-read every tick, so reminders added or
+moved by other processes are picked up too.
+
+Each due batch is claimed in the database before it is sent, so a reminder
+is delivered at most once, across restarts too; reminders that fell due
+while nothing was running are still sent up to ``reminder_max_lateness``
+late, and dropped after that.
+"""
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    Callable, Dict, Generic, Hashable, List, NamedTuple, Optional, Protocol, Sequence, Tuple,
+    TypeVar,
+)
+from sqlalchemy.orm import Session
+from app.core.config import Settings
+from app.core.metrics import REMINDERS
+from app.crud.reminder import Change, reminder_crud
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+Key = TypeVar("Key", bound=Hashable)
+
+# Where an entry sits: (level, slot), or (-1, 0) for the overflow list.
+Position = Tuple[int, int]
+OVERFLOW: Position = (-1, 0)
+
+
+class TimingWheel(Generic[Key]):
+    """
+    Hierarchical timing wheel of ``levels`` wheels of ``slots`` slots each.
+
+    A slot of level ``n`` spans ``slots ** n`` ticks. Entries go to the
+    lowest level whose current rotation contains their due tick and move
+    down a level each time the wheel above turns to their slot, so every
+    entry is touched at most ``levels`` times. Entries beyond the top
+    level's rotation wait in an overflow list, re-placed once per rotation.
+    """
+
+    def __init__(self, tick: float, start: float, slots: int = 64, levels: int = 4) -> None:
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.now = int(start // tick)
+        self._spans = [slots ** level for level in range(levels + 1)]
+        self._wheels: List[List[Dict[Key, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: Dict[Key, int] = {}
+        self._ready: Dict[Key, int] = {}
+        self._positions: Dict[Key, Position] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions) + len(self._ready)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._positions or key in self._ready
+
+    def tick_of(self, key: Key) -> Optional[int]:
+        """The tick ``key`` is due at, or None if it is not scheduled."""
+        if key in self._ready:
+            return self._ready[key]
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        level, slot = position
+        return (self._overflow if position == OVERFLOW else self._wheels[level][slot])[key]
+
+    def schedule(self, key: Key, when: float) -> None:
+        """Fire ``key`` at ``when`` (seconds), replacing any earlier schedule."""
+        self.cancel(key)
+        self._place(key, int(when // self.tick))
+
+    def cancel(self, key: Key) -> bool:
+        """Unschedule ``key``; returns whether it was scheduled."""
+        if self._ready.pop(key, None) is not None:
+            return True
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+        level, slot = position
+        del (self._overflow if position == OVERFLOW else self._wheels[level][slot])[key]
+        return True
+
+    def advance(self, now: float) -> List[Key]:
+        """Move the wheel to ``now``; returns the keys that fell due, oldest first."""
+        target = int(now // self.tick)
+        if not self._positions:
+            self.now = max(self.now, target)
+        while self.now < target:
+            self.now += 1
+            for level in range(self.levels, 0, -1):
+                if self.now % self._spans[level]:
+                    continue
+                if level == self.levels:
+                    entries, self._overflow = self._overflow, {}
+                else:
+                    slot = (self.now // self._spans[level]) % self.slots
+                    entries, self._wheels[level][slot] = self._wheels[level][slot], {}
+                for key, tick in entries.items():
+                    del self._positions[key]
+                    self._place(key, tick)
+            slot = self.now % self.slots
+            if self._wheels[0][slot]:
+                entries, self._wheels[0][slot] = self._wheels[0][slot], {}
+                for key, tick in entries.items():
+                    del self._positions[key]
+                    self._ready[key] = tick
+            if not self._positions:
+                self.now = target
+        due = sorted(self._ready, key=self._ready.__getitem__)
+        self._ready.clear()
+        return due
+
+    def _place(self, key: Key, tick: int) -> None:
+        if tick <= self.now:
+            self._ready[key] = tick
+            return
+        for level in range(self.levels):
+            span = self._spans[level + 1]
+            if tick // span == self.now // span:
+                slot = (tick // self._spans[level]) % self.slots
+                self._wheels[level][slot][key] = tick
+                self._positions[key] = (level, slot)
+                return
+        self._overflow[key] = tick
+        self._positions[key] = OVERFLOW
+
+
+class ReminderMessage(NamedTuple):
+    """What a notifier delivers for one reminder."""
+
+    id: int
+    task_id: int
+    family_id: int
+    user_id: Optional[int]
+    title: str
+    occurrence_date: date
+    remind_at: datetime
+
+
+class Notifier(Protocol):
+    """Delivers reminders; ``send`` gets a whole batch at once."""
+
+    def send(self, messages: Sequence[ReminderMessage]) -> None:
+        ...
+
+
+class LogNotifier:
+    """Logs reminders, a stand-in until a real channel is configured."""
+
+    def send(self, messages: Sequence[ReminderMessage]) -> None:
+        for message in messages:
+            logger.info(
+                "Reminder %d: %r on %s for user %s",
+                message.id, message.title, message.occurrence_date, message.user_id,
+            )
+
+
+class FileNotifier:
+    """Appends reminders to a file as JSON lines."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, messages: Sequence[ReminderMessage]) -> None:
+        lines = "".join(
+            json.dumps({
+                **message._asdict(),
+                "occurrence_date": message.occurrence_date.isoformat(),
+                "remind_at": message.remind_at.isoformat(),
+            }) + "\n"
+            for message in messages
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+def build_notifier(app_settings: Settings) -> Notifier:
+    """The notifier configured by ``app_settings``."""
+    if app_settings.reminder_notifier == "file":
+        if not app_settings.reminder_file:
+            raise ValueError("reminder_file is required by the file notifier")
+        return FileNotifier(app_settings.reminder_file)
+    return LogNotifier()
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, as reminders are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _seconds(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ReminderDispatcher:
+    """Background thread sending due reminders through a notifier."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        notifier: Notifier,
+        *,
+        tick: float,
+        window: float,
+        batch_size: int,
+        max_lateness: float,
+        horizon_days: int,
+        day_start_hour: int,
+        clock: Callable[[], datetime] = utcnow,
+    ) -> None:
+        self.session_factory = session_factory
+        self.notifier = notifier
+        self.tick = tick
+        self.window = timedelta(seconds=window)
+        self.batch_size = batch_size
+        self.max_lateness = timedelta(seconds=max_lateness)
+        self.horizon_days = horizon_days
+        self.day_start_hour = day_start_hour
+        self.clock = clock
+        self.wheel: TimingWheel[int] = TimingWheel(tick, _seconds(clock()))
+        # Everything pending before this is in the wheel; None until the first poll.
+        self._loaded_until: Optional[datetime] = None
+        self._extended_on: Optional[date] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="reminder-dispatcher", daemon=True)
+
+    def start(self) -> None:
+        global _dispatcher
+        _dispatcher = self
+        self._thread.start()
+
+    def stop(self) -> None:
+        global _dispatcher
+        if _dispatcher is self:
+            _dispatcher = None
+        self._stop.set()
+        self._thread.join()
+
+    def reschedule(self, changes: Sequence[Change]) -> None:
+        """Apply reminders added, moved or deleted since they were loaded."""
+        with self._lock:
+            for id, remind_at in changes:
+                if remind_at is None or self._loaded_until is None or remind_at >= self._loaded_until:
+                    # Beyond the loaded window: the next window load picks it up.
+                    self.wheel.cancel(id)
+                else:
+                    self.wheel.schedule(id, _seconds(remind_at))
+
+    def poll(self, now: Optional[datetime] = None) -> int:
+        """Load, advance and send what is due at ``now``; returns how many were sent."""
+        now = now or self.clock()
+        with self.session_factory() as db:
+            if self._extended_on != now.date():
+                self.extend(db, now.date())
+            with self._lock:
+                if self._loaded_until is None:
+                    dropped = reminder_crud.drop_stale(db, before=now - self.max_lateness, now=now)
+                    if dropped:
+                        REMINDERS.inc("dropped", amount=dropped)
+                        logger.warning("Dropped %d reminders over the lateness limit", dropped)
+                until = self._loaded_until
+                if until is None or now + self.window / 2 >= until:
+                    until = now + self.window
+                # The whole window, not just what is new to it: other
+                # processes add and move reminders without telling the wheel.
+                for id, remind_at in reminder_crud.get_pending(db, since=None, until=until):
+                    when = _seconds(remind_at)
+                    if self.wheel.tick_of(id) != int(when // self.tick):
+                        self.wheel.schedule(id, when)
+                self._loaded_until = until
+                # A tick behind: the wheel fires anything due within the
+                # current tick, which may be a moment after ``now``.
+                due = self.wheel.advance(_seconds(now) - self.tick)
+            sent = 0
+            for i in range(0, len(due), self.batch_size):
+                sent += self._send(db, due[i:i + self.batch_size], now)
+        return sent
+
+    def extend(self, db: Session, today: date) -> None:
+        """Materialize reminders up to the horizon from ``today``, once a day."""
+        end = today + timedelta(days=self.horizon_days)
+        for task in reminder_crud.get_reminding_tasks(db, start=today, end=end):
+            self.reschedule(sync_task(db, task, today, self.horizon_days, self.day_start_hour))
+        self._extended_on = today
+
+    def _send(self, db: Session, ids: Sequence[int], now: datetime) -> int:
+        claimed = reminder_crud.claim(db, ids=ids, now=now)
+        if len(claimed) < len(ids):
+            # Moved later, e.g. by an edit in another process: back into the wheel.
+            unclaimed = set(ids).difference(claimed)
+            self.reschedule(reminder_crud.get_pending_by_ids(db, ids=list(unclaimed)))
+        if not claimed:
+            return 0
+        messages = [
+            ReminderMessage(
+                row.id, row.task_id, row.family_id, row.user_id,
+                row.title, row.occurrence_date, row.remind_at,
+            )
+            for row in reminder_crud.get_details(db, ids=claimed)
+        ]
+        try:
+            self.notifier.send(messages)
+        except Exception:
+            # Claimed already: at most once, so these are not retried.
+            REMINDERS.inc("failed", amount=len(messages))
+            logger.exception("Sending %d reminders failed", len(messages))
+            return 0
+        REMINDERS.inc("sent", amount=len(messages))
+        return len(messages)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Reminder dispatch failed")
+
+
+_dispatcher: Optional[ReminderDispatcher] = None
+
+
+def sync_task(
+    db: Session, task: Task, today: date, horizon_days: int, day_start_hour: int
+) -> List[Change]:
+    """Materialize a task's reminders from ``today`` to the horizon."""
+    return reminder_crud.sync_task(
+        db,
+        task=task,
+        start=today,
+        end=today + timedelta(days=horizon_days),
+        day_start_hour=day_start_hour,
+    )
+
+
+def reschedule(changes: Sequence[Change]) -> None:
+    """Hand reminder changes to the running dispatcher, if any."""
+    if _dispatcher is not None and changes:
+        _dispatcher.reschedule(changes)
@@ -0,0 +1,68 @@
+import functools
+import os
+from typing import Any, List, Sequence, Type
+import anyio
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+PATHSEND = "http.response.pathsend"
+ZEROCOPY = "http.response.zerocopy"
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    File response that lets the server send the file itself.
+
+    Uses the ASGI ``pathsend`` or ``zerocopy`` extensions when the server
+    advertises them, so the bytes never pass through Python. Falls back to
+    the regular chunked ``FileResponse`` otherwise.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        use_pathsend = PATHSEND in extensions
+        if self.send_header_only or not (use_pathsend or ZEROCOPY in extensions):
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if use_pathsend:
+            await send({"type": PATHSEND, "path": os.path.abspath(self.path)})
+        else:
+            with open(self.path, "rb") as file:
+                await send({"type": ZEROCOPY, "file": file, "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+@functools.lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter[List[Any]]:
+    return TypeAdapter(List[schema])  # type: ignore[valid-type]
+
+
+class RowsResponse(Response):
+    """
+    JSON array of read-only rows, serialized as ``schema`` without validation.
+
+    A ``response_model`` validates every object it is handed before dumping
+    it, which for a page of rows read back from the database re-checks data
+    that was validated on the way in (``EmailStr`` alone costs more than
+    the query). The rows must carry ``schema``'s fields, as from
+    ``CRUDBase.get_multi_rows``; keep the ``response_model`` for the docs.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, rows: Sequence[Row[Any]], schema: Type[BaseModel], **kwargs: Any) -> None:
+        items = [schema.model_construct(**row._mapping) for row in rows]
+        super().__init__(_list_adapter(schema).dump_json(items), **kwargs)
@@ -0,0 +1,84 @@
+"""
+Fair chore rotation.
+
+Occurrences of rotating tasks are handed out one at a time, in date order,
+to the available member with the least load for their capacity: a min-heap
+keyed by ``load / capacity``, seeded with the loads already assigned. Each
+assignment moves only that member's entry. Heap entries are invalidated
+lazily: an update pushes a new entry and stale ones are dropped when they
+reach the top.
+"""
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, TypeVar
+
+# (normalized load, user id, version)
+Entry = Tuple[float, int, int]
+Key = TypeVar("Key")
+
+
+class LoadBalancer:
+    """Least-loaded member by ``load / capacity``; capacity 0 means unavailable."""
+
+    def __init__(
+        self, capacities: Mapping[int, float], loads: Optional[Mapping[int, float]] = None
+    ) -> None:
+        self.capacities: Dict[int, float] = dict(capacities)
+        self.loads: Dict[int, float] = {user_id: 0.0 for user_id in self.capacities}
+        for user_id, load in (loads or {}).items():
+            if user_id in self.loads:
+                self.loads[user_id] = load
+        self._versions: Dict[int, int] = {user_id: 0 for user_id in self.capacities}
+        self._heap: List[Entry] = [
+            (self.loads[user_id] / capacity, user_id, 0)
+            for user_id, capacity in self.capacities.items()
+            if capacity > 0
+        ]
+        heapq.heapify(self._heap)
+
+    def _push(self, user_id: int) -> None:
+        version = self._versions[user_id] = self._versions[user_id] + 1
+        capacity = self.capacities[user_id]
+        if capacity > 0:
+            heapq.heappush(self._heap, (self.loads[user_id] / capacity, user_id, version))
+        if len(self._heap) > 4 * len(self.capacities) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop stale entries so the heap stays proportional to the members."""
+        self._heap = [
+            entry for entry in self._heap if self._versions[entry[1]] == entry[2]
+        ]
+        heapq.heapify(self._heap)
+
+    def add(self, user_id: int, effort: float) -> None:
+        """Account ``effort`` to a member."""
+        if user_id in self.loads:
+            self.loads[user_id] += effort
+            self._push(user_id)
+
+    def peek(self) -> Optional[int]:
+        """The least-loaded available member, or ``None`` if nobody is available."""
+        heap = self._heap
+        while heap:
+            _, user_id, version = heap[0]
+            if self._versions[user_id] == version:
+                return user_id
+            heapq.heappop(heap)
+        return None
+
+    def assign(self, effort: float) -> Optional[int]:
+        """Give ``effort`` to the least-loaded available member and return them."""
+        user_id = self.peek()
+        if user_id is not None:
+            self.add(user_id, effort)
+        return user_id
+
+    def plan(self, items: Iterable[Tuple[Key, float]]) -> List[Tuple[Key, int]]:
+        """Assign ``(key, effort)`` items in order; unassignable items are left out."""
+        planned: List[Tuple[Key, int]] = []
+        for key, effort in items:
+            user_id = self.assign(effort)
+            if user_id is None:
+                break
+            planned.append((key, user_id))
+        return planned
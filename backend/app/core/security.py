@@ -1,15 +1,41 @@
 from typing import Any, Union, Optional
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from time import perf_counter
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION
+from app.core.tracing import span
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+class TimedCryptContext(CryptContext):
+    """CryptContext that records and traces bcrypt hash and verify durations."""
+
+    def hash(self, *args: Any, **kwargs: Any) -> str:
+        start = perf_counter()
+        try:
+            with span("password.hash"):
+                return super().hash(*args, **kwargs)
+        finally:
+            PASSWORD_HASH_DURATION.observe(perf_counter() - start, "hash")
+
+    def verify(self, *args: Any, **kwargs: Any) -> bool:
+        start = perf_counter()
+        try:
+            with span("password.verify"):
+                return super().verify(*args, **kwargs)
+        finally:
+            PASSWORD_HASH_DURATION.observe(perf_counter() - start, "verify")
+
+
+pwd_context = TimedCryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
+    # jose pulls in the cryptography backends; import it on first use.
+    from jose import jwt
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -30,6 +56,8 @@ def get_password_hash(password: str) -> str:
 
 
 def verify_token(token: str) -> Union[str, None]:
+    from jose import jwt, JWTError
+
     try:
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
@@ -37,3 +65,10 @@ def verify_token(token: str) -> Union[str, None]:
         return payload.get("sub")
     except JWTError:
         return None
+
+
+def preload() -> None:
+    """Import the JWT library and load the bcrypt backend ahead of traffic."""
+    import jose.jwt  # noqa: F401
+
+    pwd_context.handler().get_backend()
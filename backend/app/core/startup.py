@@ -0,0 +1,35 @@
+import logging
+from fastapi import FastAPI
+from sqlalchemy import Engine, text
+from app.core import security
+
+logger = logging.getLogger(__name__)
+
+
+def warm_pool(engine: Engine, connections: int) -> None:
+    """Open pooled connections up front so early requests skip the connect."""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        # Closing returns the connections to the pool, where they stay open.
+        for connection in opened:
+            connection.close()
+
+
+def compile_schemas(app: FastAPI) -> None:
+    """Build the OpenAPI schema now instead of on the first docs request."""
+    app.openapi()
+
+
+def warm_up(app: FastAPI, engine: Engine, connections: int) -> None:
+    """Run every warm-up step; a missing database only logs a warning."""
+    try:
+        warm_pool(engine, connections)
+    except Exception:
+        logger.warning("Database pool warm-up failed", exc_info=True)
+    security.preload()
+    compile_schemas(app)
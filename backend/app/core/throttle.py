@@ -0,0 +1,211 @@
+"""
+Login and signup throttling.
+
+Attempts are metered by two token buckets, one per client IP and one per
+target email, before any password hashing happens. Failed logins also put
+the IP and the email into exponential backoff once ``free_failures`` are
+used up, so a credential-stuffing burst is turned away with 429 for the
+price of a dict lookup.
+
+State lives in a bounded LRU in process memory, or in Redis when
+``throttle_redis_url`` is set so that every worker shares it.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from app.core.config import Settings
+
+State = Dict[str, float]
+Update = Callable[[Optional[State]], Tuple[State, float]]
+
+
+class MemoryBackend:
+    """Per-process key state, evicting the least recently used keys."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, State]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key: str, update: Update, ttl: float) -> float:
+        """Atomically replace the state of ``key`` with ``update(state)``."""
+        with self._lock:
+            state, result = update(self._states.pop(key, None))
+            self._states[key] = state
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class RedisBackend:
+    """Key state shared by every worker through Redis."""
+
+    def __init__(self, url: str, prefix: str = "throttle:") -> None:
+        # Optional dependency, only needed when state is shared.
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def update(self, key: str, update: Update, ttl: float) -> float:
+        name = self.prefix + key
+        result = 0.0
+
+        def transaction(pipe: Any) -> None:
+            nonlocal result
+            raw = pipe.get(name)
+            state, result = update(json.loads(raw) if raw else None)
+            pipe.multi()
+            pipe.set(name, json.dumps(state), ex=max(1, int(ttl)))
+
+        # Retries on a concurrent write to the same key (WATCH/MULTI).
+        self.client.transaction(transaction, name)
+        return result
+
+    def reset(self) -> None:
+        for name in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(name)
+
+
+Backend = Union[MemoryBackend, RedisBackend]
+
+
+class TokenBucket:
+    """``burst`` attempts at once, refilled at ``per_minute``."""
+
+    def __init__(self, burst: int, per_minute: float) -> None:
+        self.burst = float(burst)
+        self.rate = per_minute / 60.0
+
+    @property
+    def refill_time(self) -> float:
+        return self.burst / self.rate
+
+    def take(self, state: State, now: float) -> float:
+        """Take a token from ``state``; returns the wait if there is none."""
+        tokens = min(self.burst, state["tokens"] + (now - state["at"]) * self.rate)
+        state["at"] = now
+        if tokens < 1.0:
+            state["tokens"] = tokens
+            return (1.0 - tokens) / self.rate
+        state["tokens"] = tokens - 1.0
+        return 0.0
+
+
+class LoginThrottle:
+    """Token buckets and failure backoff keyed by client IP and by email."""
+
+    def __init__(
+        self,
+        backend: Backend,
+        ip_bucket: TokenBucket,
+        email_bucket: TokenBucket,
+        free_failures: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 900.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.backend = backend
+        self.buckets = {"ip": ip_bucket, "email": email_bucket}
+        self.free_failures = free_failures
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+
+    def _ttl(self, kind: str) -> float:
+        # Idle this long, a key's bucket is full again and it starts over.
+        return max(self.buckets[kind].refill_time, self.backoff_max)
+
+    def _load(self, kind: str, state: Optional[State], now: float) -> State:
+        """``state``, or a fresh one if there is none or it has gone stale."""
+        if state is None or now - state["seen"] > self._ttl(kind):
+            state = {
+                "tokens": self.buckets[kind].burst,
+                "at": now,
+                "failures": 0,
+                "blocked_until": 0.0,
+            }
+        state["seen"] = now
+        return state
+
+    def _take(self, kind: str, value: str, now: float) -> float:
+        def update(state: Optional[State]) -> Tuple[State, float]:
+            state = self._load(kind, state, now)
+            if state["blocked_until"] > now:
+                return state, state["blocked_until"] - now
+            return state, self.buckets[kind].take(state, now)
+
+        return self.backend.update(f"{kind}:{value}", update, self._ttl(kind))
+
+    def check(self, ip: str, email: str) -> float:
+        """
+        Admit an attempt for ``email`` from ``ip``.
+
+        Returns 0 if it may proceed, else the seconds to wait. A refused IP
+        does not spend the email's tokens.
+        """
+        now = self.clock()
+        wait = self._take("ip", ip, now)
+        if wait > 0:
+            return wait
+        return self._take("email", email.lower(), now)
+
+    def failure(self, ip: str, email: str) -> None:
+        """Record a failed login, backing off exponentially past the free ones."""
+        now = self.clock()
+        for kind, value in (("ip", ip), ("email", email.lower())):
+            def update(state: Optional[State], kind: str = kind) -> Tuple[State, float]:
+                state = self._load(kind, state, now)
+                state["failures"] += 1
+                excess = state["failures"] - self.free_failures
+                if excess > 0:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (excess - 1))
+                    state["blocked_until"] = now + delay
+                return state, 0.0
+
+            self.backend.update(f"{kind}:{value}", update, self._ttl(kind))
+
+    def success(self, email: str) -> None:
+        """Clear the failure count of ``email`` after a good login."""
+        now = self.clock()
+
+        def update(state: Optional[State]) -> Tuple[State, float]:
+            state = self._load("email", state, now)
+            state["failures"] = 0
+            state["blocked_until"] = 0.0
+            return state, 0.0
+
+        self.backend.update(f"email:{email.lower()}", update, self._ttl("email"))
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+def build_throttle(app_settings: Settings) -> Optional[LoginThrottle]:
+    """The login throttle configured by ``app_settings``, if enabled."""
+    if not app_settings.throttle_enabled:
+        return None
+    backend: Backend
+    if app_settings.throttle_redis_url:
+        backend = RedisBackend(app_settings.throttle_redis_url)
+    else:
+        backend = MemoryBackend(app_settings.throttle_max_keys)
+    return LoginThrottle(
+        backend,
+        ip_bucket=TokenBucket(app_settings.throttle_ip_burst, app_settings.throttle_ip_per_minute),
+        email_bucket=TokenBucket(
+            app_settings.throttle_email_burst, app_settings.throttle_email_per_minute
+        ),
+        free_failures=app_settings.throttle_free_failures,
+        backoff_base=app_settings.throttle_backoff_base,
+        backoff_max=app_settings.throttle_backoff_max,
+    )
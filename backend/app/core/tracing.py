@@ -0,0 +1,542 @@
+"""
+Lightweight request tracing.
+
+``TracingMiddleware`` opens a root span per request, continuing the trace
+of a valid W3C ``traceparent`` header or starting one. Sampling is decided
+once, at the head: an incoming ``traceparent`` keeps its sampled flag,
+new traces are kept with probability ``trace_sample_rate``. An unsampled
+request sets no span, so every instrumented call below it costs one context
+variable lookup.
+
+Spans nest through a context variable, which the threadpool copies into
+sync endpoints and dependencies:
+
+* endpoints (``ProfilingRoute``), dependencies decorated with ``traced``,
+  public ``CRUDBase`` methods taking a session (``trace_methods``), and
+  password hashing;
+* ``TracedSession`` flushes, commits and refreshes;
+* every cursor execute of the engine (``configure``).
+
+Finished spans go onto a bounded queue without waiting; a processor thread
+hands them to the exporter in batches. Spans arriving while the queue is
+full are dropped and counted in ``trace_spans_dropped_total``.
+"""
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any, Callable, Dict, Iterator, List, Mapping, Optional, Protocol, Sequence, TextIO,
+    Tuple, TypeVar,
+)
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import Settings
+from app.core.logs import get_request_id
+from app.core.metrics import TRACE_SPANS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = b"traceparent"
+# version-trace_id-parent_id-flags; all-zero ids are invalid.
+_TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+_SAMPLED = 0x01
+
+# Span kinds, numbered as in OTLP.
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+# Statements are cut to this many characters in span attributes.
+MAX_STATEMENT = 1000
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """A timed operation within a trace; times are Unix epoch nanoseconds."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind", "start", "end",
+        "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes if attributes is not None else {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, kind: int = INTERNAL, **attributes: Any) -> "Span":
+        return Span(name, self.trace_id, self.span_id, kind, attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span of the current context, if it is traced."""
+    return _current.get()
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) of a ``traceparent`` header, if valid."""
+    match = _TRACEPARENT.fullmatch(value.strip())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & _SAMPLED)
+
+
+# Exporters
+
+
+class Exporter(Protocol):
+    """Ships finished spans somewhere; ``export`` gets a whole batch at once."""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        ...
+
+
+class ConsoleExporter:
+    """Writes spans to a stream, stderr by default, as JSON lines."""
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self.stream = stream
+
+    def export(self, spans: Sequence[Span]) -> None:
+        stream = self.stream or sys.stderr
+        stream.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans))
+        stream.flush()
+
+
+class FileExporter:
+    """Appends spans to a file as JSON lines."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            ConsoleExporter(file).export(spans)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items() if value is not None
+    ]
+
+
+class OtlpExporter:
+    """Posts spans to an OTLP/HTTP collector endpoint, JSON encoded."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5.0,
+    ) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+    def payload(self, spans: Sequence[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": span.kind,
+                        "startTimeUnixNano": str(span.start),
+                        "endTimeUnixNano": str(span.end),
+                        "attributes": _otlp_attributes(span.attributes),
+                        # 1 is OK, 2 is ERROR.
+                        "status": (
+                            {"code": 2, "message": span.error} if span.error else {"code": 1}
+                        ),
+                    }
+                    for span in spans
+                ],
+            }],
+        }]}
+
+    def export(self, spans: Sequence[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans)).encode(),
+            headers=self.headers,
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def build_exporter(app_settings: Settings) -> Exporter:
+    """The exporter configured by ``app_settings``."""
+    if app_settings.trace_exporter == "file":
+        if not app_settings.trace_file:
+            raise ValueError("trace_file is required by the file exporter")
+        return FileExporter(app_settings.trace_file)
+    if app_settings.trace_exporter == "otlp":
+        return OtlpExporter(app_settings.trace_otlp_endpoint, app_settings.trace_service_name)
+    return ConsoleExporter()
+
+
+class SpanProcessor:
+    """Bounded queue of finished spans and the thread exporting them in batches."""
+
+    def __init__(
+        self, exporter: Exporter, *, queue_size: int, batch_size: int, interval: float
+    ) -> None:
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Export what is queued, then stop."""
+        self._stop.set()
+        self._thread.join()
+
+    def put(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            TRACE_SPANS_DROPPED.inc()
+
+    def _export(self) -> None:
+        while True:
+            batch: List[Span] = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self.exporter.export(batch)
+            except Exception:
+                logger.warning("Could not export %d spans", len(batch), exc_info=True)
+                TRACE_SPANS_DROPPED.inc(amount=len(batch))
+            if len(batch) < self.batch_size:
+                return
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._export()
+        self._export()
+
+
+# The running processor; finished spans are discarded without one.
+_processor: Optional[SpanProcessor] = None
+
+
+def finish(span: Span, error: Optional[BaseException] = None) -> None:
+    """End ``span`` now and queue it for export."""
+    span.end = time.time_ns()
+    if error is not None and span.error is None:
+        span.error = f"{type(error).__name__}: {error}"
+    processor = _processor
+    if processor is not None:
+        processor.put(span)
+
+
+@contextmanager
+def _open(parent: Span, name: str, kind: int, attributes: Dict[str, Any]) -> Iterator[Span]:
+    span = Span(name, parent.trace_id, parent.span_id, kind, dict(attributes))
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        finish(span, exc)
+        raise
+    else:
+        finish(span)
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time the block as a child of the current span; a no-op if not traced."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _open(parent, name, kind, attributes) as opened:
+        yield opened
+
+
+def traced(name: str, **attributes: Any) -> Callable[[F], F]:
+    """
+    Decorate a function, coroutine function or generator function with a span.
+
+    A generator's span covers its code up to the first ``yield``, which for
+    a dependency is the setup before the value is handed to the endpoint.
+    """
+
+    def decorate(call: F) -> F:
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def coroutine_wrapper(*args: Any, **kwargs: Any) -> Any:
+                parent = _current.get()
+                if parent is None:
+                    return await call(*args, **kwargs)
+                with _open(parent, name, INTERNAL, attributes):
+                    return await call(*args, **kwargs)
+
+            return coroutine_wrapper  # type: ignore[return-value]
+
+        if inspect.isgeneratorfunction(call):
+            @functools.wraps(call)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                parent = _current.get()
+                if parent is None:
+                    return (yield from call(*args, **kwargs))
+                with ExitStack() as stack:
+                    with _open(parent, name, INTERNAL, attributes):
+                        value = stack.enter_context(contextmanager(call)(*args, **kwargs))
+                    yield value
+
+            return generator_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(call)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            parent = _current.get()
+            if parent is None:
+                return call(*args, **kwargs)
+            with _open(parent, name, INTERNAL, attributes):
+                return call(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def trace_methods(cls: type) -> None:
+    """
+    Trace the public methods ``cls`` defines that take a session.
+
+    Spans are named after where the method is defined, e.g.
+    ``crud CRUDUser.update`` and, for its ``super()`` call,
+    ``crud CRUDBase.update``. Methods without a ``db`` parameter are pure
+    helpers not worth a span.
+    """
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(value):
+            continue
+        if "db" not in inspect.signature(value).parameters:
+            continue
+        setattr(cls, name, traced(f"crud {value.__qualname__}")(value))
+
+
+class TracedSession(Session):
+    """Session whose flushes, commits and refreshes are spans."""
+
+    def flush(self, objects: Optional[Sequence[Any]] = None) -> None:
+        with span("session.flush"):
+            return super().flush(objects)
+
+    def commit(self) -> None:
+        with span("session.commit"):
+            return super().commit()
+
+    def refresh(self, instance: object, *args: Any, **kwargs: Any) -> None:
+        with span("session.refresh"):
+            return super().refresh(instance, *args, **kwargs)
+
+
+def install_sql_tracing(engine: Engine) -> Callable[[], None]:
+    """Trace every cursor execute of ``engine`` as a client span."""
+    system = engine.dialect.name
+
+    def before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+               executemany: bool) -> None:
+        parent = _current.get()
+        if parent is not None and context is not None:
+            context._trace_span = parent.child(
+                f"sql {statement.split(None, 1)[0] if statement else ''}",
+                CLIENT,
+                **{"db.system": system, "db.statement": statement[:MAX_STATEMENT]},
+            )
+
+    def after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+              executemany: bool) -> None:
+        opened = getattr(context, "_trace_span", None)
+        if opened is not None:
+            context._trace_span = None
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                opened.attributes["db.rows"] = cursor.rowcount
+            finish(opened)
+
+    def failed(exception_context: Any) -> None:
+        context = exception_context.execution_context
+        opened = getattr(context, "_trace_span", None)
+        if opened is not None:
+            context._trace_span = None
+            finish(opened, exception_context.original_exception)
+
+    hooks: Tuple[Tuple[str, Callable[..., Any]], ...] = (
+        ("before_cursor_execute", before),
+        ("after_cursor_execute", after),
+        ("handle_error", failed),
+    )
+    for name, hook in hooks:
+        event.listen(engine, name, hook)
+
+    def remove() -> None:
+        for name, hook in hooks:
+            event.remove(engine, name, hook)
+
+    return remove
+
+
+def configure(
+    app_settings: Settings, engine: Engine, exporter: Optional[Exporter] = None
+) -> Callable[[], None]:
+    """
+    Start exporting spans and trace ``engine``'s statements.
+
+    Returns a function that exports what is queued and undoes it all.
+    """
+    global _processor
+    processor = SpanProcessor(
+        exporter or build_exporter(app_settings),
+        queue_size=app_settings.trace_queue_size,
+        batch_size=app_settings.trace_batch_size,
+        interval=app_settings.trace_flush_interval,
+    )
+    processor.start()
+    _processor = processor
+    remove_sql_tracing = install_sql_tracing(engine)
+
+    def undo() -> None:
+        global _processor
+        remove_sql_tracing()
+        if _processor is processor:
+            _processor = None
+        processor.stop()
+
+    return undo
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the root span of sampled requests."""
+
+    def __init__(self, app: ASGIApp, *, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Batch sub-requests are spans of their parent's trace.
+        parent = _current.get()
+        if scope["type"] != "http" or parent is not None:
+            await self.app(scope, receive, send)
+            return
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER:
+                incoming = parse_traceparent(value.decode("latin-1"))
+                break
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            f"{scope['method']} {scope['path']}",
+            trace_id,
+            parent_id,
+            SERVER,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        request_id = get_request_id()
+        if request_id is not None:
+            root.attributes["request.id"] = request_id
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+            await send(message)
+
+        token = _current.set(root)
+        error: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                root.name = f"{scope['method']} {route}"
+                root.attributes["http.route"] = route
+            finish(root, error)
@@ -1,3 +1,13 @@
 from .user import user_crud
+from .family import family_crud
+from .task import task_crud
+from .assignment import assignment_crud
+from .reminder import reminder_crud
+from .sync import sync_crud
+from .audit import audit_crud
+from .stats import stats_crud
 
-__all__ = ["user_crud"]
+__all__ = [
+    "user_crud", "family_crud", "task_crud", "assignment_crud", "reminder_crud", "sync_crud",
+    "audit_crud", "stats_crud",
+]
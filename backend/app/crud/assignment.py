@@ -0,0 +1,124 @@
+from datetime import date
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.core.rotation import LoadBalancer
+from app.crud.base import CRUDBase
+from app.crud.task import task_crud
+from app.models.family import FamilyMember
+from app.models.task import TaskAssignment
+from app.schemas.task import AssignmentCreate, AssignmentUpdate
+
+Key = Tuple[int, date]
+
+
+class CRUDAssignment(CRUDBase[TaskAssignment, AssignmentCreate, AssignmentUpdate]):
+    """CRUD operations for TaskAssignment and chore rotation scheduling."""
+
+    def get_in_range(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> List[TaskAssignment]:
+        """Get a family's assignments from ``start`` to ``end`` inclusive."""
+        stmt = (
+            select(TaskAssignment)
+            .where(
+                TaskAssignment.family_id == family_id,
+                TaskAssignment.occurrence_date.between(start, end),
+            )
+            .order_by(TaskAssignment.occurrence_date, TaskAssignment.task_id)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_keys_in_range(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> List[Key]:
+        """Get the (task_id, occurrence_date) of a family's assignments in the range."""
+        stmt = select(TaskAssignment.task_id, TaskAssignment.occurrence_date).where(
+            TaskAssignment.family_id == family_id,
+            TaskAssignment.occurrence_date.between(start, end),
+        )
+        return [(task_id, day) for task_id, day in db.execute(stmt)]
+
+    def get_loads(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> Dict[int, float]:
+        """Get each member's assigned effort from ``start`` to ``end``."""
+        stmt = (
+            select(TaskAssignment.user_id, func.sum(TaskAssignment.effort))
+            .where(
+                TaskAssignment.family_id == family_id,
+                TaskAssignment.occurrence_date.between(start, end),
+            )
+            .group_by(TaskAssignment.user_id)
+        )
+        return {user_id: float(load) for user_id, load in db.execute(stmt)}
+
+    def get_capacities(self, db: Session, *, family_id: int) -> Dict[int, float]:
+        """Get each member's capacity."""
+        stmt = select(FamilyMember.user_id, FamilyMember.capacity).where(
+            FamilyMember.family_id == family_id
+        )
+        return {user_id: capacity for user_id, capacity in db.execute(stmt)}
+
+    def schedule(
+        self, db: Session, *, family_id: int, start: date, end: date, since: date
+    ) -> List[TaskAssignment]:
+        """
+        Assign the unassigned occurrences of rotating tasks from ``start`` to ``end``.
+
+        Existing assignments are kept; they and everything assigned since
+        ``since`` count towards members' loads. Occurrences go out in date
+        order, larger efforts first, each to the least-loaded member for
+        their capacity. Returns the new assignments.
+        """
+        balancer = LoadBalancer(
+            self.get_capacities(db, family_id=family_id),
+            self.get_loads(db, family_id=family_id, start=since, end=end),
+        )
+        assigned: Set[Key] = set(
+            self.get_keys_in_range(db, family_id=family_id, start=start, end=end)
+        )
+        efforts: Dict[int, int] = {}
+        pending: List[Tuple[date, int, int]] = []
+        for task, days in task_crud.get_occurrences(db, family_id=family_id, start=start, end=end):
+            if not task.rotate:
+                continue
+            efforts[task.id] = task.effort
+            pending.extend(
+                (day, -task.effort, task.id) for day in days if (task.id, day) not in assigned
+            )
+        pending.sort()
+
+        rows = [
+            {
+                "task_id": task_id,
+                "occurrence_date": day,
+                "family_id": family_id,
+                "user_id": user_id,
+                "effort": efforts[task_id],
+                "done": False,
+            }
+            for (day, task_id), user_id in balancer.plan(
+                ((day, task_id), efforts[task_id]) for day, _, task_id in pending
+            )
+        ]
+        if not rows:
+            return []
+        db.execute(insert(TaskAssignment), rows)
+        db.commit()
+        return [TaskAssignment(**row) for row in rows]
+
+    def release(self, db: Session, *, family_id: int, user_id: int, start: date) -> int:
+        """Unassign a member's pending occurrences from ``start`` on; returns how many."""
+        stmt = delete(TaskAssignment).where(
+            TaskAssignment.family_id == family_id,
+            TaskAssignment.occurrence_date >= start,
+            TaskAssignment.user_id == user_id,
+            TaskAssignment.done.is_(False),
+        )
+        released = db.execute(stmt).rowcount
+        db.commit()
+        return released
+
+
+assignment_crud = CRUDAssignment(TaskAssignment)
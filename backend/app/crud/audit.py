@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.audit import AuditEntry
+
+
+class CRUDAudit:
+    """Reads of the audit log; entries are written by ``app.core.audit``."""
+
+    def get_history(
+        self,
+        db: Session,
+        *,
+        entity: str,
+        entity_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[AuditEntry]:
+        """Get an entity's audit entries, newest first, via the (entity, entity_id, ts) index."""
+        stmt = select(AuditEntry).where(
+            AuditEntry.entity == entity, AuditEntry.entity_id == entity_id
+        )
+        if since is not None:
+            stmt = stmt.where(AuditEntry.ts >= since)
+        if until is not None:
+            stmt = stmt.where(AuditEntry.ts < until)
+        stmt = stmt.order_by(AuditEntry.ts.desc(), AuditEntry.id.desc()).limit(limit)
+        return list(db.execute(stmt).scalars())
+
+
+audit_crud = CRUDAudit()
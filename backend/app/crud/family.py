@@ -0,0 +1,85 @@
+from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.family import MEMBER, OWNER, Family, FamilyMember
+from app.models.user import User
+from app.schemas.family import FamilyCreate, FamilyUpdate
+
+
+class CRUDFamily(CRUDBase[Family, FamilyCreate, FamilyUpdate]):
+    """CRUD operations for Family and its memberships."""
+
+    def create_with_owner(self, db: Session, *, obj_in: FamilyCreate, owner_id: int) -> Family:
+        """Create a family with ``owner_id`` as its owner."""
+        db_obj = Family(name=obj_in.name)
+        db.add(db_obj)
+        db.flush()
+        db.add(FamilyMember(family_id=db_obj.id, user_id=owner_id, role=OWNER))
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_multi_for_user(
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Family]:
+        """Get the families a user belongs to."""
+        stmt = (
+            select(Family)
+            .join(FamilyMember, FamilyMember.family_id == Family.id)
+            .where(FamilyMember.user_id == user_id)
+            .order_by(Family.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_membership(
+        self, db: Session, *, family_id: int, user_id: int
+    ) -> Optional[FamilyMember]:
+        """Get a user's membership of a family by primary key."""
+        return db.get(FamilyMember, (family_id, user_id))
+
+    def get_members(
+        self, db: Session, *, family_id: int, skip: int = 0, limit: Optional[int] = 100
+    ) -> List[User]:
+        """Get the members of a family with one range scan of its memberships."""
+        stmt = (
+            select(User)
+            .join(FamilyMember, FamilyMember.user_id == User.id)
+            .where(FamilyMember.family_id == family_id)
+            .order_by(FamilyMember.user_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def count_owners(self, db: Session, *, family_id: int) -> int:
+        """Count the owners of a family."""
+        stmt = select(func.count()).where(
+            FamilyMember.family_id == family_id, FamilyMember.role == OWNER
+        )
+        return db.execute(stmt).scalar_one()
+
+    def add_member(
+        self, db: Session, *, family_id: int, user_id: int, role: str = MEMBER
+    ) -> FamilyMember:
+        """Add a user to a family."""
+        if self.get_membership(db, family_id=family_id, user_id=user_id) is not None:
+            raise ValueError(f"User {user_id} is already a member of family {family_id}")
+        membership = FamilyMember(family_id=family_id, user_id=user_id, role=role)
+        db.add(membership)
+        db.commit()
+        return membership
+
+    def remove_member(self, db: Session, *, family_id: int, user_id: int) -> FamilyMember:
+        """Remove a user from a family; their chore assignments are left as they are."""
+        membership = self.get_membership(db, family_id=family_id, user_id=user_id)
+        if membership is None:
+            raise ValueError(f"User {user_id} is not a member of family {family_id}")
+        db.delete(membership)
+        db.commit()
+        return membership
+
+
+family_crud = CRUDFamily(Family)
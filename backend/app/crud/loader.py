@@ -0,0 +1,119 @@
+"""
+Per-request batching of lookups by key, in the style of DataLoader.
+
+Response assembly tends to look related records up one id at a time.
+A loader collects those ids instead (``want``). The first time any of the
+values is needed, it fetches every id asked for so far with one ``IN``
+query; that dispatch is the loader's tick. Fetched records, and the ids
+found to be missing, are cached for the rest of the request, so each id
+is queried at most once until the session commits or rolls back. That
+expires loaded objects, so the cache is cleared and they are reloaded in a
+batch too, rather than refreshed one by one.
+
+Loaders are kept in ``Session.info`` and so live exactly as long as the
+request's session. ``CRUDBase.loader`` returns the one for its model, and
+since loaded objects are in the session's identity map, ``get`` calls for
+ids that were loaded need no query either.
+"""
+from typing import (
+    Callable, Dict, Generic, Hashable, Iterable, List, Mapping, Optional, Sequence, TypeVar,
+)
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Ids per IN query; SQLite allows 999 parameters per statement before 3.32.
+MAX_BATCH_SIZE = 500
+
+
+class Deferred(Generic[K, V]):
+    """A value the loader will fetch with the rest of its batch."""
+
+    __slots__ = ("loader", "key")
+
+    def __init__(self, loader: "Loader[K, V]", key: K) -> None:
+        self.loader = loader
+        self.key = key
+
+    def get(self) -> Optional[V]:
+        """The value, dispatching the loader's pending batch if necessary."""
+        return self.loader._resolve(self.key)
+
+
+class Loader(Generic[K, V]):
+    """Batches and caches lookups of ``fetch``, which maps keys to found values."""
+
+    def __init__(
+        self,
+        fetch: Callable[[Sequence[K]], Mapping[K, V]],
+        *,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        self.fetch = fetch
+        self.max_batch_size = max_batch_size
+        self._cache: Dict[K, Optional[V]] = {}
+        # Insertion-ordered, so batches query ids in the order they were wanted.
+        self._pending: Dict[K, None] = {}
+
+    def want(self, key: K) -> Deferred[K, V]:
+        """Queue ``key`` for the next batch without querying."""
+        if key not in self._cache:
+            self._pending[key] = None
+        return Deferred(self, key)
+
+    def load(self, key: K) -> Optional[V]:
+        """The value of ``key``, fetched together with anything already wanted."""
+        return self.want(key).get()
+
+    def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Values of ``keys`` in order, ``None`` for missing ones; one batch."""
+        wanted = [self.want(key) for key in keys]
+        return [deferred.get() for deferred in wanted]
+
+    def prime(self, key: K, value: Optional[V]) -> None:
+        """Cache a value obtained some other way."""
+        self._pending.pop(key, None)
+        self._cache[key] = value
+
+    def clear(self, key: Optional[K] = None) -> None:
+        """Forget ``key``, or every cached value."""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def dispatch(self) -> None:
+        """Fetch every pending key, in batches of at most ``max_batch_size``."""
+        keys = list(self._pending)
+        self._pending.clear()
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = keys[start:start + self.max_batch_size]
+            found = self.fetch(batch)
+            for key in batch:
+                self._cache[key] = found.get(key)
+
+    def _resolve(self, key: K) -> Optional[V]:
+        if key not in self._cache:
+            self._pending[key] = None
+            self.dispatch()
+        return self._cache[key]
+
+
+def get_loader(
+    db: Session, name: Hashable, fetch: Callable[[Sequence[K]], Mapping[K, V]]
+) -> Loader[K, V]:
+    """The loader registered as ``name`` for ``db``'s request, created on first use."""
+    loaders: Dict[Hashable, Loader[K, V]] = db.info.setdefault("loaders", {})
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = Loader(fetch)
+    return loader
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_loaders(session: Session) -> None:
+    for loader in session.info.get("loaders", {}).values():
+        loader.clear()
@@ -0,0 +1,177 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.crud.task import task_crud
+from app.models.reminder import Reminder
+from app.models.task import Task, TaskAssignment
+from app.schemas.reminder import ReminderCreate, ReminderUpdate
+
+# A reminder id and its new time, or None once it no longer exists.
+Change = Tuple[int, Optional[datetime]]
+
+
+def remind_at(day: date, remind_before: int, day_start_hour: int) -> datetime:
+    """When to remind about an occurrence due on ``day`` (naive UTC)."""
+    return datetime.combine(day, time(day_start_hour)) - timedelta(minutes=remind_before)
+
+
+class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
+    """CRUD operations for Reminder, materialized per task occurrence."""
+
+    def sync_task(
+        self, db: Session, *, task: Task, start: date, end: date, day_start_hour: int
+    ) -> List[Change]:
+        """
+        Bring a task's pending reminders from ``start`` to ``end`` in line with it.
+
+        Only the difference is written: reminders of dropped occurrences are
+        deleted, moved ones updated and new ones inserted. Occurrences whose
+        reminder was already dispatched are left alone. Returns the changes,
+        for the dispatcher to reschedule.
+        """
+        wanted: Dict[date, datetime] = {}
+        if task.remind_before is not None:
+            wanted = {
+                day: remind_at(day, task.remind_before, day_start_hour)
+                for day in task_crud.get_days(db, task=task, start=start, end=end)
+            }
+        stmt = select(
+            Reminder.id, Reminder.occurrence_date, Reminder.remind_at, Reminder.dispatched_at
+        ).where(Reminder.task_id == task.id, Reminder.occurrence_date >= start)
+        changes: List[Change] = []
+        for id, day, at, dispatched_at in db.execute(stmt):
+            wanted_at = wanted.pop(day, None)
+            if dispatched_at is not None:
+                continue
+            if wanted_at is None:
+                db.execute(delete(Reminder).where(Reminder.id == id))
+                changes.append((id, None))
+            elif wanted_at != at:
+                db.execute(update(Reminder).where(Reminder.id == id).values(remind_at=wanted_at))
+                changes.append((id, wanted_at))
+        if wanted:
+            ids = db.execute(
+                insert(Reminder).returning(Reminder.id, Reminder.remind_at),
+                [
+                    {"task_id": task.id, "occurrence_date": day, "remind_at": at}
+                    for day, at in wanted.items()
+                ],
+            )
+            changes.extend((id, at) for id, at in ids)
+        db.commit()
+        return changes
+
+    def remove_for_task(self, db: Session, *, task_id: int) -> List[Change]:
+        """Delete a task's reminders; returns the pending ones as cancelled."""
+        pending = db.execute(
+            select(Reminder.id).where(Reminder.task_id == task_id, Reminder.dispatched_at.is_(None))
+        ).scalars().all()
+        db.execute(delete(Reminder).where(Reminder.task_id == task_id))
+        db.commit()
+        return [(id, None) for id in pending]
+
+    def get_reminding_tasks(self, db: Session, *, start: date, end: date) -> List[Task]:
+        """Get the tasks with reminders that can fall due from ``start`` to ``end``."""
+        stmt = select(Task).where(
+            Task.remind_before.is_not(None),
+            Task.due_date <= end,
+            Task.repeat.is_not(None) | (Task.due_date >= start),
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_pending(
+        self, db: Session, *, since: Optional[datetime], until: datetime
+    ) -> List[Tuple[int, datetime]]:
+        """Get the pending reminders due from ``since`` to before ``until``, oldest first."""
+        stmt = select(Reminder.id, Reminder.remind_at).where(
+            Reminder.dispatched_at.is_(None), Reminder.remind_at < until
+        )
+        if since is not None:
+            stmt = stmt.where(Reminder.remind_at >= since)
+        return [(id, at) for id, at in db.execute(stmt.order_by(Reminder.remind_at))]
+
+    def get_pending_by_ids(
+        self, db: Session, *, ids: Sequence[int]
+    ) -> List[Tuple[int, datetime]]:
+        """Get which of ``ids`` are still pending, with when they are due."""
+        stmt = select(Reminder.id, Reminder.remind_at).where(
+            Reminder.id.in_(ids), Reminder.dispatched_at.is_(None)
+        )
+        return [(id, at) for id, at in db.execute(stmt)]
+
+    def drop_stale(self, db: Session, *, before: datetime, now: datetime) -> int:
+        """Mark pending reminders due before ``before`` dispatched without sending them."""
+        stmt = (
+            update(Reminder)
+            .where(Reminder.dispatched_at.is_(None), Reminder.remind_at < before)
+            .values(dispatched_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        dropped = db.execute(stmt).rowcount
+        db.commit()
+        return dropped
+
+    def claim(self, db: Session, *, ids: Sequence[int], now: datetime) -> List[int]:
+        """
+        Mark pending reminders due by ``now`` dispatched; returns the ids claimed.
+
+        Claiming before sending makes delivery at most once: a reminder
+        claimed by another worker, or before a restart, is never sent twice.
+        One moved later since the caller loaded it is not due and stays
+        pending.
+        """
+        stmt = (
+            update(Reminder)
+            .where(
+                Reminder.id.in_(ids),
+                Reminder.dispatched_at.is_(None),
+                Reminder.remind_at <= now,
+            )
+            .values(dispatched_at=now)
+            .returning(Reminder.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = list(db.execute(stmt).scalars())
+        db.commit()
+        return claimed
+
+    def get_details(self, db: Session, *, ids: Sequence[int]) -> Sequence[Row[Any]]:
+        """Get what a notification needs, recipient included, in one query."""
+        stmt = (
+            select(
+                Reminder.id,
+                Reminder.task_id,
+                Reminder.occurrence_date,
+                Reminder.remind_at,
+                Task.family_id,
+                Task.title,
+                # The rotation assignee of the occurrence, else the task's.
+                func.coalesce(TaskAssignment.user_id, Task.assignee_id).label("user_id"),
+            )
+            .join(Task, Task.id == Reminder.task_id)
+            .outerjoin(
+                TaskAssignment,
+                (TaskAssignment.task_id == Reminder.task_id)
+                & (TaskAssignment.occurrence_date == Reminder.occurrence_date),
+            )
+            .where(Reminder.id.in_(ids))
+            .order_by(Reminder.remind_at, Reminder.id)
+        )
+        return db.execute(stmt).all()
+
+    def get_in_range(
+        self, db: Session, *, family_id: int, start: datetime, end: datetime
+    ) -> List[Reminder]:
+        """Get a family's reminders from ``start`` to ``end``."""
+        stmt = (
+            select(Reminder)
+            .join(Task, Task.id == Reminder.task_id)
+            .where(Task.family_id == family_id, Reminder.remind_at.between(start, end))
+            .order_by(Reminder.remind_at, Reminder.id)
+        )
+        return list(db.execute(stmt).scalars())
+
+
+reminder_crud = CRUDReminder(Reminder)
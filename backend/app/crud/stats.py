@@ -0,0 +1,84 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import Row, and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+from app.models.stats import DAY, MONTH, WEEK, CompletionRollup, add_completions, period_start
+
+
+def range_bounds(range_: str, on: date) -> Tuple[str, date, date]:
+    """The rollup period kind read for ``range_``, and the range's first and last day."""
+    if range_ == "week":
+        start = period_start(WEEK, on)
+        return WEEK, start, start + timedelta(days=6)
+    if range_ == "month":
+        start = period_start(MONTH, on)
+        following = (start + timedelta(days=31)).replace(day=1)
+        return MONTH, start, following - timedelta(days=1)
+    return MONTH, on.replace(month=1, day=1), on.replace(month=12, day=31)
+
+
+class CRUDStats:
+    """Reads and compaction of the completion rollups kept by ``app.models.stats``."""
+
+    def get_totals(
+        self, db: Session, *, family_id: int, period: str, start: date, end: date
+    ) -> Sequence[Row[Any]]:
+        """
+        Get each member's (user_id, done, effort) from ``start`` to ``end``.
+
+        ``start`` and ``end`` bound whole periods of kind ``period``; their
+        rows are summed with the day rows not compacted yet. That is at most
+        a year of month rows and a few weeks of day rows per member, read
+        through the primary key, however long the family's history.
+        """
+        rollup = CompletionRollup
+        stmt = (
+            select(rollup.user_id, func.sum(rollup.done), func.sum(rollup.effort))
+            .where(
+                rollup.family_id == family_id,
+                or_(
+                    and_(rollup.period == period, rollup.start.between(start, end)),
+                    and_(rollup.period == DAY, rollup.start.between(start, end)),
+                ),
+            )
+            .group_by(rollup.user_id)
+            .having(func.sum(rollup.done) != 0)
+            .order_by(rollup.user_id)
+        )
+        return db.execute(stmt).all()
+
+    def compact(self, db: Session, *, before: date) -> int:
+        """
+        Fold the day rows before ``before`` into week and month rows.
+
+        The day rows are deleted and read back in one statement, so counts
+        added to them concurrently are never lost: they either make it into
+        the fold or land in a new day row compacted next time. Returns the
+        number of day rows folded.
+        """
+        rollup = CompletionRollup
+        days = db.execute(
+            delete(rollup)
+            .where(rollup.period == DAY, rollup.start < before)
+            .returning(rollup.family_id, rollup.user_id, rollup.start, rollup.done, rollup.effort)
+        ).all()
+        folded: Dict[Tuple[int, str, date, int], List[int]] = defaultdict(lambda: [0, 0])
+        for family_id, user_id, day, done, effort in days:
+            for period in (WEEK, MONTH):
+                totals = folded[family_id, period, period_start(period, day), user_id]
+                totals[0] += done
+                totals[1] += effort
+        if folded:
+            add_completions(db.connection(), [
+                {
+                    "family_id": family_id, "period": period, "start": start,
+                    "user_id": user_id, "done": done, "effort": effort,
+                }
+                for (family_id, period, start, user_id), (done, effort) in folded.items()
+            ])
+        db.commit()
+        return len(days)
+
+
+stats_crud = CRUDStats()
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List, NamedTuple, Set, Tuple, Type
+from sqlalchemy import and_, not_, or_, select
+from sqlalchemy.orm import Session
+from app.models.family import FamilyMember
+from app.models.sync import Tombstone, Versioned
+from app.models.user import User
+
+# Synced models by the SyncPage field that carries them.
+SYNCED: Dict[str, Type[Versioned]] = {"users": User}
+
+
+class Changes(NamedTuple):
+    """One page of changes: changed entities by field, tombstones, next cursor."""
+
+    changed: Dict[str, List[Any]]
+    deleted: List[Tombstone]
+    cursor: int
+    has_more: bool
+
+
+class CRUDSync:
+    """Delta sync reads over every synced model, scoped to the caller's families."""
+
+    def get_scope(self, db: Session, *, user_id: int) -> Tuple[Set[int], Set[int]]:
+        """Get the ids of ``user_id``'s families and of their members, the user included."""
+        families = select(FamilyMember.family_id).where(FamilyMember.user_id == user_id)
+        rows = db.execute(
+            select(FamilyMember.family_id, FamilyMember.user_id)
+            # Memberships the database has not cascaded away with their user.
+            .join(User, User.id == FamilyMember.user_id)
+            .where(FamilyMember.family_id.in_(families))
+        ).all()
+        return {family_id for family_id, _ in rows}, {user_id} | {member for _, member in rows}
+
+    def get_changes(self, db: Session, *, user_id: int, since: int, limit: int) -> Changes:
+        """
+        Get up to ``limit`` changes numbered after ``since`` visible to ``user_id``.
+
+        A user sees themselves and the members of their families, and the
+        tombstones of those families and their own. One query for that scope, then one per
+        model over the members' ids plus one over the tombstones, each
+        stopping after ``limit + 1`` rows, so a page costs O(limit + family
+        sizes) whatever the table sizes.
+        """
+        family_ids, member_ids = self.get_scope(db, user_id=user_id)
+        rows: List[Tuple[int, str, Any]] = []
+        for field, model in SYNCED.items():
+            stmt = (
+                select(model)
+                .where(model.id.in_(member_ids), model.seq > since)
+                .order_by(model.seq)
+                .limit(limit + 1)
+            )
+            rows.extend((obj.seq, field, obj) for obj in db.execute(stmt).scalars())
+        tombstones = (
+            select(Tombstone)
+            .where(
+                Tombstone.seq > since,
+                or_(
+                    Tombstone.family_id.in_(family_ids),
+                    Tombstone.user_id == user_id,
+                    and_(Tombstone.family_id.is_(None), Tombstone.user_id.is_(None)),
+                ),
+                # Gone from one family, but still seen through another.
+                not_(and_(
+                    Tombstone.entity == User.__sync_entity__,
+                    Tombstone.entity_id.in_(member_ids),
+                )),
+            )
+            .order_by(Tombstone.seq)
+            .limit(limit + 1)
+        )
+        rows.extend((row.seq, "", row) for row in db.execute(tombstones).scalars())
+        rows.sort(key=lambda row: row[0])
+
+        page = rows[:limit]
+        changed: Dict[str, List[Any]] = {field: [] for field in SYNCED}
+        deleted: List[Tombstone] = []
+        for _, field, obj in page:
+            (changed[field] if field else deleted).append(obj)
+        return Changes(
+            changed=changed,
+            deleted=deleted,
+            cursor=page[-1][0] if page else since,
+            has_more=len(rows) > limit,
+        )
+
+
+sync_crud = CRUDSync()
@@ -0,0 +1,182 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import Session
+from app.core.recurrence import Rule, occurs_on, window_cache
+from app.crud.base import CRUDFamilyScoped
+from app.models.reminder import Reminder
+from app.models.task import Task, TaskAssignment, TaskException
+from app.schemas.task import TaskCreate, TaskExceptionCreate, TaskUpdate
+
+# Changing any of these invalidates a task's pending assignments.
+ROTATION_FIELDS = frozenset(
+    {"due_date", "repeat", "repeat_interval", "repeat_until", "rotate", "effort"}
+)
+
+# A task and the days it falls due in a range.
+Occurrences = Tuple[Task, List[date]]
+
+
+def _apply_exceptions(
+    rule: Rule, days: Sequence[date], moves: Dict[date, Optional[date]], start: date, end: date
+) -> List[date]:
+    """``days`` without skipped occurrences, and with moved ones on their new day."""
+    kept = [day for day in days if day not in moves]
+    for day, moved_to in moves.items():
+        # An edit of the rule may have dropped the original day.
+        if moved_to is not None and start <= moved_to <= end and occurs_on(rule, day):
+            kept.append(moved_to)
+    return sorted(kept)
+
+
+class CRUDTask(CRUDFamilyScoped[Task, TaskCreate, TaskUpdate]):
+    """CRUD operations for Task and the exceptions of recurring tasks."""
+
+    def get_in_range(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> List[Task]:
+        """Get a family's one-off tasks due from ``start`` to ``end`` inclusive."""
+        stmt = (
+            select(Task)
+            .where(
+                Task.family_id == family_id,
+                Task.due_date.between(start, end),
+                Task.repeat.is_(None),
+            )
+            .order_by(Task.due_date, Task.id)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_recurring(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> List[Task]:
+        """Get a family's recurring tasks whose rule may fall due in the range."""
+        stmt = (
+            select(Task)
+            .where(
+                Task.family_id == family_id,
+                Task.repeat.is_not(None),
+                Task.due_date <= end,
+                or_(Task.repeat_until.is_(None), Task.repeat_until >= start),
+            )
+            .order_by(Task.id)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_exceptions(
+        self, db: Session, *, task_ids: List[int], start: date, end: date
+    ) -> List[TaskException]:
+        """Get the exceptions of ``task_ids`` moving occurrences into or out of the range."""
+        stmt = select(TaskException).where(
+            TaskException.task_id.in_(task_ids),
+            or_(
+                TaskException.occurrence_date.between(start, end),
+                TaskException.moved_to.between(start, end),
+            ),
+        )
+        return list(db.execute(stmt).scalars())
+
+    def get_days(self, db: Session, *, task: Task, start: date, end: date) -> List[date]:
+        """Get the days ``task`` falls due from ``start`` to ``end``, exceptions applied."""
+        rule = task.rule
+        if rule is None:
+            return [task.due_date] if start <= task.due_date <= end else []
+        days = window_cache.get(task.id, rule, start, end)
+        moves = {
+            exception.occurrence_date: exception.moved_to
+            for exception in self.get_exceptions(db, task_ids=[task.id], start=start, end=end)
+        }
+        return _apply_exceptions(rule, days, moves, start, end) if moves else list(days)
+
+    def get_occurrences(
+        self, db: Session, *, family_id: int, start: date, end: date
+    ) -> List[Occurrences]:
+        """
+        Get a family's tasks falling due in the range with their days there.
+
+        One-off tasks, recurring tasks and their exceptions take one query
+        each; recurring tasks are expanded lazily through the window cache.
+        Tasks are ordered by their first day in the range.
+        """
+        occurrences: List[Occurrences] = [
+            (task, [task.due_date])
+            for task in self.get_in_range(db, family_id=family_id, start=start, end=end)
+        ]
+        rules = self.get_recurring(db, family_id=family_id, start=start, end=end)
+        if not rules:
+            return occurrences
+
+        exceptions: Dict[int, Dict[date, Optional[date]]] = defaultdict(dict)
+        for exception in self.get_exceptions(
+            db, task_ids=[task.id for task in rules], start=start, end=end
+        ):
+            exceptions[exception.task_id][exception.occurrence_date] = exception.moved_to
+        for task in rules:
+            rule = task.rule
+            assert rule is not None
+            days: Sequence[date] = window_cache.get(task.id, rule, start, end)
+            if task.id in exceptions:
+                days = _apply_exceptions(rule, days, exceptions[task.id], start, end)
+            if days:
+                occurrences.append((task, list(days)))
+        occurrences.sort(key=lambda occurrence: (occurrence[1][0], occurrence[0].id))
+        return occurrences
+
+    def update(
+        self, db: Session, *, db_obj: Task, obj_in: Union[TaskUpdate, Dict[str, Any]]
+    ) -> Task:
+        """
+        Update a task, invalidating the cached expansions of its rule.
+
+        A change to when or how the task rotates drops its pending
+        assignments, leaving them for the rotation scheduler to fill again.
+        """
+        fields = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if ROTATION_FIELDS.intersection(fields):
+            db.execute(
+                delete(TaskAssignment).where(
+                    TaskAssignment.task_id == db_obj.id, TaskAssignment.done.is_(False)
+                )
+            )
+        task = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        window_cache.invalidate(task.id)
+        return task
+
+    def remove(self, db: Session, *, id: int) -> Task:
+        """Delete a task with its exceptions, assignments and reminders."""
+        db.execute(delete(Reminder).where(Reminder.task_id == id))
+        db.execute(delete(TaskException).where(TaskException.task_id == id))
+        db.execute(delete(TaskAssignment).where(TaskAssignment.task_id == id))
+        task = super().remove(db, id=id)
+        window_cache.invalidate(id)
+        return task
+
+    def set_exception(
+        self, db: Session, *, task: Task, obj_in: TaskExceptionCreate
+    ) -> TaskException:
+        """Skip or move one occurrence of a recurring task."""
+        rule = task.rule
+        if rule is None:
+            raise ValueError("Task does not repeat")
+        if not occurs_on(rule, obj_in.occurrence_date):
+            raise ValueError("Task does not fall due on that day")
+        exception = db.get(TaskException, (task.id, obj_in.occurrence_date))
+        if exception is None:
+            exception = TaskException(task_id=task.id, occurrence_date=obj_in.occurrence_date)
+            db.add(exception)
+        exception.moved_to = obj_in.moved_to
+        db.commit()
+        db.refresh(exception)
+        return exception
+
+    def remove_exception(self, db: Session, *, task_id: int, occurrence_date: date) -> None:
+        """Restore an occurrence to its rule."""
+        exception = db.get(TaskException, (task_id, occurrence_date))
+        if exception is None:
+            raise ValueError("Exception not found")
+        db.delete(exception)
+        db.commit()
+
+
+task_crud = CRUDTask(Task)
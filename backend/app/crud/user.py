@@ -1,17 +1,29 @@
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Sequence, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from passlib.context import CryptContext
+from sqlalchemy import Row, select
+from app.core.coalesce import coalesce
+from app.core.security import pwd_context
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.crud.base import CRUDBase
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """CRUD operations for User."""
 
+    audit_entity = "user"
+    audit_fields = ("first_name", "last_name", "email", "avatar_url", "hashed_password")
+    audit_redacted = frozenset({"hashed_password"})
+    # What the User schema shows; never the password hash.
+    read_columns = ("id", "first_name", "last_name", "email", "avatar_url")
+
+    @coalesce("users.get_multi_rows")
+    def get_multi_rows(
+        self, db: Session, *, skip: int = 0, limit: int = 100
+    ) -> Sequence[Row[Any]]:
+        """Get a read-only page of users; concurrent reads of the same page share one query."""
+        return super().get_multi_rows(db, skip=skip, limit=limit)
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         """Get user by email."""
         stmt = select(User).where(User.email == email)
@@ -28,6 +40,8 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password=hashed_password,
         )
         db.add(db_obj)
+        db.flush()
+        self._audit(db, "create", db_obj, {}, self._audited_values(db_obj))
         db.commit()
         db.refresh(db_obj)
         return db_obj
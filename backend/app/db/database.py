@@ -1,10 +1,21 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request
+from time import perf_counter
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import sessionmaker, Session, DeclarativeBase
-from typing import Generator
-from app.core.config import settings
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
+from typing import Any, Dict, Generator, Iterator, Optional
+from app.core.config import Settings, settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
+from app.core.tracing import traced
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bound lazily so importing the app never touches the database driver.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+_engine: Optional[Engine] = None
+
+# Session pinned by the current context (e.g. a transactional batch request).
+_shared_session: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
 
 
 class Base(DeclarativeBase):
@@ -12,9 +23,72 @@ class Base(DeclarativeBase):
     pass
 
 
-def get_db() -> Generator[Session, None, None]:
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(perf_counter() - start)
+
+
+def create_db_engine(app_settings: Settings, **kwargs: Any) -> Engine:
+    """Create an engine configured from ``app_settings``."""
+    options: Dict[str, Any] = {}
+    url = app_settings.database_url
+    # In-memory SQLite needs its single-connection pool.
+    if not (url == "sqlite://" or ":memory:" in url):
+        options["poolclass"] = TimedQueuePool
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options["pool_size"] = app_settings.db_pool_size
+        options["max_overflow"] = app_settings.db_max_overflow
+    options.update(kwargs)
+    return create_engine(app_settings.database_url, **options)
+
+
+def get_engine() -> Engine:
+    """Get the process-wide default engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine(settings)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_shared_session() -> Optional[Session]:
+    """Get the session pinned to the current context, if any."""
+    return _shared_session.get()
+
+
+@contextmanager
+def shared_session(db: Session) -> Iterator[Session]:
+    """Make every ``get_db`` resolved in this context reuse ``db``."""
+    token = _shared_session.set(db)
+    try:
+        yield db
+    finally:
+        _shared_session.reset(token)
+
+
+@traced("depends get_db")
+def get_db(request: Request) -> Generator[Session, None, None]:
     """Get database session."""
-    db = SessionLocal()
+    shared = get_shared_session()
+    if shared is not None:
+        # The owner of the shared session is responsible for closing it.
+        yield shared
+        return
+    # Apps built by create_app() carry their own engine; fall back to the
+    # process-wide one otherwise.
+    session_factory = getattr(request.app.state, "session_factory", None)
+    if session_factory is None:
+        get_engine()
+        session_factory = SessionLocal
+    db = session_factory()
     try:
         yield db
     finally:
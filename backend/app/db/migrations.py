@@ -0,0 +1,271 @@
+"""
+Helpers for migrations that run while the API is serving traffic.
+
+``alembic/env.py`` runs every migration in its own transaction, with a
+``migration_lock_timeout`` and ``migration_statement_timeout`` on the
+connection, so DDL that would queue behind a long transaction fails fast
+instead of stalling every request queued behind *it*. A migration that
+hits a timeout is rolled back and can be rerun.
+
+Schema changes go through expand and contract:
+
+1. Expand migrations only add: nullable columns, tables, indexes built
+   with ``create_index_concurrently``, data filled in by ``backfill``.
+   Both the running and the next release work against the result.
+2. Deploy the release that reads and writes the new schema.
+3. Contract migrations call ``contract()`` first, then remove what the
+   old release needed or tighten what it could not satisfy, e.g. with
+   ``set_not_null``.
+
+``alembic -x phase=expand upgrade head`` applies pending migrations up to
+the first contract one and stops there; ``alembic upgrade head`` after the
+deploy applies the rest.
+"""
+import argparse
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, Mapping, Optional, Sequence
+from alembic import op
+from alembic.config import Config
+from sqlalchemy import (
+    BigInteger, Column, ColumnElement, Connection, DateTime, MetaData, String, Table,
+    TableClause, func, insert, select, text, update,
+)
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+REHEARSAL_DIR = ALEMBIC_DIR / "rehearsal"
+
+# The helpers' own bookkeeping, kept out of the models' metadata so
+# autogenerate neither creates nor drops it.
+metadata = MetaData()
+progress = Table(
+    "migration_progress",
+    metadata,
+    Column("name", String(200), primary_key=True),
+    # Key of the last row a backfill committed.
+    Column("position", BigInteger, nullable=False),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+OWN_TABLES = frozenset(metadata.tables)
+
+
+class ContractPhase(Exception):
+    """Raised by ``contract()`` to stop an expand-only upgrade."""
+
+
+def config(database_url: str, *, versions: Optional[Path] = None, x: Sequence[str] = ()) -> Config:
+    """Alembic config for ``database_url``, as ``alembic -x ...`` would build it."""
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", str(ALEMBIC_DIR))
+    if versions is not None:
+        alembic_config.set_main_option("version_locations", str(versions))
+    alembic_config.attributes["database_url"] = database_url
+    alembic_config.cmd_opts = argparse.Namespace(x=list(x))
+    return alembic_config
+
+
+def contract() -> None:
+    """Mark the running migration as a contract step; call first in ``upgrade()``."""
+    environment = op.get_context().environment_context
+    x = environment.get_x_argument(as_dictionary=True) if environment is not None else {}
+    if x.get("phase") == "expand":
+        raise ContractPhase("Stopping before a contract migration: run it after the deploy")
+
+
+def _milliseconds(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+def set_timeouts(
+    connection: Connection,
+    *,
+    lock_timeout: Optional[float] = None,
+    statement_timeout: Optional[float] = None,
+) -> Dict[str, str]:
+    """
+    Set the session's lock and statement timeouts, in seconds (0 for none).
+
+    Returns the previous values for ``restore_timeouts``. SQLite has no
+    statement timeout; its busy timeout stands in for the lock timeout.
+    """
+    previous = {}
+    if connection.dialect.name == "postgresql":
+        for name, seconds in (("lock_timeout", lock_timeout), ("statement_timeout", statement_timeout)):
+            if seconds is not None:
+                previous[name] = connection.exec_driver_sql(f"SHOW {name}").scalar_one()
+                connection.exec_driver_sql(f"SET {name} = '{_milliseconds(seconds)}ms'")
+    elif connection.dialect.name == "sqlite" and lock_timeout is not None:
+        previous["busy_timeout"] = str(connection.exec_driver_sql("PRAGMA busy_timeout").scalar_one())
+        connection.exec_driver_sql(f"PRAGMA busy_timeout = {_milliseconds(lock_timeout)}")
+    return previous
+
+
+def restore_timeouts(connection: Connection, previous: Mapping[str, str]) -> None:
+    for name, value in previous.items():
+        if name == "busy_timeout":
+            connection.exec_driver_sql(f"PRAGMA busy_timeout = {int(value)}")
+        else:
+            connection.exec_driver_sql(f"SET {name} = '{value}'")
+
+
+@contextmanager
+def timeouts(
+    connection: Connection,
+    *,
+    lock_timeout: Optional[float] = None,
+    statement_timeout: Optional[float] = None,
+) -> Iterator[None]:
+    """Run a block with other timeouts, e.g. none for a long index build."""
+    previous = set_timeouts(
+        connection, lock_timeout=lock_timeout, statement_timeout=statement_timeout
+    )
+    try:
+        yield
+    finally:
+        restore_timeouts(connection, previous)
+
+
+def _online() -> bool:
+    return not op.get_context().as_sql
+
+
+def create_index_concurrently(
+    index_name: str, table_name: str, columns: Sequence[str], *, unique: bool = False, **kw: Any
+) -> None:
+    """
+    Build an index without blocking writes to the table.
+
+    On Postgres this is ``CREATE INDEX CONCURRENTLY``, which cannot run in a
+    transaction: the migration's work so far is committed first. A build
+    that failed half way leaves an invalid index behind, which is dropped
+    and rebuilt. Elsewhere it is a plain ``CREATE INDEX``.
+    """
+    if op.get_context().dialect.name != "postgresql":
+        op.create_index(index_name, table_name, columns, unique=unique, if_not_exists=True, **kw)
+        return
+    with op.get_context().autocommit_block():
+        guard: ContextManager[None] = nullcontext()
+        if _online():
+            bind = op.get_bind()
+            invalid = bind.execute(
+                text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": index_name},
+            ).scalar()
+            if invalid:
+                logger.warning("Rebuilding invalid index %s", index_name)
+                op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+            # The build can take a while; only the lock wait is bounded.
+            guard = timeouts(bind, statement_timeout=0)
+        with guard:
+            op.create_index(
+                index_name, table_name, columns, unique=unique,
+                postgresql_concurrently=True, if_not_exists=True, **kw,
+            )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drop an index without blocking the table; ``DROP INDEX CONCURRENTLY`` on Postgres."""
+    if op.get_context().dialect.name != "postgresql":
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True
+        )
+
+
+def set_not_null(table_name: str, column_name: str) -> None:
+    """
+    Make a backfilled column NOT NULL without holding a table lock for the scan.
+
+    On Postgres a ``NOT VALID`` check constraint is added, validated while
+    writes go on, and lets ``SET NOT NULL`` skip its own scan; each step
+    commits on its own. SQLite rebuilds the table.
+    """
+    if op.get_context().dialect.name != "postgresql":
+        with op.batch_alter_table(table_name) as batch:
+            batch.alter_column(column_name, nullable=False)
+        return
+    check = f"ck_{table_name}_{column_name}_not_null"
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {check} "
+            f"CHECK ({column_name} IS NOT NULL) NOT VALID"
+        )
+        op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {check}")
+        op.alter_column(table_name, column_name, nullable=False)
+        op.drop_constraint(check, table_name)
+
+
+def backfill(
+    table: TableClause,
+    values: Mapping[str, Any],
+    *,
+    where: ColumnElement[bool],
+    name: str,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """
+    Update the rows matching ``where`` to ``values``, a batch at a time.
+
+    Rows are taken in ``key`` order, ``batch_size`` per short transaction,
+    sleeping ``pause`` seconds between batches so the API keeps its share
+    of the database (``migration_backfill_batch_size`` and
+    ``migration_backfill_pause`` by default). ``where`` must exclude rows
+    already done. Each batch commits its position as ``name``, so a
+    backfill that was interrupted resumes after the last committed batch;
+    the position is cleared once it finishes. Returns the rows updated.
+    """
+    if not _online():
+        raise RuntimeError("Backfills need a database connection; run them online")
+    batch_size = batch_size or settings.migration_backfill_batch_size
+    pause = settings.migration_backfill_pause if pause is None else pause
+    column = table.c[key]
+    engine = op.get_bind().engine
+    updated = 0
+    # Batches commit on their own connections, so the migration's work so
+    # far has to be committed first.
+    with op.get_context().autocommit_block():
+        with engine.begin() as connection:
+            progress.create(connection, checkfirst=True)
+            position = connection.execute(
+                select(progress.c.position).where(progress.c.name == name)
+            ).scalar()
+        if position is not None:
+            logger.info("Resuming backfill %s after %s=%s", name, key, position)
+        while True:
+            with engine.begin() as connection:
+                set_timeouts(
+                    connection,
+                    lock_timeout=settings.migration_lock_timeout,
+                    statement_timeout=settings.migration_statement_timeout,
+                )
+                after = [where] if position is None else [where, column > position]
+                keys = connection.execute(
+                    select(column).where(*after).order_by(column).limit(batch_size)
+                ).scalars().all()
+                if not keys:
+                    connection.execute(progress.delete().where(progress.c.name == name))
+                    break
+                updated += connection.execute(
+                    update(table).where(*after, column <= keys[-1]).values(values)
+                ).rowcount
+                position = keys[-1]
+                saved = connection.execute(
+                    update(progress).where(progress.c.name == name)
+                    .values(position=position, updated_at=func.now())
+                ).rowcount
+                if not saved:
+                    connection.execute(insert(progress).values(name=name, position=position))
+            logger.debug("Backfill %s: %d rows, up to %s=%s", name, updated, key, position)
+            if pause:
+                time.sleep(pause)
+    logger.info("Backfill %s updated %d rows", name, updated)
+    return updated
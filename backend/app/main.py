@@ -1,33 +1,208 @@
-from fastapi import FastAPI
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+from anyio import to_thread
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.core import (
+    audit, concurrency, jobs, logs, metrics, profiling, reminders, startup, throttle, tracing,
+)
+from app.core.config import Settings, settings
 from app.api.api_v1.api import api_router
+from app.db.database import create_db_engine
 
-app = FastAPI(
-    title="Family Task Planner API",
-    description="A family task planning application",
-    version="1.0.0",
-)
 
-# Set up CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create and warm per-app resources, and release them on shutdown."""
+    app_settings: Settings = app.state.settings
+    undo_logging: Optional[Callable[[], None]] = None
+    if app_settings.logging_enabled:
+        undo_logging = logs.configure(app_settings)
+    # Sync endpoints run on anyio's worker threads; size that pool per process.
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = app_settings.server_threadpool_size
+    engine = create_db_engine(app_settings)
+    app.state.engine = engine
+    app.state.session_factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        class_=tracing.TracedSession if app_settings.tracing_enabled else Session,
+    )
+    undo_tracing: Optional[Callable[[], None]] = None
+    if app_settings.tracing_enabled:
+        undo_tracing = tracing.configure(app_settings, engine)
+    remove_sql_logging: Optional[Callable[[], None]] = None
+    if app_settings.logging_enabled and app_settings.log_sql:
+        remove_sql_logging = logs.install_sql_logging(engine)
+    if app_settings.warmup_on_startup:
+        await run_in_threadpool(
+            startup.warm_up, app, engine, app_settings.db_warmup_connections
+        )
+    remove_collectors = metrics.install_collectors(limiter, engine)
+    writer: Optional[metrics.SnapshotWriter] = None
+    if app_settings.metrics_enabled and app_settings.metrics_multiprocess_dir:
+        writer = metrics.SnapshotWriter(
+            app_settings.metrics_multiprocess_dir, app_settings.metrics_flush_interval
+        )
+        writer.start()
+    rotation: Optional[jobs.RotationJob] = None
+    if app_settings.background_jobs_enabled and app_settings.rotation_interval > 0:
+        rotation = jobs.RotationJob(
+            app.state.session_factory,
+            app_settings.rotation_interval,
+            app_settings.rotation_horizon_days,
+            app_settings.rotation_lookback_days,
+        )
+        rotation.start()
+    compaction: Optional[jobs.StatsCompactionJob] = None
+    if app_settings.background_jobs_enabled and app_settings.stats_compaction_interval > 0:
+        compaction = jobs.StatsCompactionJob(
+            app.state.session_factory, app_settings.stats_compaction_interval
+        )
+        compaction.start()
+    audit_log: Optional[audit.AuditLog] = None
+    if app_settings.audit_enabled:
+        audit_log = audit.AuditLog(
+            engine,
+            queue_size=app_settings.audit_queue_size,
+            batch_size=app_settings.audit_batch_size,
+            interval=app_settings.audit_flush_interval,
+            spill_path=app_settings.audit_spill_path,
+        )
+        audit_log.start()
+    app.state.audit = audit_log
+    dispatcher: Optional[reminders.ReminderDispatcher] = None
+    if app_settings.reminders_enabled and app_settings.background_jobs_enabled:
+        dispatcher = reminders.ReminderDispatcher(
+            app.state.session_factory,
+            reminders.build_notifier(app_settings),
+            tick=app_settings.reminder_tick,
+            window=app_settings.reminder_window,
+            batch_size=app_settings.reminder_batch_size,
+            max_lateness=app_settings.reminder_max_lateness,
+            horizon_days=app_settings.reminder_horizon_days,
+            day_start_hour=app_settings.reminder_day_start_hour,
+        )
+        dispatcher.start()
+    try:
+        yield
+    finally:
+        if dispatcher is not None:
+            dispatcher.stop()
+        if rotation is not None:
+            rotation.stop()
+        if compaction is not None:
+            compaction.stop()
+        if audit_log is not None:
+            audit_log.stop()
+        if writer is not None:
+            writer.stop()
+        remove_collectors()
+        # Only loaded once an avatar was uploaded or served.
+        avatars = sys.modules.get("app.core.avatars")
+        if avatars is not None:
+            avatars.shutdown()
+        if remove_sql_logging is not None:
+            remove_sql_logging()
+        if undo_tracing is not None:
+            undo_tracing()
+        engine.dispose()
+        if undo_logging is not None:
+            undo_logging()
+
 
-app.include_router(api_router, prefix="/api/v1")
+def metrics_endpoint(request: Request) -> Response:
+    """Prometheus metrics endpoint."""
+    app_settings: Settings = request.app.state.settings
+    return Response(
+        metrics.render(app_settings.metrics_multiprocess_dir),
+        media_type=metrics.CONTENT_TYPE,
+    )
 
 
-@app.get("/")
 async def root() -> dict[str, str]:
     """Root endpoint."""
     return {"message": "Family Task Planner API"}
 
 
-@app.get("/health")
 async def health_check() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    """Build an application instance bound to ``app_settings``."""
+    app_settings = app_settings or settings
+    app = FastAPI(
+        title="Family Task Planner API",
+        description="A family task planning application",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.settings = app_settings
+    app.state.throttle = throttle.build_throttle(app_settings)
+
+    if app_settings.concurrency_limit_enabled:
+        # Inside CORS so that browsers can read the 503.
+        app.add_middleware(
+            concurrency.ConcurrencyLimitMiddleware,
+            initial=app_settings.concurrency_initial_limit,
+            min_limit=app_settings.concurrency_min_limit,
+            max_limit=app_settings.concurrency_max_limit,
+            tolerance=app_settings.concurrency_latency_tolerance,
+            backoff=app_settings.concurrency_backoff,
+            bypass=("/health", "/metrics"),
+        )
+
+    # Set up CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=app_settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if app_settings.audit_enabled:
+        app.add_middleware(audit.AuditContextMiddleware)
+
+    if app_settings.profiling_enabled:
+        app.add_middleware(
+            profiling.ProfilingMiddleware,
+            directory=app_settings.profiling_dir,
+            token=app_settings.profiling_token,
+            sample_rate=app_settings.profiling_sample_rate,
+            keep=app_settings.profiling_max_files,
+        )
+
+    if app_settings.tracing_enabled:
+        # Inside the access log middleware, whose request id the root span carries.
+        app.add_middleware(tracing.TracingMiddleware, sample_rate=app_settings.trace_sample_rate)
+
+    if app_settings.logging_enabled:
+        # Outside everything but metrics, so that shed and failed requests
+        # get an id and an access record too.
+        app.add_middleware(
+            logs.AccessLogMiddleware,
+            log_access=app_settings.log_access,
+            sample_rate=app_settings.log_access_sample_rate,
+            route_rates=app_settings.log_access_route_rates,
+        )
+
+    if app_settings.metrics_enabled:
+        # Added last so it is outermost and times the whole stack.
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    app.include_router(api_router, prefix="/api/v1")
+    app.get("/")(root)
+    app.get("/health")(health_check)
+    if app_settings.metrics_enabled:
+        app.get("/metrics", include_in_schema=False)(metrics_endpoint)
+    return app
+
+
+app = create_app()
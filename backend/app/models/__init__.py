@@ -1,3 +1,12 @@
 from .user import User
+from .family import Family, FamilyMember
+from .task import Task, TaskAssignment, TaskException
+from .reminder import Reminder
+from .sync import SyncCounter, Tombstone
+from .audit import AuditEntry
+from .stats import CompletionRollup
 
-__all__ = ["User"]
+__all__ = [
+    "User", "Family", "FamilyMember", "Task", "TaskAssignment", "TaskException", "Reminder",
+    "SyncCounter", "Tombstone", "AuditEntry", "CompletionRollup",
+]
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import JSON, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+
+
+class AuditEntry(Base):
+    """One audited mutation: who changed which fields of an entity, and when."""
+
+    __tablename__ = "audit_entries"
+    __table_args__ = (
+        # The history of one entity in time order, as the audit endpoint reads it.
+        Index("ix_audit_entries_entity_entity_id_ts", "entity", "entity_id", "ts"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(50), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    # Subject of the bearer token the change was made with, if any.
+    actor: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Field name -> [old, new]; redacted fields show only that they changed.
+    changes: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    # Naive UTC.
+    ts: Mapped[datetime] = mapped_column(DateTime, nullable=False)
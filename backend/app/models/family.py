@@ -0,0 +1,33 @@
+from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+
+OWNER = "owner"
+MEMBER = "member"
+
+
+class Family(Base):
+    """Family model."""
+
+    __tablename__ = "families"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+
+
+class FamilyMember(Base):
+    """Membership of a user in a family."""
+
+    __tablename__ = "family_members"
+
+    # The composite primary key is the (family_id, user id) index that
+    # member listings range-scan in user id order.
+    family_id: Mapped[int] = mapped_column(
+        ForeignKey("families.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    role: Mapped[str] = mapped_column(String(20), nullable=False, default=MEMBER)
+    # Share of rotating chores relative to other members; 0 while unavailable.
+    capacity: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database import Base
+
+
+class Reminder(Base):
+    """A reminder for one occurrence of a task, materialized ahead of time."""
+
+    __tablename__ = "reminders"
+    __table_args__ = (
+        UniqueConstraint("task_id", "occurrence_date", name="uq_reminders_task_id_occurrence_date"),
+        # The dispatcher's window query: pending reminders by time. Partial, so
+        # dispatched rows never weigh on it.
+        Index(
+            "ix_reminders_pending_remind_at",
+            "remind_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+            sqlite_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+    )
+    occurrence_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Naive UTC.
+    remind_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Set when a dispatcher claims the reminder, before it is sent, so no
+    # other dispatcher (or this one after a restart) sends it again.
+    dispatched_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,134 @@
+"""
+Task completion counts per family member, rolled up as tasks are done.
+
+Every flush that marks a task or a rotating chore occurrence done, or
+undoes it, adds +1 or -1 (and its effort) to the member's row for the
+day it was completed, so reading a member's week or month never scans
+task history. ``stats_crud.compact`` later folds past days into week
+and month rows. A period's total is its own row plus whatever day rows
+in it are not compacted yet; each day is counted in exactly one of them.
+
+Completions stay counted when the task is deleted. Like delta sync,
+only changes made through a session are seen: Core inserts and bulk
+updates bypass the rollups.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import partial
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Date, ForeignKey, Integer, String, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from app.db.database import Base
+from app.models.task import DONE, Task, TaskAssignment
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+# (family_id, user_id, completed_on) and the effort credited there.
+Credit = Tuple[Tuple[int, int, date], int]
+
+
+class CompletionRollup(Base):
+    """Tasks a member completed in one day, week (from Monday) or month."""
+
+    __tablename__ = "completion_rollups"
+
+    # The primary key is the index stats read: a family's rows of a
+    # period kind in a date range.
+    family_id: Mapped[int] = mapped_column(
+        ForeignKey("families.id", ondelete="CASCADE"), primary_key=True
+    )
+    period: Mapped[str] = mapped_column(String(5), primary_key=True)
+    start: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    effort: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+def period_start(period: str, day: date) -> date:
+    """The first day of the ``period`` containing ``day``."""
+    if period == WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def add_completions(connection: Connection, rows: Sequence[Dict[str, Any]]) -> None:
+    """Add the ``done`` and ``effort`` of ``rows`` to their rollups, creating them."""
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(CompletionRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["family_id", "period", "start", "user_id"],
+        set_={
+            "done": CompletionRollup.done + stmt.excluded.done,
+            "effort": CompletionRollup.effort + stmt.excluded.effort,
+        },
+    )
+    # In key order, so concurrent upserts lock shared rows in the same order.
+    ordered = sorted(rows, key=lambda r: (r["family_id"], r["period"], r["start"], r["user_id"]))
+    connection.execute(stmt, ordered)
+
+
+# Per tracked model: the member credited, and the attribute and value meaning done.
+_MEMBER = {Task: "assignee_id", TaskAssignment: "user_id"}
+_DONE: Dict[type, Tuple[str, Any]] = {Task: ("status", DONE), TaskAssignment: ("done", True)}
+
+
+def _previous(obj: Any, name: str) -> Any:
+    """The value of ``name`` when ``obj`` was loaded."""
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return None if history.added else getattr(obj, name)
+
+
+def _credit(obj: Any, value: Callable[[str], Any]) -> Optional[Credit]:
+    attribute, done = _DONE[type(obj)]
+    user_id = value(_MEMBER[type(obj)])
+    completed_on = value("completed_on")
+    if value(attribute) != done or user_id is None or completed_on is None:
+        return None
+    return (obj.family_id, user_id, completed_on), value("effort")
+
+
+@event.listens_for(Session, "before_flush")
+def _roll_up_completions(session: Session, flush_context: Any, instances: Any) -> None:
+    deltas: Dict[Tuple[int, int, date], List[int]] = defaultdict(lambda: [0, 0])
+    for obj in chain(session.new, session.dirty):
+        if type(obj) not in _MEMBER:
+            continue
+        new = obj in session.new
+        if not new and not session.is_modified(obj):
+            continue
+        attribute, done = _DONE[type(obj)]
+        if getattr(obj, attribute) == done:
+            if obj.completed_on is None:
+                obj.completed_on = date.today()
+        elif obj.completed_on is not None:
+            obj.completed_on = None
+        before = None if new else _credit(obj, partial(_previous, obj))
+        after = _credit(obj, partial(getattr, obj))
+        if before == after:
+            continue
+        for credit, sign in ((before, -1), (after, 1)):
+            if credit is not None:
+                key, effort = credit
+                deltas[key][0] += sign
+                deltas[key][1] += sign * effort
+    rows = [
+        {
+            "family_id": family_id, "period": DAY, "start": day, "user_id": user_id,
+            "done": done_count, "effort": effort,
+        }
+        for (family_id, user_id, day), (done_count, effort) in deltas.items()
+        if done_count or effort
+    ]
+    if rows:
+        add_completions(session.connection(), rows)
@@ -0,0 +1,99 @@
+from typing import TYPE_CHECKING, Any, ClassVar, List, Optional, Sequence
+from sqlalchemy import BigInteger, Index, Integer, String, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from app.db.database import Base
+
+
+class SyncCounter(Base):
+    """The single row handing out change sequence numbers, created on first use."""
+
+    __tablename__ = "sync_counter"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class Tombstone(Base):
+    """A synced entity deleted, or gone from a family, kept so clients can sync that."""
+
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        # Delta sync: a caller's families' tombstones, and their own, in
+        # sequence order.
+        Index("ix_tombstones_family_id_seq", "family_id", "seq"),
+        Index("ix_tombstones_user_id_seq", "user_id", "seq"),
+    )
+
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    entity: Mapped[str] = mapped_column(String(50), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # The family whose clients sync it, or the one user whose clients do
+    # (an entity that left their scope); every client if both are NULL.
+    family_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
+class Versioned:
+    """
+    Mixin for models served by delta sync.
+
+    Every insert or update through a session stamps ``seq`` with the next
+    change sequence number, and every delete leaves a Tombstone for each of
+    ``sync_family_ids``, so a client holding the last number it saw fetches
+    only what changed since.
+    Statements that bypass the session (Core inserts, bulk updates) are
+    not tracked.
+    """
+
+    __sync_entity__: ClassVar[str]
+    if TYPE_CHECKING:
+        id: Mapped[int]
+
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
+
+    def sync_family_ids(self, session: Session) -> Sequence[Optional[int]]:
+        """The families told when this entity is deleted; ``None`` tells every client."""
+        return [None]
+
+
+def next_sequence(connection: Connection, count: int) -> range:
+    """
+    Reserve ``count`` change sequence numbers.
+
+    The counter row stays locked until the transaction ends, so numbers are
+    handed out in commit order: a client never sees a number before every
+    smaller one is committed. It is an upsert, so a schema built by
+    migrations rather than ``create_all`` needs no seeded row.
+    """
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(SyncCounter).values(id=1, value=count)
+    last = connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["id"], set_={"value": SyncCounter.value + stmt.excluded.value}
+        ).returning(SyncCounter.value)
+    ).scalar_one()
+    return range(last - count + 1, last + 1)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session: Session, flush_context: Any, instances: Any) -> None:
+    changed = [obj for obj in session.new if isinstance(obj, Versioned)]
+    changed.extend(
+        obj for obj in session.dirty if isinstance(obj, Versioned) and session.is_modified(obj)
+    )
+    deleted: List[Any] = [
+        (obj, family_id)
+        for obj in session.deleted if isinstance(obj, Versioned)
+        for family_id in obj.sync_family_ids(session)
+    ]
+    if not changed and not deleted:
+        return
+    seqs = iter(next_sequence(session.connection(), len(changed) + len(deleted)))
+    for obj in changed:
+        obj.seq = next(seqs)
+    for obj, family_id in deleted:
+        session.add(Tombstone(
+            seq=next(seqs), entity=obj.__sync_entity__, entity_id=obj.id, family_id=family_id,
+        ))
@@ -0,0 +1,101 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import Boolean, Date, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.recurrence import Rule
+from app.db.database import Base
+
+TODO = "todo"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+
+class Task(Base):
+    """Task model."""
+
+    __tablename__ = "tasks"
+    __table_args__ = (
+        # Board: a family's tasks in a date range.
+        Index("ix_tasks_family_id_due_date", "family_id", "due_date"),
+        # A member's own tasks in a date range.
+        Index("ix_tasks_assignee_id_due_date", "assignee_id", "due_date"),
+        # Board: a family's recurring tasks, whatever their first due date.
+        Index("ix_tasks_family_id_repeat", "family_id", "repeat"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    family_id: Mapped[int] = mapped_column(
+        ForeignKey("families.id", ondelete="CASCADE"), nullable=False
+    )
+    assignee_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True, active_history=True
+    )
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    due_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default=TODO, active_history=True
+    )
+    # Set while the task is done; the day its completion is counted on.
+    completed_on: Mapped[Optional[date]] = mapped_column(
+        Date, nullable=True, active_history=True
+    )
+    # Recurrence rule; ``due_date`` is the first occurrence. NULL for one-off tasks.
+    repeat: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    repeat_interval: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    repeat_until: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    # Rotating tasks are assigned per occurrence by the rotation scheduler.
+    rotate: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    effort: Mapped[int] = mapped_column(Integer, nullable=False, default=1, active_history=True)
+    # Minutes before the due time to remind the assignee; NULL for no reminder.
+    remind_before: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    @property
+    def rule(self) -> Optional[Rule]:
+        """The recurrence rule, if the task repeats."""
+        if self.repeat is None:
+            return None
+        return Rule(self.due_date, self.repeat, self.repeat_interval, self.repeat_until)
+
+
+class TaskException(Base):
+    """A skipped or moved occurrence of a recurring task."""
+
+    __tablename__ = "task_exceptions"
+
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    occurrence_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    # NULL skips the occurrence.
+    moved_to: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+
+
+class TaskAssignment(Base):
+    """The member doing one occurrence of a rotating task."""
+
+    __tablename__ = "task_assignments"
+    __table_args__ = (
+        # A family's assignments in a date range: board, loads, scheduling.
+        Index("ix_task_assignments_family_id_occurrence_date", "family_id", "occurrence_date"),
+    )
+
+    task_id: Mapped[int] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    occurrence_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    family_id: Mapped[int] = mapped_column(
+        ForeignKey("families.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, active_history=True
+    )
+    # Copied from the task so loads are one aggregate over this table.
+    effort: Mapped[int] = mapped_column(Integer, nullable=False, default=1, active_history=True)
+    done: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, active_history=True
+    )
+    # Set while the occurrence is done; the day its completion is counted on.
+    completed_on: Mapped[Optional[date]] = mapped_column(
+        Date, nullable=True, active_history=True
+    )
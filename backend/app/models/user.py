@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, String
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import Integer, String, event, select, update
+from sqlalchemy.orm import Mapped, Session, mapped_column
 from app.db.database import Base
+from app.models.family import FamilyMember
+from app.models.sync import Tombstone, Versioned, next_sequence
 
 
-class User(Base):
+class User(Versioned, Base):
     """User model."""
     
     __tablename__ = "users"
+    __sync_entity__ = "user"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -14,3 +18,50 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     avatar_url: Mapped[str] = mapped_column(String(500), nullable=True)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    def sync_family_ids(self, session: Session) -> Sequence[Optional[int]]:
+        """A user is synced to the members of their families."""
+        return session.execute(
+            select(FamilyMember.family_id).where(FamilyMember.user_id == self.id)
+        ).scalars().all()
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_memberships(session: Session, flush_context: Any, instances: Any) -> None:
+    """
+    Sync users to the families they join or leave.
+
+    A user joining a family is stamped again, so that the family's clients
+    download them even if they have not changed. Leaving one leaves a
+    tombstone for that family, and one for the leaver of each member they
+    no longer see there, so their own clients drop those too.
+    """
+    joined: List[FamilyMember] = [m for m in session.new if isinstance(m, FamilyMember)]
+    left: List[FamilyMember] = [m for m in session.deleted if isinstance(m, FamilyMember)]
+    if not joined and not left:
+        return
+    connection = session.connection()
+    lost = [
+        (membership.user_id, member_id)
+        for membership in left
+        for member_id in connection.execute(
+            select(FamilyMember.user_id).where(
+                FamilyMember.family_id == membership.family_id,
+                FamilyMember.user_id != membership.user_id,
+            )
+        ).scalars()
+    ]
+    seqs = iter(next_sequence(connection, len(joined) + len(left) + len(lost)))
+    for membership in joined:
+        connection.execute(
+            update(User).where(User.id == membership.user_id).values(seq=next(seqs))
+        )
+    for membership in left:
+        session.add(Tombstone(
+            seq=next(seqs), entity=User.__sync_entity__, entity_id=membership.user_id,
+            family_id=membership.family_id,
+        ))
+    for user_id, member_id in lost:
+        session.add(Tombstone(
+            seq=next(seqs), entity=User.__sync_entity__, entity_id=member_id, user_id=user_id,
+        ))
@@ -1,3 +1,19 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
+from .family import Family, FamilyCreate, FamilyUpdate, Member, MemberAdd, MemberUpdate
+from .task import (
+    Assignment, AssignmentCreate, AssignmentUpdate, Board, BoardMember, BoardTask,
+    Task, TaskCreate, TaskException, TaskExceptionCreate, TaskUpdate,
+)
+from .reminder import Reminder, ReminderCreate, ReminderUpdate
+from .sync import SyncPage, Tombstone
+from .audit import AuditEntry
+from .stats import FamilyStats, MemberStats
 
-__all__ = ["User", "UserCreate", "UserUpdate", "UserInDB"]
+__all__ = [
+    "User", "UserCreate", "UserUpdate", "UserInDB",
+    "Family", "FamilyCreate", "FamilyUpdate", "Member", "MemberAdd", "MemberUpdate",
+    "Board", "BoardMember", "BoardTask", "Task", "TaskCreate", "TaskUpdate",
+    "TaskException", "TaskExceptionCreate", "Assignment", "AssignmentCreate", "AssignmentUpdate",
+    "Reminder", "ReminderCreate", "ReminderUpdate", "SyncPage", "Tombstone",
+    "AuditEntry", "FamilyStats", "MemberStats",
+]
@@ -0,0 +1,18 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+
+class AuditEntry(BaseModel):
+    """Audit entry response schema."""
+
+    id: int
+    entity: str
+    entity_id: int
+    action: str
+    actor: Optional[str] = None
+    changes: Dict[str, List[Any]]
+    ts: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
+
+
+class BatchSubRequest(BaseModel):
+    """A single API call inside a batch."""
+
+    id: str
+    method: str = "GET"
+    url: str = Field(description="Path relative to /api/v1, e.g. /users/1")
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+    depends_on: List[str] = []
+
+    @field_validator("method")
+    @classmethod
+    def validate_method(cls, v: str) -> str:
+        method = v.upper()
+        if method not in {"GET", "POST", "PUT", "PATCH", "DELETE"}:
+            raise ValueError(f"Unsupported method {v}")
+        return method
+
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        if not v.startswith("/"):
+            raise ValueError("URL must start with /")
+        if v.split("?", 1)[0].rstrip("/") == "/batch":
+            raise ValueError("Batches cannot be nested")
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Batch of API calls executed in one round trip."""
+
+    requests: List[BatchSubRequest]
+    transaction: bool = False
+
+
+class BatchSubResponse(BaseModel):
+    """Result of a single API call inside a batch."""
+
+    id: str
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+    duration_ms: float
+
+
+class BatchResponse(BaseModel):
+    """Results of a batch, in request order."""
+
+    responses: List[BatchSubResponse]
+    committed: bool
+    duration_ms: float
@@ -0,0 +1,54 @@
+from pydantic import BaseModel, EmailStr, Field
+from typing import Literal, Optional
+
+
+class FamilyBase(BaseModel):
+    """Base family schema."""
+
+    name: str
+
+
+class FamilyCreate(FamilyBase):
+    """Family creation schema."""
+
+    pass
+
+
+class FamilyUpdate(BaseModel):
+    """Family update schema."""
+
+    name: Optional[str] = None
+
+
+class Family(FamilyBase):
+    """Family response schema."""
+
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class MemberAdd(BaseModel):
+    """Add an existing user to a family by email."""
+
+    email: EmailStr
+    role: Literal["owner", "member"] = "member"
+
+
+class MemberUpdate(BaseModel):
+    """Change a member's share of rotating chores; 0 while unavailable."""
+
+    capacity: float = Field(ge=0)
+
+
+class Member(BaseModel):
+    """Membership response schema."""
+
+    family_id: int
+    user_id: int
+    role: str
+    capacity: float
+
+    class Config:
+        from_attributes = True
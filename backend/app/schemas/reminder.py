@@ -0,0 +1,27 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ReminderCreate(BaseModel):
+    """Reminder for one occurrence of a task."""
+
+    task_id: int
+    occurrence_date: date
+    remind_at: datetime
+
+
+class ReminderUpdate(BaseModel):
+    """Move a reminder."""
+
+    remind_at: datetime
+
+
+class Reminder(ReminderCreate):
+    """Reminder response schema."""
+
+    id: int
+    dispatched_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
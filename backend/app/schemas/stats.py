@@ -0,0 +1,22 @@
+from datetime import date
+from pydantic import BaseModel
+from typing import List, Literal
+
+StatsRange = Literal["week", "month", "year"]
+
+
+class MemberStats(BaseModel):
+    """Tasks a member completed in the range, and their total effort."""
+
+    user_id: int
+    done: int
+    effort: int
+
+
+class FamilyStats(BaseModel):
+    """Completed tasks per member; members who completed none are left out."""
+
+    range: StatsRange
+    start: date
+    end: date
+    members: List[MemberStats]
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List
+from app.schemas.user import User
+
+
+class Tombstone(BaseModel):
+    """A deleted entity."""
+
+    seq: int
+    entity: str
+    entity_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class SyncPage(BaseModel):
+    """Entities changed and deleted after a sequence number, oldest first."""
+
+    users: List[User]
+    deleted: List[Tombstone]
+    # Pass as ``since`` to get the next page, or the next changes.
+    cursor: int
+    has_more: bool
@@ -0,0 +1,127 @@
+from datetime import date
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, List, Literal, Optional
+from app.schemas.user import User
+
+TaskStatus = Literal["todo", "in_progress", "done"]
+Repeat = Literal["daily", "weekly", "monthly"]
+
+
+class TaskBase(BaseModel):
+    """Base task schema."""
+
+    title: str
+    description: Optional[str] = None
+    due_date: date
+    assignee_id: Optional[int] = None
+    status: TaskStatus = "todo"
+    repeat: Optional[Repeat] = None
+    repeat_interval: int = Field(1, ge=1)
+    repeat_until: Optional[date] = None
+    rotate: bool = False
+    effort: int = Field(1, ge=1)
+    remind_before: Optional[int] = Field(None, ge=0)
+
+
+class TaskCreate(TaskBase):
+    """Task creation schema."""
+
+    pass
+
+
+class TaskUpdate(BaseModel):
+    """Task update schema."""
+
+    title: Optional[str] = None
+    description: Optional[str] = None
+    due_date: Optional[date] = None
+    assignee_id: Optional[int] = None
+    status: Optional[TaskStatus] = None
+    repeat: Optional[Repeat] = None
+    repeat_interval: Optional[int] = Field(None, ge=1)
+    repeat_until: Optional[date] = None
+    rotate: Optional[bool] = None
+    effort: Optional[int] = Field(None, ge=1)
+    remind_before: Optional[int] = Field(None, ge=0)
+
+    @field_validator("title", "due_date", "status", "repeat_interval", "rotate", "effort")
+    @classmethod
+    def validate_not_null(cls, v: Any) -> Any:
+        # Omit these to leave them unchanged; the task cannot be without them.
+        if v is None:
+            raise ValueError("May not be null")
+        return v
+
+
+class Task(TaskBase):
+    """Task response schema."""
+
+    id: int
+    family_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class BoardTask(Task):
+    """A task on the board, with the days it falls due in the range."""
+
+    occurs_on: List[date]
+
+
+class TaskExceptionCreate(BaseModel):
+    """Skip an occurrence of a recurring task, or move it to another day."""
+
+    occurrence_date: date
+    moved_to: Optional[date] = None
+
+
+class TaskException(TaskExceptionCreate):
+    """Task exception response schema."""
+
+    task_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class AssignmentCreate(BaseModel):
+    """Assignment of one occurrence of a rotating task."""
+
+    task_id: int
+    occurrence_date: date
+    user_id: int
+
+
+class AssignmentUpdate(BaseModel):
+    """Reassign an occurrence or mark it done."""
+
+    user_id: Optional[int] = None
+    done: Optional[bool] = None
+
+
+class Assignment(AssignmentCreate):
+    """Assignment response schema."""
+
+    family_id: int
+    effort: int
+    done: bool
+
+    class Config:
+        from_attributes = True
+
+
+class BoardMember(User):
+    """A family member and their tasks on the board."""
+
+    tasks: List[BoardTask]
+
+
+class Board(BaseModel):
+    """A family's members and tasks for a date range."""
+
+    family_id: int
+    start: date
+    end: date
+    members: List[BoardMember]
+    unassigned: List[BoardTask]
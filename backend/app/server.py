@@ -0,0 +1,259 @@
+"""
+Production server entry point.
+
+    python -m app.server
+
+Worker count, threadpool size, keep-alive, backlog and the event loop and
+HTTP implementations all come from ``Settings`` (``SERVER_*`` variables).
+With more than one worker, a supervisor keeps the pool at full strength and
+rolls the workers on SIGHUP. Background jobs run in the first worker only.
+"""
+import importlib.util
+import math
+import os
+import signal
+import sys
+import threading
+from multiprocessing.context import SpawnProcess
+from socket import socket
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional
+import uvicorn
+from uvicorn._subprocess import get_subprocess
+from app.core.config import Settings, settings
+
+APP_FACTORY = "app.main:create_app"
+# Read by each worker's Settings; the supervisor sets it per worker.
+JOBS_ENV = "BACKGROUND_JOBS_ENABLED"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPU quota imposed by the container, in CPUs, if any."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota == "max" or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup quotas."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        count = min(count, math.ceil(quota))
+    return max(1, count)
+
+
+def worker_count(app_settings: Settings) -> int:
+    """Configured worker count, or one worker per available CPU."""
+    if app_settings.server_workers > 0:
+        return app_settings.server_workers
+    return available_cpus()
+
+
+def resolve_loop(name: str) -> str:
+    """Pick uvloop whenever it is installed unless told otherwise."""
+    if name == "auto":
+        return "uvloop" if _installed("uvloop") else "asyncio"
+    if name == "uvloop" and not _installed("uvloop"):
+        raise RuntimeError("server_loop is 'uvloop' but uvloop is not installed")
+    return name
+
+
+def resolve_http(name: str) -> str:
+    """Pick httptools whenever it is installed unless told otherwise."""
+    if name == "auto":
+        return "httptools" if _installed("httptools") else "h11"
+    if name == "httptools" and not _installed("httptools"):
+        raise RuntimeError("server_http is 'httptools' but httptools is not installed")
+    return name
+
+
+def effective_config(app_settings: Settings) -> Dict[str, Any]:
+    """The configuration the server will actually run with."""
+    return {
+        "host": app_settings.server_host,
+        "port": app_settings.server_port,
+        "cpus": available_cpus(),
+        "workers": worker_count(app_settings),
+        "threadpool_size": app_settings.server_threadpool_size,
+        "keepalive": app_settings.server_keepalive,
+        "backlog": app_settings.server_backlog,
+        "loop": resolve_loop(app_settings.server_loop),
+        "http": resolve_http(app_settings.server_http),
+        "graceful_timeout": app_settings.server_graceful_timeout,
+    }
+
+
+def build_config(app_settings: Settings) -> uvicorn.Config:
+    """Uvicorn configuration for ``app_settings``."""
+    effective = effective_config(app_settings)
+    return uvicorn.Config(
+        APP_FACTORY,
+        factory=True,
+        host=effective["host"],
+        port=effective["port"],
+        workers=effective["workers"],
+        loop=effective["loop"],
+        http=effective["http"],
+        backlog=effective["backlog"],
+        timeout_keep_alive=effective["keepalive"],
+        timeout_graceful_shutdown=effective["graceful_timeout"],
+        proxy_headers=True,
+        # The app writes its own access log, off the request path.
+        access_log=not (app_settings.logging_enabled and app_settings.log_access),
+    )
+
+
+def print_config(effective: Dict[str, Any]) -> None:
+    """Print the effective configuration at boot."""
+    print("Effective server configuration:", flush=True)
+    for key, value in effective.items():
+        print(f"  {key:<17}{value}", flush=True)
+
+
+class Supervisor:
+    """Keep a pool of server processes running on one shared socket."""
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        graceful_timeout: float,
+        target: Optional[Callable[..., None]] = None,
+        jobs: bool = True,
+    ) -> None:
+        self.config = config
+        self.workers = workers
+        # Whether worker 0 runs the background jobs; the others never do.
+        self.jobs = jobs
+        self.graceful_timeout = graceful_timeout
+        self.target = target or uvicorn.Server(config).run
+        self.sockets: List[socket] = []
+        self.processes: List[SpawnProcess] = []
+        self.restarts = 0
+        self.should_exit = threading.Event()
+        self.should_reload = threading.Event()
+
+    def spawn(self, index: int) -> SpawnProcess:
+        """Start worker ``index``; spawned workers read their settings from the environment."""
+        previous = os.environ.get(JOBS_ENV)
+        os.environ[JOBS_ENV] = "true" if self.jobs and index == 0 else "false"
+        try:
+            process = get_subprocess(
+                config=self.config, target=self.target, sockets=self.sockets
+            )
+            process.start()
+        finally:
+            if previous is None:
+                del os.environ[JOBS_ENV]
+            else:
+                os.environ[JOBS_ENV] = previous
+        return process
+
+    def stop(self, processes: List[SpawnProcess]) -> None:
+        """Ask processes to finish in-flight requests, then force them."""
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(self.graceful_timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def check_workers(self) -> None:
+        """Replace workers that exited on their own."""
+        for index, process in enumerate(self.processes):
+            if not process.is_alive():
+                print(
+                    f"Worker {process.pid} exited with code {process.exitcode}, restarting",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                process.join()
+                self.processes[index] = self.spawn(index)
+                self.restarts += 1
+
+    def reload(self) -> None:
+        """Roll the pool one worker at a time so capacity never drops."""
+        for index, old in enumerate(list(self.processes)):
+            self.processes[index] = self.spawn(index)
+            self.stop([old])
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        self.should_exit.set()
+
+    def handle_reload(self, sig: int, frame: Optional[FrameType]) -> None:
+        self.should_reload.set()
+
+    def startup(self) -> None:
+        if not self.sockets:
+            self.sockets = [self.config.bind_socket()]
+        self.processes = [self.spawn(index) for index in range(self.workers)]
+
+    def shutdown(self) -> None:
+        self.stop(self.processes)
+        self.processes = []
+        for sock in self.sockets:
+            sock.close()
+
+    def run(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.handle_exit)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        self.startup()
+        try:
+            while not self.should_exit.wait(0.5):
+                if self.should_reload.is_set():
+                    self.should_reload.clear()
+                    self.reload()
+                self.check_workers()
+        finally:
+            self.shutdown()
+
+
+def reset_metrics_dir(directory: Optional[str]) -> None:
+    """Drop snapshots left by a previous run of the worker pool."""
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            os.unlink(os.path.join(directory, name))
+
+
+def main() -> None:
+    effective = effective_config(settings)
+    print_config(effective)
+    reset_metrics_dir(settings.metrics_multiprocess_dir)
+    config = build_config(settings)
+    if effective["workers"] > 1:
+        Supervisor(
+            config,
+            effective["workers"],
+            effective["graceful_timeout"],
+            jobs=settings.background_jobs_enabled,
+        ).run()
+    else:
+        uvicorn.Server(config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Synthetic data at production scale.
+
+    python -m app.tools.seed --families 100000 --max-members 6
+    python -m app.tools.seed --families 1000 --database-url sqlite:///./seed.db
+
+Generates families of 1 to ``--max-members`` users, each with a first
+name, the family's last name and a unique email, and their memberships
+(the first member owns the family). The data is a pure function of
+``--seed``, so runs with the same arguments produce the same families
+and users. It is added to whatever the database already holds: ids
+continue from the highest existing ones.
+
+Rows are written in chunks of about ``--batch-size`` users. On Postgres
+each chunk goes through ``COPY ... FROM STDIN``; on SQLite it is a
+multi-row ``executemany``. The whole load is one transaction. Secondary
+indexes of the loaded tables are dropped before it and rebuilt once
+afterwards, which is much cheaper than updating them row by row.
+bcrypt is what makes ``user_crud.create`` slow, so by default every user
+shares one precomputed hash of ``--password``; ``--no-reuse-hash`` hashes
+it per user.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import Connection, Table, func, insert, inspect, select, text
+from sqlalchemy.schema import CreateIndex, DropIndex
+from app.core.config import Settings, settings
+from app.core.security import get_password_hash
+from app.db.database import Base, create_db_engine
+from app.models.family import MEMBER, OWNER, Family, FamilyMember
+from app.models.sync import next_sequence
+from app.models.user import User
+
+FIRST_NAMES = (
+    "Ada", "Alex", "Amara", "Ben", "Carla", "Chen", "Dana", "Diego", "Elif", "Emma",
+    "Finn", "Grace", "Hana", "Ivan", "Jonas", "Kai", "Lea", "Liam", "Maya", "Mei",
+    "Nia", "Noah", "Omar", "Priya", "Rosa", "Sam", "Sofia", "Tariq", "Uma", "Yusuf",
+)
+LAST_NAMES = (
+    "Andersen", "Baker", "Costa", "Dubois", "Eriksson", "Fischer", "Garcia", "Haddad",
+    "Ito", "Jensen", "Kowalski", "Lopez", "Muller", "Nakamura", "Novak", "Okafor",
+    "Patel", "Rossi", "Schmidt", "Silva", "Tanaka", "Weber", "Wong", "Yilmaz",
+)
+DOMAIN = "seed.example.com"
+
+# Tables loaded, in foreign key order.
+TABLES: Tuple[Table, ...] = (
+    Family.__table__, User.__table__, FamilyMember.__table__,  # type: ignore[assignment]
+)
+
+Rows = Dict[Table, List[Dict[str, Any]]]
+
+
+def generate(
+    families: int,
+    max_members: int,
+    seed: int,
+    *,
+    first_family_id: int,
+    first_user_id: int,
+    password_hash: Callable[[], str],
+    batch_size: int,
+) -> Iterator[Rows]:
+    """Chunks of rows of about ``batch_size`` users, deterministic in ``seed``."""
+    rng = random.Random(seed)
+    family_table, user_table, member_table = TABLES
+    chunk: Rows = {table: [] for table in TABLES}
+    user_id = first_user_id
+    for family_id in range(first_family_id, first_family_id + families):
+        last_name = rng.choice(LAST_NAMES)
+        chunk[family_table].append({"id": family_id, "name": f"{last_name} family"})
+        for position in range(rng.randint(1, max_members)):
+            first_name = rng.choice(FIRST_NAMES)
+            chunk[user_table].append({
+                "id": user_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": f"{first_name}.{last_name}.{user_id}@{DOMAIN}".lower(),
+                "avatar_url": None,
+                "hashed_password": password_hash(),
+                "seq": 0,
+            })
+            chunk[member_table].append({
+                "family_id": family_id,
+                "user_id": user_id,
+                "role": OWNER if position == 0 else MEMBER,
+                "capacity": 1.0,
+            })
+            user_id += 1
+        if len(chunk[user_table]) >= batch_size:
+            yield chunk
+            chunk = {table: [] for table in TABLES}
+    if chunk[family_table]:
+        yield chunk
+
+
+def copy_rows(connection: Connection, table: Table, rows: Sequence[Dict[str, Any]]) -> None:
+    """Stream ``rows`` into ``table`` with Postgres ``COPY FROM STDIN``."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # In COPY's CSV format an unquoted empty field is NULL.
+    writer.writerows([["" if row[c] is None else row[c] for c in columns] for row in rows])
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(connection: Connection, table: Table, rows: Sequence[Dict[str, Any]]) -> None:
+    """Insert ``rows`` into ``table`` with one ``executemany``."""
+    connection.execute(insert(table), rows)
+
+
+def drop_indexes(connection: Connection) -> List[Any]:
+    """Drop the secondary indexes of the loaded tables; returns them for ``create``."""
+    dropped = []
+    for table in TABLES:
+        existing = {index["name"] for index in inspect(connection).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                connection.execute(DropIndex(index))
+                dropped.append(index)
+    return dropped
+
+
+def next_id(connection: Connection, table: Table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def load(
+    database_url: str,
+    *,
+    families: int,
+    max_members: int,
+    seed: int,
+    password: str,
+    reuse_hash: bool,
+    batch_size: int,
+) -> Dict[str, Any]:
+    """Generate and load the data; returns counts and timings."""
+    engine = create_db_engine(Settings(database_url=database_url))
+    Base.metadata.create_all(bind=engine)
+    postgres = engine.dialect.name == "postgresql"
+    write = copy_rows if postgres else insert_rows
+    shared = get_password_hash(password) if reuse_hash else None
+
+    def password_hash() -> str:
+        return shared or get_password_hash(password)
+
+    counts = {table.name: 0 for table in TABLES}
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        dropped = drop_indexes(connection)
+        family_table, user_table, _ = TABLES
+        chunks = generate(
+            families,
+            max_members,
+            seed,
+            first_family_id=next_id(connection, family_table),
+            first_user_id=next_id(connection, user_table),
+            password_hash=password_hash,
+            batch_size=batch_size,
+        )
+        for chunk in chunks:
+            users = chunk[user_table]
+            # Stamped like session inserts, so delta sync sees the new users.
+            for row, seq in zip(users, next_sequence(connection, len(users))):
+                row["seq"] = seq
+            for table in TABLES:
+                if chunk[table]:
+                    write(connection, table, chunk[table])
+                    counts[table.name] += len(chunk[table])
+        loaded = time.perf_counter()
+        for index in dropped:
+            connection.execute(CreateIndex(index))
+        if postgres:
+            # Explicit ids leave the serial sequences behind.
+            for table in (family_table, user_table):
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT max(id) FROM {table.name}))"
+                ))
+        connection.execute(text("ANALYZE"))
+    end = time.perf_counter()
+    engine.dispose()
+    return {
+        "method": "copy" if postgres else "executemany",
+        **counts,
+        "load_seconds": round(loaded - start, 3),
+        "index_seconds": round(end - loaded, 3),
+        "users_per_second": round(counts[user_table.name] / max(end - start, 1e-9)),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--families", type=int, default=1000)
+    parser.add_argument("--max-members", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="password")
+    parser.add_argument(
+        "--reuse-hash", action=argparse.BooleanOptionalAction, default=True,
+        help="share one precomputed bcrypt hash instead of hashing per user",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000, help="users per chunk")
+    args = parser.parse_args(argv)
+    if args.max_members < 1:
+        parser.error("--max-members must be at least 1")
+
+    result = load(
+        args.database_url,
+        families=args.families,
+        max_members=args.max_members,
+        seed=args.seed,
+        password=args.password,
+        reuse_hash=args.reuse_hash,
+        batch_size=args.batch_size,
+    )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Family board: latency and query count as the task table grows.
+
+For each ``--tasks`` size a family of ``--members`` members gets that many
+one-off tasks spread over a year plus ``--rules`` recurring tasks (daily,
+weekly and monthly in turn), and GET /families/{id}/board is timed for a
+one-month window. The first request expands every rule; the rest are
+served from the window cache. Exits non-zero if the number of SQL
+statements per request changes with the task count, or when compared to a
+baseline, if latency regressed past the threshold.
+
+    python -m benchmarks.board --tasks 1000 10000 --rules 300 --output board.json
+    python -m benchmarks.board --baseline board.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List
+import httpx
+from sqlalchemy import event, insert
+from app.core.config import Settings
+from app.core.recurrence import FREQUENCIES
+from app.core.security import create_access_token
+from app.db.database import create_db_engine
+from app.main import create_app
+from app.models.family import OWNER, Family, FamilyMember
+from app.models.task import Task
+from benchmarks.common import Results, bench_email, compare, percentiles, seed
+
+START = date(2024, 1, 1)
+WINDOW = {"from": "2024-06-01", "to": "2024-06-30"}
+
+
+def seed_family(database_url: str, user_ids: List[int], tasks: int, rules: int) -> int:
+    """A family with ``tasks`` one-off and ``rules`` recurring tasks; returns its id."""
+    engine = create_db_engine(Settings(database_url=database_url))
+    with engine.begin() as connection:
+        family_id = connection.execute(
+            insert(Family).values(name=f"Bench {tasks}").returning(Family.id)
+        ).scalar_one()
+        connection.execute(insert(FamilyMember), [
+            {"family_id": family_id, "user_id": user_id, "role": OWNER if i == 0 else "member"}
+            for i, user_id in enumerate(user_ids)
+        ])
+        connection.execute(insert(Task), [
+            {
+                "family_id": family_id,
+                "assignee_id": user_ids[i % len(user_ids)],
+                "title": f"Task {i}",
+                "due_date": START + timedelta(days=i % 365),
+                "status": "todo",
+            }
+            for i in range(tasks)
+        ])
+        # A separate executemany: its columns come from the first row.
+        connection.execute(insert(Task), [
+            {
+                "family_id": family_id,
+                "assignee_id": user_ids[i % len(user_ids)],
+                "title": f"Chore {i}",
+                "due_date": START + timedelta(days=i % 28),
+                "status": "todo",
+                "repeat": FREQUENCIES[i % len(FREQUENCIES)],
+                "repeat_interval": 1,
+            }
+            for i in range(rules)
+        ])
+    engine.dispose()
+    return family_id
+
+
+async def measure(
+    app_settings: Settings, family_id: int, owner_email: str, requests: int
+) -> Dict[str, Any]:
+    app = create_app(app_settings)
+    statements: List[int] = []
+    headers = {"Authorization": f"Bearer {create_access_token(subject=owner_email)}"}
+    url = f"/api/v1/families/{family_id}/board"
+    latencies = []
+    first = 0.0
+    async with app.router.lifespan_context(app):
+        engine = app.state.engine
+
+        def count(*_: Any) -> None:
+            statements[-1] += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for index in range(requests + 1):
+                statements.append(0)
+                start = perf_counter()
+                response = await client.get(url, params=WINDOW, headers=headers)
+                elapsed = (perf_counter() - start) * 1000
+                response.raise_for_status()
+                if index:
+                    latencies.append(elapsed)
+                else:  # expands every rule
+                    first = elapsed
+        event.remove(engine, "before_cursor_execute", count)
+
+    board = response.json()
+    return {
+        "tasks_in_window": sum(len(m["tasks"]) for m in board["members"]),
+        "occurrences": sum(len(t["occurs_on"]) for m in board["members"] for t in m["tasks"]),
+        "queries": max(statements[1:]),
+        "first_ms": round(first, 3),
+        **{key: round(value, 3) for key, value in percentiles(latencies).items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--members", type=int, default=6)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/board.db"
+        ids = seed(database_url, args.members)
+        user_ids = [ids[bench_email(i)] for i in range(args.members)]
+        app_settings = Settings(database_url=database_url, throttle_enabled=False)
+        for tasks in args.tasks:
+            family_id = seed_family(database_url, user_ids, tasks, args.rules)
+            results[str(tasks)] = asyncio.run(
+                measure(app_settings, family_id, bench_email(0), args.requests)
+            )
+
+    constant = len({result["queries"] for result in results.values()}) == 1
+    report = {
+        "benchmark": "board",
+        "database": database_url.split(":", 1)[0],
+        "members": args.members,
+        "rules": args.rules,
+        "window": WINDOW,
+        "unit": "ms",
+        "constant_query_count": constant,
+        "metrics": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    status = 0 if constant else 1
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(results, baseline, args.threshold, keys=("p50", "p95"))
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
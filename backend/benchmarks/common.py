@@ -0,0 +1,88 @@
+"""Helpers shared by the benchmarks: seeding, percentiles and baselines."""
+import statistics
+from typing import Collection, Dict, List, Sequence
+from sqlalchemy import delete, insert, select
+from app.core.config import Settings
+from app.core.security import get_password_hash
+from app.db.database import Base, create_db_engine
+from app.models.user import User
+
+BENCH_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "benchmark"
+
+Results = Dict[str, Dict[str, float]]
+
+
+def bench_email(index: int) -> str:
+    return f"user{index}@{BENCH_DOMAIN}"
+
+
+def seed(database_url: str, users: int) -> Dict[str, int]:
+    """
+    Replace the benchmark users in ``database_url`` with ``users`` fresh ones.
+
+    Returns their ids by email.
+    """
+    engine = create_db_engine(Settings(database_url=database_url))
+    Base.metadata.create_all(bind=engine)
+    # Every user shares one hash; bcrypt per row would dominate seeding.
+    hashed = get_password_hash(BENCH_PASSWORD)
+    with engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like(f"%@{BENCH_DOMAIN}")))
+        connection.execute(insert(User), [
+            {
+                "first_name": f"User{i}",
+                "last_name": "Bench",
+                "email": bench_email(i),
+                "hashed_password": hashed,
+            }
+            for i in range(users)
+        ])
+        rows = connection.execute(
+            select(User.email, User.id).where(User.email.like(f"%@{BENCH_DOMAIN}"))
+        )
+        ids = {email: id for email, id in rows}
+    engine.dispose()
+    return ids
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max of ``samples``."""
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value, "mean": value, "max": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+def compare(
+    current: Results,
+    baseline: Results,
+    threshold: float,
+    keys: Collection[str] = ("median",),
+    higher_is_better: Collection[str] = (),
+    unit: str = "ms",
+) -> List[str]:
+    """Values that regressed by more than ``threshold`` against ``baseline``."""
+    regressions = []
+    for metric, values in current.items():
+        for key in keys:
+            if key not in values or key not in baseline.get(metric, {}):
+                continue
+            before, after = baseline[metric][key], values[key]
+            if before <= 0:
+                continue
+            change = (after - before) / before
+            if key in higher_is_better:
+                change = -change
+            if change > threshold:
+                label = metric if len(keys) == 1 else f"{metric}.{key}"
+                regressions.append(f"{label}: {before:.1f}{unit} -> {after:.1f}{unit}")
+    return regressions
+
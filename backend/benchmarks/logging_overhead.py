@@ -0,0 +1,125 @@
+"""
+Throughput of GET /api/v1/users/ with logging on and off.
+
+Two apps on one database, one with the logging pipeline (request ids and
+an access record per request, queued and written to a file by the
+writer thread) and one without, are driven by ``--concurrency``
+clients for ``--duration`` seconds per round, in alternating rounds.
+Reports the median requests per second of each and the relative drop;
+exits non-zero when the drop exceeds ``--threshold``. The default, 15%,
+sits above the cost of an access record for every request to a cheap
+endpoint (about 10% on SQLite here, most of it building and formatting
+the record) plus round-to-round noise.
+
+    python -m benchmarks.logging_overhead --rounds 10 --duration 2
+    python -m benchmarks.logging_overhead --log-sql
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import tempfile
+from contextlib import redirect_stderr
+from pathlib import Path
+from time import perf_counter
+from typing import List
+import httpx
+from fastapi import FastAPI
+from app.core.config import Settings
+from app.main import create_app
+from benchmarks.common import seed
+
+URL = "/api/v1/users/"
+
+
+async def run_round(client: httpx.AsyncClient, concurrency: int, duration: float) -> float:
+    """Requests per second of ``concurrency`` clients over ``duration`` seconds."""
+    deadline = perf_counter() + duration
+    count = 0
+
+    async def worker() -> None:
+        nonlocal count
+        while perf_counter() < deadline:
+            response = await client.get(URL, params={"limit": 20})
+            response.raise_for_status()
+            count += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return count / (perf_counter() - start)
+
+
+async def measure(apps: List[FastAPI], args: argparse.Namespace) -> List[List[float]]:
+    results: List[List[float]] = [[] for _ in apps]
+    async with apps[0].router.lifespan_context(apps[0]), \
+            apps[1].router.lifespan_context(apps[1]):
+        clients = [
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+            for app in apps
+        ]
+        for client in clients:
+            await run_round(client, args.concurrency, 0.5)  # warm-up
+        for index in range(args.rounds):
+            # Alternate the order so neither app always runs first.
+            order = [0, 1] if index % 2 == 0 else [1, 0]
+            for which in order:
+                results[which].append(
+                    await run_round(clients[which], args.concurrency, args.duration)
+                )
+        for client in clients:
+            await client.aclose()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--log-sql", action="store_true", help="also log every statement")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    # The client logs every request at INFO; only the server's records count.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/logging.db"
+        seed(database_url, args.users)
+        apps = [
+            create_app(Settings(
+                database_url=database_url,
+                logging_enabled=enabled,
+                log_sql=args.log_sql,
+                throttle_enabled=False,
+                concurrency_limit_enabled=False,
+            ))
+            for enabled in (False, True)
+        ]
+        log_path = Path(tmp) / "app.log"
+        # The writer writes to the stderr of the time the app started.
+        with open(log_path, "w") as log_file, redirect_stderr(log_file):
+            off, on = asyncio.run(measure(apps, args))
+        lines = sum(1 for _ in open(log_path))
+
+    rps_off = statistics.median(off)
+    rps_on = statistics.median(on)
+    drop = (rps_off - rps_on) / rps_off
+    print(json.dumps({
+        "benchmark": "logging_overhead",
+        "url": URL,
+        "concurrency": args.concurrency,
+        "log_sql": args.log_sql,
+        "rps_without_logging": round(rps_off, 1),
+        "rps_with_logging": round(rps_on, 1),
+        "throughput_drop": round(drop, 4),
+        "log_lines": lines,
+        "threshold": args.threshold,
+    }, indent=2))
+    return 1 if drop > args.threshold else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
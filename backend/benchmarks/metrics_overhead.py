@@ -0,0 +1,130 @@
+"""
+Overhead of the metrics instrumentation on GET /api/v1/users/.
+
+The instrumentation cost per request (middleware plus the pool checkout
+timer) is measured in isolation against a no-op ASGI app, then divided by
+the median latency of the route. End-to-end medians of an app with and
+without metrics, driven in alternating rounds on the same database, are
+reported alongside; run-to-run noise of that comparison is usually larger
+than the effect itself, so it is informational. Exits non-zero when the
+isolated overhead exceeds the threshold (2% by default).
+
+    python -m benchmarks.metrics_overhead --rounds 30 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+from time import perf_counter
+from typing import List
+import httpx
+from fastapi import FastAPI
+from app.core import metrics
+from app.core.config import Settings
+from app.main import create_app
+from benchmarks.common import seed
+
+URL = "/api/v1/users/"
+
+
+async def _noop_app(scope: dict, receive: object, send: object) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})  # type: ignore[operator]
+    await send({"type": "http.response.body", "body": b""})  # type: ignore[operator]
+
+
+async def instrumentation_cost(iterations: int) -> float:
+    """Per-request cost of the metrics instrumentation, in milliseconds."""
+    wrapped = metrics.MetricsMiddleware(_noop_app)
+    scope = {"type": "http", "method": "GET", "path": URL}
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: dict) -> None:
+        pass
+
+    async def loop(app: object) -> float:
+        start = perf_counter()
+        for _ in range(iterations):
+            await app(dict(scope), receive, send)  # type: ignore[operator]
+            if app is wrapped:
+                # The pool checkout timer also runs once per request.
+                metrics.DB_POOL_CHECKOUT_WAIT.observe(perf_counter() - start)
+        return (perf_counter() - start) * 1000 / iterations
+
+    bare = min([await loop(_noop_app) for _ in range(5)])
+    instrumented = min([await loop(wrapped) for _ in range(5)])
+    return max(instrumented - bare, 0.0)
+
+
+async def run_round(client: httpx.AsyncClient, requests: int) -> float:
+    """Mean latency of ``requests`` sequential calls, in milliseconds."""
+    start = perf_counter()
+    for _ in range(requests):
+        response = await client.get(URL)
+        response.raise_for_status()
+    return (perf_counter() - start) * 1000 / requests
+
+
+async def measure(apps: List[FastAPI], rounds: int, requests: int) -> List[List[float]]:
+    results: List[List[float]] = [[] for _ in apps]
+    async with apps[0].router.lifespan_context(apps[0]), \
+            apps[1].router.lifespan_context(apps[1]):
+        clients = [
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+            for app in apps
+        ]
+        for client in clients:
+            await run_round(client, requests)  # warm-up
+        for index in range(rounds):
+            # Alternate the order so neither app always runs first.
+            order = [0, 1] if index % 2 == 0 else [1, 0]
+            for which in order:
+                results[which].append(await run_round(clients[which], requests))
+        for client in clients:
+            await client.aclose()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Metrics middleware overhead")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--threshold", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/metrics.db"
+        seed(database_url, args.users)
+        apps = [
+            create_app(Settings(database_url=database_url, metrics_enabled=enabled))
+            for enabled in (False, True)
+        ]
+        # Measure in both positions to cancel out any ordering bias.
+        baseline, instrumented = asyncio.run(measure(apps, args.rounds, args.requests))
+        swapped = asyncio.run(measure(apps[::-1], args.rounds, args.requests))
+        instrumented += swapped[0]
+        baseline += swapped[1]
+    cost = asyncio.run(instrumentation_cost(20000))
+
+    off = statistics.median(baseline)
+    on = statistics.median(instrumented)
+    overhead = cost / off
+    print(json.dumps({
+        "benchmark": "metrics_overhead",
+        "url": URL,
+        "median_ms_without_metrics": round(off, 4),
+        "median_ms_with_metrics": round(on, 4),
+        "end_to_end_difference": round((on - off) / off, 4),
+        "instrumentation_ms_per_request": round(cost, 5),
+        "overhead": round(overhead, 5),
+        "threshold": args.threshold,
+    }, indent=2))
+    return 1 if overhead > args.threshold else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Micro-benchmarks of the hot paths behind the API.
+
+Each case is timed with ``timeit``: the loop count is picked so one batch
+takes at least 0.2s, and the median and best time per call over
+``--repeat`` batches are reported in microseconds. Database cases open a
+fresh session per call, like a request does.
+
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --baseline micro.json --threshold 0.2
+    python -m benchmarks.micro --database-url postgresql://... --only get_by_email
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+from app.core import audit
+from app.core.config import Settings
+from app.core.security import create_access_token, get_password_hash, verify_token
+from app.crud.user import user_crud
+from app.db.database import create_db_engine
+from app.schemas.user import User
+from benchmarks.common import BENCH_PASSWORD, bench_email, compare, seed
+
+Case = Tuple[str, Callable[[], object]]
+
+
+def build_cases(database_url: str, users: int) -> Tuple[List[Case], Callable[[], None]]:
+    """Benchmark cases and a function releasing their resources."""
+    engine = create_db_engine(Settings(database_url=database_url))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    email = bench_email(users // 2)
+    token = create_access_token(subject=email)
+    users_adapter = TypeAdapter(List[User])
+    with session_factory() as db:
+        page = user_crud.get_multi(db, limit=100)
+        db.expunge_all()
+    # Running as in the server, so updates pay for queueing their audit entries.
+    audit_log = audit.AuditLog(
+        engine, queue_size=100_000, batch_size=500, interval=1.0,
+        spill_path=str(Path(tempfile.gettempdir()) / "micro-audit-spill.jsonl"),
+    )
+    audit_log.start()
+    names = iter(range(10**9))
+
+    def get_by_email() -> object:
+        with session_factory() as db:
+            return user_crud.get_by_email(db, email=email)
+
+    def get_multi() -> object:
+        with session_factory() as db:
+            return user_crud.get_multi(db, limit=100)
+
+    def update_user() -> object:
+        with session_factory() as db:
+            user = user_crud.get_by_email(db, email=email)
+            assert user is not None
+            return user_crud.update(db, db_obj=user, obj_in={"first_name": f"Bench{next(names)}"})
+
+    def dispose() -> None:
+        audit_log.stop()
+        engine.dispose()
+
+    def serialize_users() -> object:
+        # What FastAPI does with a List[User] response_model.
+        return users_adapter.dump_json(users_adapter.validate_python(page, from_attributes=True))
+
+    cases: List[Case] = [
+        ("create_access_token", lambda: create_access_token(subject=email)),
+        ("verify_token", lambda: verify_token(token)),
+        ("get_password_hash", lambda: get_password_hash(BENCH_PASSWORD)),
+        ("get_by_email", get_by_email),
+        ("get_multi_100", get_multi),
+        ("serialize_users_100", serialize_users),
+        ("update_user", update_user),
+    ]
+    return cases, dispose
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Median and best microseconds per call."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_call = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+    return {
+        "median": round(statistics.median(per_call), 3),
+        "min": round(min(per_call), 3),
+        "loops": number,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", help="run only this case (repeatable)")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/micro.db"
+        seed(database_url, args.users)
+        cases, dispose = build_cases(database_url, args.users)
+        try:
+            results = {
+                name: measure(func, args.repeat)
+                for name, func in cases
+                if not args.only or name in args.only
+            }
+        finally:
+            dispose()
+
+    report = {
+        "benchmark": "micro",
+        "database": database_url.split(":", 1)[0],
+        "users": args.users,
+        "unit": "us",
+        "metrics": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(results, baseline, args.threshold, unit="us")
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Read-only list pages: ORM objects against Core rows.
+
+The users table holds as many users as the largest of ``--pages``, and a
+page of each size is read both ways, in a fresh session per call:
+
+* ``fetch_<mode>_<n>``: ``user_crud.get_multi`` (``orm``) or
+  ``user_crud.get_multi_rows`` (``rows``).
+* ``response_<mode>_<n>``: the fetch plus serialization, by the
+  ``List[User]`` response model (``orm``) or ``RowsResponse`` (``rows``),
+  as ``GET /api/v1/users/`` does.
+
+Each reports the median and best microseconds per call, like ``micro``,
+and ``peak_kib``, the peak memory allocated during one call.
+
+    python -m benchmarks.readonly --pages 100 10000 --output readonly.json
+    python -m benchmarks.readonly --baseline readonly.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from sqlalchemy.orm import sessionmaker
+from app.core.config import Settings
+from app.core.responses import RowsResponse
+from app.crud.user import user_crud
+from app.db.database import create_db_engine
+from app.models.user import User as UserModel
+from app.schemas.user import User
+from benchmarks.common import compare, seed
+from benchmarks.micro import measure
+
+
+def peak_kib(func: Callable[[], object]) -> float:
+    """Peak KiB allocated while ``func`` runs, its result included."""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return round(peak / 1024, 1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    users_adapter = TypeAdapter(List[User])
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/readonly.db"
+        seed(database_url, max(args.pages))
+        engine = create_db_engine(Settings(database_url=database_url))
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        for size in args.pages:
+
+            def fetch_orm(size: int = size) -> List[UserModel]:
+                with session_factory() as db:
+                    return user_crud.get_multi(db, limit=size)
+
+            def fetch_rows(size: int = size) -> Sequence[Row[Any]]:
+                with session_factory() as db:
+                    return user_crud.get_multi_rows(db, limit=size)
+
+            def response_orm(fetch: Callable[[], List[UserModel]] = fetch_orm) -> bytes:
+                page = users_adapter.validate_python(fetch(), from_attributes=True)
+                return users_adapter.dump_json(page)
+
+            def response_rows(fetch: Callable[[], Sequence[Row[Any]]] = fetch_rows) -> bytes:
+                return RowsResponse(fetch(), User).body
+
+            cases: Dict[str, Callable[[], object]] = {
+                "fetch_orm": fetch_orm,
+                "fetch_rows": fetch_rows,
+                "response_orm": response_orm,
+                "response_rows": response_rows,
+            }
+            for name, func in cases.items():
+                results[f"{name}_{size}"] = {
+                    **measure(func, args.repeat),
+                    "peak_kib": peak_kib(func),
+                }
+        engine.dispose()
+
+    report = {
+        "benchmark": "readonly",
+        "database": database_url.split(":", 1)[0],
+        "pages": args.pages,
+        "unit": "us",
+        "metrics": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(
+            results, baseline, args.threshold, keys=("median", "peak_kib"), unit=""
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
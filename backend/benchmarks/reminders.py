@@ -0,0 +1,139 @@
+"""
+Reminder dispatch: timing wheel operations and the window query.
+
+For each of ``--sizes`` the wheel holds that many reminders spread over
+``--days`` days and the database that many pending reminders plus as many
+dispatched ones. Reported in microseconds per call, like ``micro``:
+
+* ``reschedule_<n>``: cancel and schedule one reminder; flat in ``n``.
+* ``advance_<n>``: one tick of a wheel, cascades included.
+* ``window_<n>``: ``reminder_crud.get_pending`` for one ``--window``.
+
+    python -m benchmarks.reminders --sizes 1000 100000 --output reminders.json
+    python -m benchmarks.reminders --baseline reminders.json --threshold 0.2
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.config import Settings
+from app.core.reminders import TimingWheel
+from app.crud.reminder import reminder_crud
+from app.db.database import Base, create_db_engine
+from app.models.family import Family
+from app.models.reminder import Reminder
+from app.models.task import Task
+from benchmarks.common import compare
+from benchmarks.micro import measure
+
+START = datetime(2024, 1, 1)
+
+
+def seed_reminders(database_url: str, count: int, seconds: int, rng: random.Random) -> None:
+    """``count`` pending and ``count`` dispatched reminders over ``seconds``."""
+    engine = create_db_engine(Settings(database_url=database_url))
+    with engine.begin() as connection:
+        connection.execute(delete(Reminder))
+        family_id = connection.execute(
+            insert(Family).values(name="Reminder bench").returning(Family.id)
+        ).scalar_one()
+        task_id = connection.execute(insert(Task).values(
+            family_id=family_id, title="Reminded", due_date=date(2024, 1, 1), status="todo",
+        ).returning(Task.id)).scalar_one()
+        for dispatched in (False, True):
+            offset = count if dispatched else 0
+            connection.execute(insert(Reminder), [
+                {
+                    "task_id": task_id,
+                    # Unique per row; only the time matters here.
+                    "occurrence_date": date(2024, 1, 1) + timedelta(days=offset + i),
+                    "remind_at": START + timedelta(seconds=rng.randrange(seconds)),
+                    "dispatched_at": START if dispatched else None,
+                }
+                for i in range(count)
+            ])
+    engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--window", type=float, default=300.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seconds = args.days * 86400
+    start = START.timestamp()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/reminders.db"
+        engine = create_db_engine(Settings(database_url=database_url))
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        for size in args.sizes:
+            wheel: TimingWheel[int] = TimingWheel(1.0, start)
+            for key in range(size):
+                wheel.schedule(key, start + rng.randrange(seconds))
+
+            def reschedule() -> None:
+                key = rng.randrange(size)
+                wheel.cancel(key)
+                wheel.schedule(key, start + rng.randrange(seconds))
+
+            ticking: TimingWheel[int] = TimingWheel(1.0, start)
+            for key in range(size):
+                ticking.schedule(key, start + seconds + rng.randrange(seconds))
+            clock = [start]
+
+            def advance() -> None:
+                clock[0] += 1.0
+                ticking.advance(clock[0])
+
+            results[f"reschedule_{size}"] = measure(reschedule, args.repeat)
+            results[f"advance_{size}"] = measure(advance, args.repeat)
+
+            seed_reminders(database_url, size, seconds, rng)
+            window = timedelta(seconds=args.window)
+
+            def load() -> object:
+                since = START + timedelta(seconds=rng.randrange(seconds))
+                with session_factory() as db:
+                    return reminder_crud.get_pending(db, since=since, until=since + window)
+
+            results[f"window_{size}"] = measure(load, args.repeat)
+        engine.dispose()
+
+    report = {
+        "benchmark": "reminders",
+        "database": database_url.split(":", 1)[0],
+        "sizes": args.sizes,
+        "unit": "us",
+        "metrics": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(results, baseline, args.threshold, unit="us")
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Chore rotation: planning cost and fairness.
+
+A family of ``--members`` members with random capacities gets enough daily
+rotating chores of random effort for ``--occurrences`` occurrences over
+``--days`` days. Reported in microseconds per call, like ``micro``:
+
+* ``plan``: the heap greedy over every occurrence, from scratch.
+* ``schedule_full``: ``assignment_crud.schedule`` with nothing assigned yet.
+* ``schedule_one``: the same after releasing a single assignment, which
+  is all that gets reassigned.
+
+``spread`` is the gap between the most and least loaded member per unit
+of capacity after a full plan.
+
+    python -m benchmarks.rotation --members 50 --occurrences 5000 --output rotation.json
+    python -m benchmarks.rotation --baseline rotation.json --threshold 0.2
+"""
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.core.config import Settings
+from app.core.rotation import LoadBalancer
+from app.crud.assignment import assignment_crud
+from app.db.database import create_db_engine
+from app.models.family import OWNER, Family, FamilyMember
+from app.models.task import Task, TaskAssignment
+from benchmarks.common import bench_email, compare, seed
+from benchmarks.micro import measure
+
+START = date(2024, 1, 1)
+
+
+def seed_family(
+    database_url: str, capacities: Dict[int, float], chores: int, rng: random.Random
+) -> int:
+    """A family with ``chores`` daily rotating tasks; returns its id."""
+    engine = create_db_engine(Settings(database_url=database_url))
+    with engine.begin() as connection:
+        family_id = connection.execute(
+            insert(Family).values(name="Rotation bench").returning(Family.id)
+        ).scalar_one()
+        connection.execute(insert(FamilyMember), [
+            {
+                "family_id": family_id,
+                "user_id": user_id,
+                "role": OWNER if i == 0 else "member",
+                "capacity": capacity,
+            }
+            for i, (user_id, capacity) in enumerate(capacities.items())
+        ])
+        connection.execute(insert(Task), [
+            {
+                "family_id": family_id,
+                "title": f"Chore {i}",
+                "due_date": START,
+                "status": "todo",
+                "repeat": "daily",
+                "repeat_interval": 1,
+                "rotate": True,
+                "effort": rng.choice((1, 1, 2, 3, 5)),
+            }
+            for i in range(chores)
+        ])
+    engine.dispose()
+    return family_id
+
+
+def time_calls(
+    func: Callable[[], object], setup: Callable[[], object], repeat: int
+) -> Dict[str, float]:
+    """Median and best microseconds of ``func``, with ``setup`` run untimed before each call."""
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = perf_counter()
+        func()
+        samples.append((perf_counter() - start) * 1e6)
+    return {"median": round(statistics.median(samples), 3), "min": round(min(samples), 3)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--occurrences", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    chores = math.ceil(args.occurrences / args.days)
+    end = START + timedelta(days=args.days - 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/rotation.db"
+        ids = seed(database_url, args.members)
+        capacities = {
+            ids[bench_email(i)]: rng.choice((0.5, 1.0, 1.0, 1.5, 2.0))
+            for i in range(args.members)
+        }
+        family_id = seed_family(database_url, capacities, chores, rng)
+
+        items: List[Tuple[Tuple[int, int], float]] = [
+            ((day, chore), rng.choice((1, 1, 2, 3, 5)))
+            for day in range(args.days) for chore in range(chores)
+        ]
+        planned = LoadBalancer(capacities)
+        planned.plan(items)
+        normalized = [
+            planned.loads[user_id] / capacity for user_id, capacity in capacities.items()
+        ]
+        planned_spread = max(normalized) - min(normalized)
+
+        results = {
+            "plan": measure(lambda: LoadBalancer(capacities).plan(items), args.repeat),
+        }
+
+        engine = create_db_engine(Settings(database_url=database_url))
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def schedule() -> object:
+            with session_factory() as db:
+                return assignment_crud.schedule(
+                    db, family_id=family_id, start=START, end=end, since=START
+                )
+
+        def clear_all() -> None:
+            with engine.begin() as connection:
+                connection.execute(delete(TaskAssignment))
+
+        def clear_one() -> None:
+            with engine.begin() as connection:
+                row = connection.execute(select(TaskAssignment.task_id).limit(1)).first()
+                if row is not None:
+                    connection.execute(delete(TaskAssignment).where(
+                        TaskAssignment.task_id == row.task_id,
+                        TaskAssignment.occurrence_date == end,
+                    ))
+
+        results["schedule_full"] = time_calls(schedule, clear_all, args.repeat)
+        results["schedule_one"] = time_calls(schedule, clear_one, args.repeat)
+        engine.dispose()
+
+    report = {
+        "benchmark": "rotation",
+        "database": database_url.split(":", 1)[0],
+        "members": args.members,
+        "occurrences": len(items),
+        "spread": round(planned_spread, 3),
+        "unit": "us",
+        "metrics": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(results, baseline, args.threshold, unit="us")
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
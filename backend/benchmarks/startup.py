@@ -0,0 +1,110 @@
+"""
+Startup-time benchmark: import time and time to first request.
+
+Each run starts a fresh interpreter, so module caches never hide a slow
+import. Run from the backend directory:
+
+    python -m benchmarks.startup --runs 10 --output startup.json
+    python -m benchmarks.startup --baseline startup.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from benchmarks.common import compare
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import asyncio, json, time
+import httpx  # client library, not part of the app's own import cost
+
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+
+
+async def first_request():
+    application = app.main.app
+    async with application.router.lifespan_context(application):
+        t2 = time.perf_counter()
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+        t3 = time.perf_counter()
+    return t2, t3
+
+
+t2, t3 = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "ready_ms": (t3 - t0) * 1000,
+}))
+"""
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, float]:
+    """Measure one cold start in a fresh interpreter."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    sample: Dict[str, float] = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (time.perf_counter() - start) * 1000
+    return sample
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Median and best value of every metric."""
+    return {
+        metric: {
+            "median": round(statistics.median(s[metric] for s in samples), 3),
+            "min": round(min(s[metric] for s in samples), 3),
+        }
+        for metric in samples[0]
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/startup.db")
+        samples = [run_once(env) for _ in range(args.runs)]
+    summary = summarize(samples)
+    report = {"benchmark": "startup", "runs": args.runs, "metrics": summary}
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+        regressions = compare(summary, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterator, List, Tuple
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.main import app
-from app.db.database import get_db, Base
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import Settings
+from app.core.security import create_access_token
+from app.crud.family import family_crud
+from app.crud.user import user_crud
+from app.main import app as default_app, create_app
+from app.db.database import Base
+from app.models.user import User
+from app.schemas.family import FamilyCreate
+from app.schemas.user import UserCreate
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -13,21 +22,33 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The types of the make_user, auth_headers and make_family fixtures.
+MakeUser = Callable[[str], User]
+AuthHeaders = Callable[[User], dict]
+MakeFamily = Callable[..., int]
+# What the statements fixture records: each statement with its parameters.
+Statements = List[Tuple[str, Any]]
+RecordStatements = Callable[[Engine], ContextManager[Statements]]
+
+# An isolated app whose lifespan builds its own engine on the test database.
+# No reminder dispatcher or audit writer: their statements would show up in
+# query counts.
+app = create_app(Settings(
+    database_url=SQLALCHEMY_DATABASE_URL, reminders_enabled=False, audit_enabled=False
+))
 
-def override_get_db():
-    """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+
+@pytest.fixture(autouse=True)
+def reset_throttle():
+    """Start every test with fresh login throttle state."""
+    for application in (app, default_app):
+        application.state.throttle.reset()
 
 
 @pytest.fixture
 def client():
     """Create test client."""
     Base.metadata.create_all(bind=engine)
-    app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     Base.metadata.drop_all(bind=engine)
@@ -43,3 +64,61 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def make_user(db: Session) -> MakeUser:
+    """Create users named ``name`` with the email ``<name>@example.com``."""
+    def make(name: str) -> User:
+        return user_crud.create(db, obj_in=UserCreate(
+            first_name=name,
+            last_name="Family",
+            email=f"{name.lower()}@example.com",
+            password="testpassword123",
+        ))
+    return make
+
+
+@pytest.fixture
+def auth_headers() -> AuthHeaders:
+    """Build the bearer token headers of a user."""
+    def headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(subject=user.email)}"}
+    return headers
+
+
+@pytest.fixture
+def make_family(db: Session) -> MakeFamily:
+    """Create families owned by ``owner`` with ``members`` more members; returns the id."""
+    def make(owner: User, members: int = 0) -> int:
+        family = family_crud.create_with_owner(
+            db, obj_in=FamilyCreate(name="Board"), owner_id=owner.id
+        )
+        for i in range(members):
+            user = User(
+                first_name=f"Member{i}", last_name="Board",
+                email=f"member{family.id}-{i}@example.com", hashed_password="not-a-real-hash",
+            )
+            db.add(user)
+            db.flush()
+            family_crud.add_member(db, family_id=family.id, user_id=user.id)
+        return family.id
+    return make
+
+
+@pytest.fixture
+def statements() -> RecordStatements:
+    """Record the statements an engine executes inside a ``with`` block."""
+    @contextmanager
+    def record(target: Engine) -> Iterator[Statements]:
+        executed: Statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            executed.append((statement, parameters))
+
+        event.listen(target, "before_cursor_execute", listener)
+        try:
+            yield executed
+        finally:
+            event.remove(target, "before_cursor_execute", listener)
+    return record
@@ -0,0 +1,109 @@
+from pathlib import Path
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from app.core import audit
+from app.core.config import Settings
+from app.main import create_app
+from app.models.audit import AuditEntry
+from tests.conftest import (
+    SQLALCHEMY_DATABASE_URL, AuthHeaders, MakeUser, RecordStatements, engine,
+)
+
+
+def test_user_changes_are_audited_in_one_batch(
+    db: Session, tmp_path: Path, make_user: MakeUser, auth_headers: AuthHeaders,
+    statements: RecordStatements,
+) -> None:
+    """Test field diffs, redaction and the actor, written by a single INSERT."""
+    admin = make_user("Audra")
+    app = create_app(Settings(
+        database_url=SQLALCHEMY_DATABASE_URL,
+        reminders_enabled=False,
+        audit_flush_interval=60.0,
+        audit_spill_path=str(tmp_path / "spill.jsonl"),
+    ))
+    with TestClient(app) as client:
+        with statements(app.state.engine) as executed:
+            response = client.post("/api/v1/users/", json={
+                "first_name": "Old", "last_name": "Name",
+                "email": "old@example.com", "password": "testpassword123",
+            })
+            user_id = response.json()["id"]
+            client.put(f"/api/v1/users/{user_id}", json={
+                "first_name": "New", "password": "newpassword123",
+            }, headers=auth_headers(admin))
+            client.put(f"/api/v1/users/{user_id}", json={"first_name": "New"})
+            assert app.state.audit.flush(timeout=5)
+        assert sum("INSERT INTO audit_entries" in s for s, _ in executed) == 1
+
+        history = client.get("/api/v1/audit/", params={
+            "entity": "user", "entity_id": user_id,
+        }, headers=auth_headers(admin)).json()
+    assert [(e["action"], e["actor"]) for e in history] == [
+        ("update", admin.email), ("create", None),
+    ]
+    assert history[0]["changes"] == {
+        "first_name": ["Old", "New"], "hashed_password": ["***", "***"],
+    }
+    assert history[1]["changes"]["email"] == [None, "old@example.com"]
+
+
+def test_batch_changes_are_audited_only_if_committed(
+    db: Session, tmp_path: Path, make_user: MakeUser
+) -> None:
+    """Test that a rolled back transactional batch leaves no audit entries."""
+    user = make_user("Bart")
+    app = create_app(Settings(
+        database_url=SQLALCHEMY_DATABASE_URL,
+        reminders_enabled=False,
+        audit_flush_interval=60.0,
+        audit_spill_path=str(tmp_path / "spill.jsonl"),
+    ))
+
+    def batch(name: str, then: str) -> bool:
+        response = client.post("/api/v1/batch", json={"transaction": True, "requests": [
+            {"id": "rename", "method": "PUT", "url": f"/users/{user.id}",
+             "body": {"first_name": name}},
+            {"id": "then", "url": then},
+        ]})
+        return response.json()["committed"]
+
+    with TestClient(app) as client:
+        assert not batch("Rolled", "/users/999999")
+        assert batch("Kept", f"/users/{user.id}")
+        assert app.state.audit.flush(timeout=5)
+    changes = db.execute(
+        select(AuditEntry.changes).where(AuditEntry.action == "update")
+    ).scalars().all()
+    assert changes == [{"first_name": ["Bart", "Kept"]}]
+
+
+def test_audit_spills_while_the_database_is_down(db: Session, tmp_path: Path) -> None:
+    """Test that failed batches go to the spill file and are replayed later."""
+    spill = tmp_path / "spill.jsonl"
+    down = create_engine(f"sqlite:///{tmp_path}/missing/audit.db")
+    log = audit.AuditLog(down, queue_size=10, batch_size=10, interval=60.0, spill_path=str(spill))
+    log.start()
+    for i in range(3):
+        audit.record("user", i, "update", audit.diff({"email": "a"}, {"email": f"b{i}"}))
+    assert log.flush(timeout=5)
+    log.stop()
+    assert len(spill.read_text().splitlines()) == 3
+    # A replay that fails puts the spilled entries back next to the new ones.
+    log = audit.AuditLog(down, queue_size=10, batch_size=10, interval=60.0, spill_path=str(spill))
+    log.start()
+    audit.record("user", 3, "update", audit.diff({"email": "b3"}, {"email": "c3"}))
+    assert log.flush(timeout=5)
+    log.stop()
+    assert len(spill.read_text().splitlines()) == 4
+
+    log = audit.AuditLog(engine, queue_size=10, batch_size=10, interval=60.0, spill_path=str(spill))
+    log.start()
+    audit.record("user", 4, "delete", audit.diff({"email": "c"}, {}))
+    assert log.flush(timeout=5)
+    log.stop()
+    assert not spill.exists()
+    assert db.execute(select(func.count()).select_from(AuditEntry)).scalar_one() == 5
+    audit.record("user", 5, "delete", {"email": ["d", None]})  # no log running: dropped
+    assert db.execute(select(func.count()).select_from(AuditEntry)).scalar_one() == 5
@@ -0,0 +1,133 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy.orm import Session
+from app.core import avatars
+from app.crud.user import user_crud
+from app.schemas.user import UserCreate
+from tests.conftest import app
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path, monkeypatch):
+    """Store avatars in a temporary media directory."""
+    monkeypatch.setattr(app.state.settings, "media_root", str(tmp_path))
+    return tmp_path
+
+
+def _png(color: str = "red", size: tuple = (300, 200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _create_user(db: Session, email: str):
+    return user_crud.create(db, obj_in=UserCreate(
+        first_name="Avatar",
+        last_name="User",
+        email=email,
+        password="testpassword123",
+    ))
+
+
+def _upload(client: TestClient, user_id: int, data: bytes, content_type: str = "image/png"):
+    return client.put(
+        f"/api/v1/users/{user_id}/avatar",
+        files={"file": ("avatar.png", data, content_type)},
+    )
+
+
+def test_upload_avatar_serves_variants(client: TestClient, db: Session) -> None:
+    """Test uploading an avatar and fetching its resized variants."""
+    user = _create_user(db, "avatar@example.com")
+
+    response = _upload(client, user.id, _png())
+    assert response.status_code == 200
+    avatar_url = response.json()["avatar_url"]
+    assert avatar_url.startswith("/api/v1/avatars/")
+    assert avatar_url.endswith(f"/{max(app.state.settings.avatar_sizes)}.webp")
+
+    for size in app.state.settings.avatar_sizes:
+        url = avatar_url.rsplit("/", 1)[0] + f"/{size}.webp"
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert "immutable" in response.headers["cache-control"]
+        with Image.open(io.BytesIO(response.content)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (size, size)
+
+
+def test_avatar_etag_not_modified(client: TestClient, db: Session) -> None:
+    """Test that a matching If-None-Match returns 304."""
+    user = _create_user(db, "etag@example.com")
+    avatar_url = _upload(client, user.id, _png()).json()["avatar_url"]
+
+    etag = client.get(avatar_url).headers["etag"]
+    response = client.get(avatar_url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_duplicate_uploads_are_deduplicated(client: TestClient, db: Session) -> None:
+    """Test that identical images are stored once."""
+    first = _create_user(db, "first@example.com")
+    second = _create_user(db, "second@example.com")
+    data = _png("blue")
+
+    first_url = _upload(client, first.id, data).json()["avatar_url"]
+    second_url = _upload(client, second.id, data).json()["avatar_url"]
+
+    assert first_url == second_url
+    originals = list((avatars.avatar_root(app.state.settings) / "originals").rglob("*"))
+    assert len([path for path in originals if path.is_file()]) == 1
+
+
+def test_upload_rejects_invalid_images(client: TestClient, db: Session) -> None:
+    """Test that non-images and oversized files are rejected."""
+    user = _create_user(db, "invalid@example.com")
+
+    assert _upload(client, user.id, b"not an image").status_code == 400
+    assert _upload(client, user.id, b"text", "text/plain").status_code == 415
+    assert _upload(client, 999999, _png()).status_code == 404
+
+
+def test_upload_rejects_large_images(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    """Test the upload size limit."""
+    user = _create_user(db, "large@example.com")
+    monkeypatch.setattr(app.state.settings, "avatar_max_upload_bytes", 10)
+
+    assert _upload(client, user.id, _png()).status_code == 413
+
+
+def test_read_unknown_avatar(client: TestClient) -> None:
+    """Test that unknown digests and sizes return 404."""
+    digest = "0" * 64
+    assert client.get(f"/api/v1/avatars/{digest}/64.webp").status_code == 404
+    assert client.get(f"/api/v1/avatars/{digest}/65.webp").status_code == 404
+    assert client.get("/api/v1/avatars/not-a-digest/64.webp").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_response_uses_pathsend(tmp_path) -> None:
+    """Test that the file is handed to servers supporting pathsend."""
+    from app.core.responses import ZeroCopyFileResponse
+
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"payload")
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "extensions": {"http.response.pathsend": {}}}
+    await ZeroCopyFileResponse(path)(scope, receive, send)
+
+    assert messages[0]["type"] == "http.response.start"
+    assert messages[1] == {"type": "http.response.pathsend", "path": str(path)}
@@ -0,0 +1,149 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.user import user_crud
+from app.schemas.user import UserCreate
+
+
+def _user_payload(email: str) -> dict:
+    return {
+        "first_name": "Batch",
+        "last_name": "User",
+        "email": email,
+        "password": "testpassword123",
+    }
+
+
+def test_batch_runs_sub_requests(client: TestClient, db: Session) -> None:
+    """Test that sub-requests are executed and returned in order."""
+    user = user_crud.create(
+        db,
+        obj_in=UserCreate(
+            first_name="Jane",
+            last_name="Smith",
+            email="jane.batch@example.com",
+            password="testpassword123",
+        ),
+    )
+
+    response = client.post("/api/v1/batch", json={
+        "requests": [
+            {"id": "list", "url": "/users/"},
+            {"id": "one", "url": f"/users/{user.id}"},
+            {"id": "missing", "url": "/users/999999"},
+        ]
+    })
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [item["id"] for item in data["responses"]] == ["list", "one", "missing"]
+    listed, one, missing = data["responses"]
+    assert listed["status"] == 200
+    assert any(u["email"] == "jane.batch@example.com" for u in listed["body"])
+    assert one["status"] == 200
+    assert one["body"]["id"] == user.id
+    assert missing["status"] == 404
+    assert missing["body"]["detail"] == "User not found"
+    assert all(item["duration_ms"] >= 0 for item in data["responses"])
+
+
+def test_batch_query_string_and_body(client: TestClient) -> None:
+    """Test that query strings and JSON bodies reach the sub-request."""
+    response = client.post("/api/v1/batch", json={
+        "requests": [
+            {"id": "create", "method": "POST", "url": "/users/",
+             "body": _user_payload("body.batch@example.com")},
+            {"id": "page", "url": "/users/?skip=0&limit=1", "depends_on": ["create"]},
+        ]
+    })
+    assert response.status_code == 200
+
+    create, page = response.json()["responses"]
+    assert create["status"] == 201
+    assert create["body"]["email"] == "body.batch@example.com"
+    assert page["status"] == 200
+    assert len(page["body"]) == 1
+
+
+def test_batch_skips_dependents_of_failed_requests(client: TestClient) -> None:
+    """Test that a failed dependency skips the requests depending on it."""
+    response = client.post("/api/v1/batch", json={
+        "requests": [
+            {"id": "missing", "url": "/users/999999"},
+            {"id": "after", "url": "/users/", "depends_on": ["missing"]},
+        ]
+    })
+    assert response.status_code == 200
+
+    missing, after = response.json()["responses"]
+    assert missing["status"] == 404
+    assert after["status"] == 424
+
+
+def test_batch_transaction_commits(client: TestClient) -> None:
+    """Test that a transactional batch commits all writes together."""
+    response = client.post("/api/v1/batch", json={
+        "transaction": True,
+        "requests": [
+            {"id": "a", "method": "POST", "url": "/users/",
+             "body": _user_payload("tx.a@example.com")},
+            {"id": "b", "method": "POST", "url": "/users/",
+             "body": _user_payload("tx.b@example.com")},
+        ]
+    })
+    assert response.status_code == 200
+    assert response.json()["committed"] is True
+
+    emails = {u["email"] for u in client.get("/api/v1/users/").json()}
+    assert {"tx.a@example.com", "tx.b@example.com"} <= emails
+
+
+def test_batch_transaction_rolls_back(client: TestClient) -> None:
+    """Test that a failing sub-request rolls back the whole transaction."""
+    response = client.post("/api/v1/batch", json={
+        "transaction": True,
+        "requests": [
+            {"id": "a", "method": "POST", "url": "/users/",
+             "body": _user_payload("rollback@example.com")},
+            {"id": "dup", "method": "POST", "url": "/users/",
+             "body": _user_payload("rollback@example.com")},
+            {"id": "c", "url": "/users/"},
+        ]
+    })
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["committed"] is False
+    assert [item["status"] for item in data["responses"]] == [201, 400, 424]
+
+    emails = {u["email"] for u in client.get("/api/v1/users/").json()}
+    assert "rollback@example.com" not in emails
+
+
+def test_batch_size_limit(client: TestClient) -> None:
+    """Test that oversized batches are rejected."""
+    requests = [
+        {"id": str(i), "url": "/users/"}
+        for i in range(settings.batch_max_requests + 1)
+    ]
+    response = client.post("/api/v1/batch", json={"requests": requests})
+    assert response.status_code == 413
+
+
+def test_batch_rejects_invalid_requests(client: TestClient) -> None:
+    """Test validation of ids, dependencies and nested batches."""
+    response = client.post("/api/v1/batch", json={
+        "requests": [{"id": "a", "url": "/users/"}, {"id": "a", "url": "/users/"}]
+    })
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/batch", json={
+        "requests": [{"id": "a", "url": "/users/", "depends_on": ["b"]},
+                     {"id": "b", "url": "/users/"}]
+    })
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/batch", json={
+        "requests": [{"id": "a", "method": "POST", "url": "/batch"}]
+    })
+    assert response.status_code == 422
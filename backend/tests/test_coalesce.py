@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core.coalesce import SingleFlight, coalesce
+from app.crud.user import user_crud
+from app.db.database import shared_session
+from app.models.user import User
+from tests.conftest import MakeUser, TestingSessionLocal
+
+
+def test_single_flight_shares_results_and_errors_across_threads() -> None:
+    """Test that concurrent callers share one call, its result and its exception."""
+    group = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def slow(value: object) -> object:
+        calls.append(value)
+        release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    for value in ([1, 2], ValueError("boom")):
+        calls.clear()
+        release.clear()
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(group.do, "key", lambda: slow(value)) for _ in range(8)]
+            time.sleep(0.1)
+            release.set()
+        assert len(calls) == 1
+        if isinstance(value, Exception):
+            assert all(f.exception() is value for f in futures)
+        else:
+            assert all(f.result() is value for f in futures)
+    assert group.do("key", lambda: 3) == 3
+
+
+def test_single_flight_coalesces_coroutines() -> None:
+    """Test the asyncio path, including errors and a cancelled leader."""
+    group = SingleFlight("test")
+    calls = []
+
+    async def slow(value: int) -> int:
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        if value < 0:
+            raise ValueError(value)
+        return value
+
+    async def main() -> None:
+        results = await asyncio.gather(*(group.do_async("a", lambda: slow(1)) for _ in range(5)))
+        assert results == [1] * 5 and calls == [1]
+        errors = await asyncio.gather(
+            *(group.do_async("b", lambda: slow(-1)) for _ in range(3)), return_exceptions=True
+        )
+        assert len({id(e) for e in errors}) == 1 and isinstance(errors[0], ValueError)
+
+        leader = asyncio.create_task(group.do_async("c", lambda: slow(2)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do_async("c", lambda: slow(2)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 2
+        assert calls == [1, -1, 2, 2]
+
+    asyncio.run(main())
+
+
+def test_identical_user_reads_share_one_query(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch, make_user: MakeUser
+) -> None:
+    """Test that concurrent identical GETs run the endpoint once and all get its response."""
+    user = make_user("Solo")
+    calls = []
+    get = user_crud.get
+
+    def slow_get(db: Session, id: int) -> object:
+        calls.append(id)
+        time.sleep(0.2)
+        return get(db, id=id)
+
+    monkeypatch.setattr(user_crud, "get", slow_get)
+    with ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(lambda _: client.get(f"/api/v1/users/{user.id}"), range(6)))
+    assert [r.status_code for r in responses] == [200] * 6
+    assert len({r.content for r in responses}) == 1
+    assert calls == [user.id]
+
+    # Different queries are different reads; a missing user is a shared 404.
+    calls.clear()
+    with ThreadPoolExecutor(4) as pool:
+        responses = list(pool.map(
+            lambda i: client.get(f"/api/v1/users/{user.id + 1 + i % 2}"), range(4)
+        ))
+    assert [r.status_code for r in responses] == [404] * 4
+    assert sorted(calls) == [user.id + 1, user.id + 2]
+
+
+def test_reads_that_may_see_uncommitted_writes_are_not_shared(db: Session) -> None:
+    """Test that shared sessions and sessions with pending changes read on their own."""
+    calls = []
+
+    class Reads:
+        @coalesce("test.reads")
+        def read(self, db: Session, value: int) -> int:
+            calls.append(value)
+            time.sleep(0.1)
+            return value
+
+    reads = Reads()
+
+    def read(mode: str) -> int:
+        with TestingSessionLocal() as session:
+            if mode == "pending":
+                session.add(User(first_name="P", last_name="P", email="p@example.com",
+                                 hashed_password="x"))
+            if mode == "shared":
+                with shared_session(session):
+                    return reads.read(session, 1)
+            return reads.read(session, 1)
+
+    for mode, expected in (("plain", 1), ("shared", 4), ("pending", 4)):
+        calls.clear()
+        with ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(lambda _: read(mode), range(4))) == [1] * 4
+        assert len(calls) == expected
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.core import concurrency
+from app.core.concurrency import AdaptiveLimit, ConcurrencyLimitMiddleware
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limit_rejects_over_capacity() -> None:
+    """Test that slots run out at the limit and come back on release."""
+    limit = AdaptiveLimit(initial=2)
+    assert limit.try_acquire()
+    assert limit.try_acquire()
+    assert not limit.try_acquire()
+    limit.release(0.01)
+    assert limit.try_acquire()
+
+
+def test_limit_grows_while_busy_and_fast() -> None:
+    """Test the additive increase when a saturated class stays fast."""
+    limit = AdaptiveLimit(initial=4, max_limit=5)
+    for _ in range(100):
+        while limit.try_acquire():
+            pass
+        while limit.in_flight:
+            limit.release(0.01)
+    assert limit.limit == 5
+
+
+def test_limit_backs_off_once_per_round_trip() -> None:
+    """Test the multiplicative decrease when latency climbs."""
+    clock = FakeClock()
+    limit = AdaptiveLimit(initial=10, min_limit=2, backoff=0.5, clock=clock)
+    for _ in range(3):
+        limit.try_acquire()
+    limit.release(0.01)
+
+    clock.now = 1.0
+    limit.release(0.5)
+    assert limit.limit == 5
+    # A second slow response from the same round trip does not cut again.
+    clock.now = 1.1
+    limit.release(0.5)
+    assert limit.limit == 5
+
+    for _ in range(5):
+        clock.now += 10.0
+        limit.try_acquire()
+        limit.release(5.0)
+    assert limit.limit == 2
+    assert limit.retry_after() >= 1
+
+
+def test_route_class() -> None:
+    """Test the auth/reads/writes classification."""
+    assert concurrency.route_class({"path": "/api/v1/auth/login", "method": "POST"}) == "auth"
+    assert concurrency.route_class({"path": "/api/v1/users/", "method": "GET"}) == "reads"
+    assert concurrency.route_class({"path": "/api/v1/users/1", "method": "PUT"}) == "writes"
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_excess_requests() -> None:
+    """Test the immediate 503 with Retry-After and the /health bypass."""
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["path"] != "/health":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = ConcurrencyLimitMiddleware(
+        app, initial=1, min_limit=1, max_limit=1, tolerance=2.0, backoff=0.9
+    )
+
+    async def call(path: str, method: str = "GET"):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "method": method, "path": path}, receive, send)
+        return messages
+
+    first = asyncio.create_task(call("/api/v1/users/"))
+    await asyncio.sleep(0)
+    rejected = await call("/api/v1/users/1")
+    health = await call("/health")
+    # Writes have their own limit.
+    write = asyncio.create_task(call("/api/v1/users/1", "PUT"))
+    await asyncio.sleep(0)
+    assert middleware.limits["writes"].in_flight == 1
+    release.set()
+
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"1") in rejected[0]["headers"]
+    assert health[0]["status"] == 200
+    assert (await first)[0]["status"] == 200
+    assert (await write)[0]["status"] == 200
+
+
+def test_limits_are_exported(client: TestClient) -> None:
+    """Test that limits and in-flight counts appear in /metrics."""
+    client.get("/api/v1/users/")
+    text = client.get("/metrics").text
+    assert 'http_concurrency_limit{route_class="reads"}' in text
+    assert 'http_concurrency_in_flight{route_class="reads"} 0' in text
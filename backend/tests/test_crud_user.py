@@ -1,9 +1,12 @@
 """Unit tests for User CRUD operations."""
 
 import pytest
+from typing import List
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from app.core.responses import RowsResponse
 from app.crud.user import user_crud, pwd_context
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
 from app.models.user import User
 
 
@@ -94,6 +97,26 @@ class TestUserCRUD:
         retrieved_emails = {user.email for user in retrieved_users}
         assert created_emails.issubset(retrieved_emails)
 
+    def test_get_multi_rows_is_read_only(self, db: Session) -> None:
+        """Test that row pages match the ORM page without entering the session."""
+        for i in range(3):
+            user_crud.create(db, obj_in=UserCreate(
+                first_name=f"Row{i}", last_name="Test",
+                email=f"row{i}@example.com", password="password123",
+            ))
+        db.expunge_all()
+
+        rows = user_crud.get_multi_rows(db, skip=1, limit=2)
+
+        assert len(db.identity_map) == 0
+        assert [row.id for row in rows] == sorted(row.id for row in rows)
+        assert [row.email for row in rows] == ["row1@example.com", "row2@example.com"]
+        assert "hashed_password" not in rows[0]._fields
+        # Serialized without validation, exactly as the response model would.
+        adapter = TypeAdapter(List[UserSchema])
+        validated = adapter.validate_python(rows, from_attributes=True)
+        assert RowsResponse(rows, UserSchema).body == adapter.dump_json(validated)
+
     def test_update_user(self, db: Session) -> None:
         """Test updating a user."""
         user_in = UserCreate(
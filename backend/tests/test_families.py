@@ -0,0 +1,94 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.crud.family import family_crud
+from app.models.family import OWNER
+from app.models.user import User
+from app.schemas.family import FamilyCreate
+from tests.conftest import AuthHeaders, MakeUser, RecordStatements
+
+
+def test_create_family_makes_owner_member(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders
+) -> None:
+    """Test that the creator becomes the owner and only member."""
+    owner = make_user("Olivia")
+    response = client.post("/api/v1/families/", json={"name": "Smiths"}, headers=auth_headers(owner))
+    assert response.status_code == 201
+    family_id = response.json()["id"]
+
+    members = client.get(f"/api/v1/families/{family_id}/members", headers=auth_headers(owner))
+    assert members.status_code == 200
+    assert [m["email"] for m in members.json()] == ["olivia@example.com"]
+    families = client.get("/api/v1/families/", headers=auth_headers(owner)).json()
+    assert [f["name"] for f in families] == ["Smiths"]
+
+
+def test_members_are_scoped_to_family(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders
+) -> None:
+    """Test that members of other families are neither listed nor allowed in."""
+    owner, kid, stranger = make_user("Owen"), make_user("Kim"), make_user("Sam")
+    family = family_crud.create_with_owner(db, obj_in=FamilyCreate(name="Owens"), owner_id=owner.id)
+    family_crud.create_with_owner(db, obj_in=FamilyCreate(name="Sams"), owner_id=stranger.id)
+
+    response = client.post(
+        f"/api/v1/families/{family.id}/members",
+        json={"email": "kim@example.com"},
+        headers=auth_headers(owner),
+    )
+    assert response.status_code == 201
+    members = client.get(f"/api/v1/families/{family.id}/members", headers=auth_headers(kid))
+    assert [m["email"] for m in members.json()] == ["owen@example.com", "kim@example.com"]
+
+    assert client.get(
+        f"/api/v1/families/{family.id}/members", headers=auth_headers(stranger)
+    ).status_code == 404
+    assert client.get(f"/api/v1/families/{family.id}/members").status_code == 403
+
+
+def test_member_management_permissions(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders
+) -> None:
+    """Test that only owners add members and members may only remove themselves."""
+    owner, kid, other = make_user("Ada"), make_user("Ben"), make_user("Cy")
+    family = family_crud.create_with_owner(db, obj_in=FamilyCreate(name="Adas"), owner_id=owner.id)
+    family_crud.add_member(db, family_id=family.id, user_id=kid.id)
+    url = f"/api/v1/families/{family.id}/members"
+
+    assert client.post(url, json={"email": "cy@example.com"}, headers=auth_headers(kid)).status_code == 403
+    assert client.post(url, json={"email": "ben@example.com"}, headers=auth_headers(owner)).status_code == 400
+    assert client.post(url, json={"email": "no@example.com"}, headers=auth_headers(owner)).status_code == 404
+    assert client.delete(f"{url}/{owner.id}", headers=auth_headers(kid)).status_code == 403
+    assert client.delete(f"{url}/{kid.id}", headers=auth_headers(kid)).status_code == 204
+    assert client.delete(f"{url}/{other.id}", headers=auth_headers(owner)).status_code == 404
+    # The last owner stays until another owner is added.
+    assert client.delete(f"{url}/{owner.id}", headers=auth_headers(owner)).status_code == 409
+    family_crud.add_member(db, family_id=family.id, user_id=other.id, role=OWNER)
+    assert client.delete(f"{url}/{owner.id}", headers=auth_headers(other)).status_code == 204
+
+
+def test_member_listing_cost_does_not_grow_with_users(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    statements: RecordStatements,
+) -> None:
+    """Test that listing members is one indexed query whatever the user count."""
+    owner = make_user("Quinn")
+    family = family_crud.create_with_owner(db, obj_in=FamilyCreate(name="Quinns"), owner_id=owner.id)
+    db.add_all([
+        User(first_name=f"Other{i}", last_name="User", email=f"other{i}@example.com",
+             hashed_password="not-a-real-hash")
+        for i in range(30)
+    ])
+    db.commit()
+
+    with statements(client.app.state.engine) as executed:
+        response = client.get(f"/api/v1/families/{family.id}/members", headers=auth_headers(owner))
+    assert response.status_code == 200
+    member_queries = [s for s in executed if "JOIN family_members" in s[0]]
+    assert len(member_queries) == 1
+
+    statement, parameters = member_queries[0]
+    plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "SEARCH family_members USING COVERING INDEX" in details
+    assert "SCAN" not in details
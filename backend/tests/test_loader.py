@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+from app.crud.user import user_crud
+from tests.conftest import MakeUser, RecordStatements, engine
+
+
+def test_related_users_load_in_one_query(
+    db: Session, make_user: MakeUser, statements: RecordStatements
+) -> None:
+    """Test that wanted ids are fetched in one IN query, then served from the cache."""
+    users = [make_user(f"Lou{i}") for i in range(5)]
+    ids = [user.id for user in users]
+    db.expunge_all()
+
+    # Ids as response assembly would meet them: repeated, and one missing.
+    related = [ids[0], ids[3], ids[0], 999, ids[1], ids[4], ids[3]]
+    with statements(engine) as executed:
+        loader = user_crud.loader(db)
+        wanted = [loader.want(user_id) for user_id in related]
+        loaded = [deferred.get() for deferred in wanted]
+        again = loader.load_many(related)
+        # In the identity map now, so plain gets are free too.
+        assert user_crud.get(db, id=ids[4]).first_name == "Lou4"
+    assert [user.id if user else None for user in loaded] == related[:3] + [None] + related[4:]
+    assert again == loaded
+    assert len(executed) == 1 and " IN (" in executed[0][0]
+    assert user_crud.loader(db) is loader
+
+    with statements(engine) as executed:
+        assert loader.load(ids[2]).first_name == "Lou2"
+        assert loader.load(ids[2]) is not None
+    assert len(executed) == 1
+
+
+def test_loader_batches_and_reloads_after_commit(
+    db: Session, make_user: MakeUser, statements: RecordStatements
+) -> None:
+    """Test large batches split into IN queries, and a commit clearing the cache."""
+    ids = [make_user(f"Bea{i}").id for i in range(5)]
+    loader = user_crud.loader(db)
+    loader.max_batch_size = 2
+    with statements(engine) as executed:
+        assert all(user_crud.loader(db).load_many(ids))
+    assert len(executed) == 3
+
+    user_crud.remove(db, id=ids[0])
+    with statements(engine) as executed:
+        users = loader.load_many(ids)
+    assert users[0] is None and all(users[1:])
+    # Reloaded in batches, not refreshed one expired object at a time.
+    assert len(executed) == 3
@@ -0,0 +1,71 @@
+import json
+import logging
+import queue
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core import logs
+from app.core.config import Settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+from app.main import create_app
+from tests.conftest import SQLALCHEMY_DATABASE_URL, MakeUser
+
+
+def test_requests_get_ids_that_reach_access_and_sql_logs(
+    db: Session, capsys: pytest.CaptureFixture[str], make_user: MakeUser
+) -> None:
+    """Test request ids end to end: header, access record, and SQL run by CRUD calls."""
+    user = make_user("Logan")
+    app = create_app(Settings(
+        database_url=SQLALCHEMY_DATABASE_URL,
+        reminders_enabled=False,
+        audit_enabled=False,
+        log_sql=True,
+    ))
+    with TestClient(app) as client:
+        response = client.get(f"/api/v1/users/{user.id}", headers={"X-Request-ID": "req-123"})
+        generated = client.get("/api/v1/users/").headers["x-request-id"]
+        spoofed = client.get("/health", headers={"X-Request-ID": "bad id\n"})
+    assert response.headers["x-request-id"] == "req-123"
+    assert len(generated) == 16 and spoofed.headers["x-request-id"] != "bad id\n"
+
+    records = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    access = [r for r in records if r["logger"] == "app.access"]
+    # /health is sampled out by default.
+    assert [(r["route"], r["status"], r["request_id"]) for r in access] == [
+        ("/api/v1/users/{user_id}", 200, "req-123"),
+        ("/api/v1/users/", 200, generated),
+    ]
+    statements = [r for r in records if r["logger"] == "app.sql" and r.get("request_id") == "req-123"]
+    assert statements and "FROM users" in statements[0]["message"]
+    assert "duration_ms" in statements[0]
+    # Pool recycling and the test client's HTTP calls stay out of the queue.
+    assert not [r for r in records if r["logger"].startswith(logs.QUIET_LOGGERS)]
+
+
+def test_queue_handler_prepares_on_the_caller_and_never_blocks() -> None:
+    """Test that records are rendered before queueing and dropped when the queue is full."""
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(1)
+    handler = logs.NonBlockingQueueHandler(log_queue)
+    logger = logging.getLogger("tests.logs")
+    logger.addHandler(handler)
+    logger.propagate = False
+    dropped = LOG_RECORDS_DROPPED._values.get((), 0)
+    token = logs._request_id.set("abc")
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed %s", [1])
+        logger.error("lost")
+        logger.error("lost too")
+    finally:
+        logs._request_id.reset(token)
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    record = log_queue.get_nowait()
+    assert (record.msg, record.args, record.exc_info) == ("failed [1]", None, None)
+    entry = json.loads(logs.JsonFormatter().format(record))
+    assert entry["request_id"] == "abc" and "ValueError: boom" in entry["exc"]
+    assert LOG_RECORDS_DROPPED._values[()] == dropped + 2
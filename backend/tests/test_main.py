@@ -1,4 +1,6 @@
 from fastapi.testclient import TestClient
+from app.core.config import Settings
+from app.main import create_app
 
 
 def test_root_endpoint(client: TestClient) -> None:
@@ -13,3 +15,35 @@ def test_health_check(client: TestClient) -> None:
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+def test_create_app_is_isolated(tmp_path) -> None:
+    """Test that each app gets its own settings and engine."""
+    first = create_app(Settings(database_url=f"sqlite:///{tmp_path}/first.db"))
+    second = create_app(Settings(
+        database_url=f"sqlite:///{tmp_path}/second.db", warmup_on_startup=False
+    ))
+    assert first.state.settings is not second.state.settings
+
+    with TestClient(first), TestClient(second):
+        assert str(first.state.engine.url).endswith("first.db")
+        assert str(second.state.engine.url).endswith("second.db")
+        # Warm-up leaves connections checked in to the pool.
+        assert first.state.engine.pool.checkedin() >= 1
+        assert second.state.engine.pool.checkedin() == 0
+        assert first.openapi_schema is not None
+
+
+def test_import_defers_optional_modules() -> None:
+    """Test that importing the app does not load rarely used modules."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('jose', 'PIL', 'psycopg2') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,84 @@
+import os
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core import metrics
+from app.crud.user import user_crud
+from app.schemas.user import UserCreate
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Test the Prometheus text format of a histogram."""
+    histogram = metrics.Histogram("test_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+    snapshot = {histogram.name: histogram.snapshot()}
+
+    text = "\n".join(metrics._lines(snapshot))
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert 'test_latency_seconds_sum{route="/a"} 5.55' in text
+
+
+def test_counter_escapes_label_values() -> None:
+    """Test that label values are escaped."""
+    counter = metrics.Counter("test_total", "Test.", ("name",))
+    counter.inc('a"b')
+    text = "\n".join(metrics._lines({counter.name: counter.snapshot()}))
+    assert 'test_total{name="a\\"b"} 1' in text
+
+
+def test_metrics_endpoint_reports_route_latency(client: TestClient, db: Session) -> None:
+    """Test that requests are recorded per route template and status."""
+    user = user_crud.create(db, obj_in=UserCreate(
+        first_name="Metric",
+        last_name="User",
+        email="metrics@example.com",
+        password="testpassword123",
+    ))
+    client.get(f"/api/v1/users/{user.id}")
+    client.get("/api/v1/users/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/users/{user_id}",status="200"}'
+    ) in text
+    assert 'route="/api/v1/users/{user_id}",status="404"' in text
+    assert "http_requests_in_flight" in text
+    assert "threadpool_tokens_total 40" in text
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in text
+    assert "db_pool_checkout_wait_seconds_count" in text
+
+
+def test_aggregate_sums_worker_snapshots(tmp_path) -> None:
+    """Test that snapshots from several workers are merged."""
+    metrics.write_snapshot(str(tmp_path))
+    own = (tmp_path / f"{os.getpid()}.json").read_text()
+    # A second, exited worker with the same samples.
+    (tmp_path / "999999999.json").write_text(own.replace(str(os.getpid()), "999999999", 1))
+
+    merged = metrics.aggregate(str(tmp_path))
+    single = metrics.REGISTRY.snapshot()
+    for name, metric in single.items():
+        if metric["kind"] == "counter":
+            for labels, value in metric["values"]:
+                merged_values = {tuple(k): v for k, v in merged[name]["values"]}
+                assert merged_values[tuple(labels)] == value * 2
+        if metric["kind"] == "gauge" and metric["values"]:
+            # Gauges of exited workers are dropped.
+            assert len(merged[name]["values"]) == len(metric["values"])
+
+
+def test_metrics_multiprocess_render(tmp_path) -> None:
+    """Test that render aggregates the multiprocess directory."""
+    metrics.record_cache("test_cache", True)
+    text = metrics.render(str(tmp_path))
+    assert 'cache_requests_total{cache="test_cache",result="hit"}' in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
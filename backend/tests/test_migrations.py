@@ -0,0 +1,81 @@
+from pathlib import Path
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, insert, select
+from app.db import migrations
+from benchmarks.common import seed
+from tests.conftest import RecordStatements
+
+
+def test_expand_then_contract_rehearsal(tmp_path: Path) -> None:
+    """Test that an expand upgrade stops before the contract migration, and the rest."""
+    url = f"sqlite:///{tmp_path}/rehearsal.db"
+    seed(url, 5)
+    expand = migrations.config(url, versions=migrations.REHEARSAL_DIR, x=["phase=expand"])
+    command.upgrade(expand, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == "rehearsal02"
+        names = connection.execute(sa.text("SELECT display_name FROM users")).scalars().all()
+        assert sorted(names) == [f"User{i} Bench" for i in range(5)]
+        assert "ix_users_display_name" in {i["name"] for i in inspect(connection).get_indexes("users")}
+        # Finished backfills leave no progress behind.
+        assert connection.execute(select(migrations.progress)).all() == []
+
+    everything = migrations.config(url, versions=migrations.REHEARSAL_DIR)
+    command.upgrade(everything, "head")
+    with engine.connect() as connection:
+        columns = {c["name"]: c for c in inspect(connection).get_columns("users")}
+        assert columns["display_name"]["nullable"] is False
+
+    command.downgrade(everything, "base")
+    with engine.connect() as connection:
+        assert "display_name" not in {c["name"] for c in inspect(connection).get_columns("users")}
+    engine.dispose()
+
+
+def test_backfill_resumes_after_the_last_committed_batch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, statements: RecordStatements
+) -> None:
+    """Test batching, saved progress, and resuming an interrupted backfill."""
+    engine = create_engine(f"sqlite:///{tmp_path}/backfill.db")
+    metadata = sa.MetaData()
+    items = sa.Table(
+        "items", metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("value", sa.Integer, nullable=True),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(items), [{"id": i, "value": None} for i in range(1, 6)])
+
+    def run() -> int:
+        with engine.connect() as connection, Operations.context(
+            MigrationContext.configure(connection)
+        ):
+            return migrations.backfill(
+                items, {"value": items.c.id * 10}, where=items.c.value.is_(None),
+                name="items_value", batch_size=2, pause=0.01,
+            )
+
+    def interrupt(seconds: float) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(migrations.time, "sleep", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        run()
+    with engine.connect() as connection:
+        assert connection.execute(select(migrations.progress.c.position)).scalar_one() == 2
+
+    monkeypatch.setattr(migrations.time, "sleep", lambda seconds: None)
+    with statements(engine) as executed:
+        assert run() == 3
+    assert sum(statement.startswith("UPDATE items") for statement, _ in executed) == 2
+    with engine.connect() as connection:
+        assert connection.execute(select(items.c.value)).scalars().all() == [10, 20, 30, 40, 50]
+        assert connection.execute(select(migrations.progress)).all() == []
+    engine.dispose()
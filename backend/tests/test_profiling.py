@@ -0,0 +1,171 @@
+import asyncio
+import cProfile
+import json
+import pstats
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core import profiling
+from app.core.config import Settings
+from app.crud.user import user_crud
+from app.main import create_app
+from app.schemas.user import UserCreate
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+def profiling_app(tmp_path, **overrides):
+    options = {
+        "database_url": SQLALCHEMY_DATABASE_URL,
+        "warmup_on_startup": False,
+        "profiling_enabled": True,
+        "profiling_token": "let-me-profile",
+        "profiling_dir": str(tmp_path),
+    }
+    options.update(overrides)
+    return create_app(Settings(**options))
+
+
+def test_profiling_disabled_by_default(client: TestClient) -> None:
+    """Test that the middleware is not installed unless enabled."""
+    response = client.get("/health", headers={"X-Profile": "anything"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert not any(
+        m.cls is profiling.ProfilingMiddleware for m in client.app.user_middleware
+    )
+
+
+def test_profile_requested_with_token(tmp_path, db: Session) -> None:
+    """Test that an authenticated request is profiled and broken down."""
+    user_crud.create(db, obj_in=UserCreate(
+        first_name="Profile",
+        last_name="User",
+        email="profile@example.com",
+        password="testpassword123",
+    ))
+    with TestClient(profiling_app(tmp_path)) as client:
+        response = client.get("/api/v1/users/", headers={"X-Profile": "let-me-profile"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    summary = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert summary["route"] == "/api/v1/users/"
+    assert summary["status"] == 200
+    for phase in ("dependencies", "crud", "sql", "serialization"):
+        assert summary["breakdown"][phase] > 0
+    assert summary["breakdown"]["crud"] >= summary["breakdown"]["sql"]
+
+    pstats.Stats(str(tmp_path / f"{profile_id}.pstats"))
+    speedscope = json.loads((tmp_path / f"{profile_id}.speedscope.json").read_text())
+    assert speedscope["profiles"][0]["type"] == "sampled"
+
+
+def test_profile_requires_valid_token(tmp_path) -> None:
+    """Test that a wrong token or a missing header is not profiled."""
+    with TestClient(profiling_app(tmp_path)) as client:
+        assert "x-profile-id" not in client.get("/health", headers={"X-Profile": "nope"}).headers
+        assert "x-profile-id" not in client.get("/health").headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_sampled_and_rotated(tmp_path) -> None:
+    """Test sampling without a header and that old profiles are rotated out."""
+    app = profiling_app(
+        tmp_path, profiling_token=None, profiling_sample_rate=1.0, profiling_max_files=2
+    )
+    with TestClient(app) as client:
+        ids = [client.get("/health").headers["x-profile-id"] for _ in range(3)]
+
+    remaining = {path.name.split(".", 1)[0] for path in tmp_path.iterdir()}
+    assert len(set(ids)) == 3
+    assert remaining == set(ids[1:])
+
+
+def test_one_profiler_active_at_a_time(
+    tmp_path, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test sync endpoints under Python 3.12's one-profiler-per-process rule."""
+    active = []
+
+    class SingleProfile(cProfile.Profile):
+        # cProfile on sys.monitoring, as from Python 3.12.
+        def enable(self, *args, **kwargs) -> None:
+            if active:
+                raise ValueError("Another profiling tool is already active")
+            active.append(self)
+            super().enable(*args, **kwargs)
+
+        def disable(self) -> None:
+            super().disable()
+            if self in active:
+                active.remove(self)
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", SingleProfile)
+    user_crud.create(db, obj_in=UserCreate(
+        first_name="Single",
+        last_name="User",
+        email="single@example.com",
+        password="testpassword123",
+    ))
+    with TestClient(profiling_app(tmp_path)) as client:
+        response = client.get("/api/v1/users/", headers={"X-Profile": "let-me-profile"})
+    assert response.status_code == 200
+    summary = json.loads((tmp_path / f"{response.headers['x-profile-id']}.json").read_text())
+    assert summary["breakdown"]["crud"] > 0
+    assert active == []
+
+
+def test_profile_leaves_out_concurrent_requests(tmp_path) -> None:
+    """Test that tasks interleaved with a profiled request stay out of its profile."""
+    def requested_work() -> int:
+        return sum(range(1000))
+
+    def other_work() -> int:
+        return sum(range(1000))
+
+    async def app(scope, receive, send) -> None:
+        for _ in range(5):
+            requested_work()
+            await asyncio.sleep(0)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def other() -> None:
+        for _ in range(20):
+            other_work()
+            await asyncio.sleep(0)
+
+    async def send(message) -> None:
+        pass
+
+    async def main() -> None:
+        middleware = profiling.ProfilingMiddleware(app, str(tmp_path), sample_rate=1.0)
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        await asyncio.gather(middleware(scope, None, send), other())
+
+    asyncio.run(main())
+    (path,) = tmp_path.glob("*.pstats")
+    names = {name for _, _, name in pstats.Stats(str(path)).stats}  # type: ignore[attr-defined]
+    assert "requested_work" in names
+    assert "other_work" not in names
+
+
+def test_speedscope_weights_match_profile() -> None:
+    """Test that the speedscope export accounts for the profiled time."""
+    def leaf() -> int:
+        return sum(range(20000))
+
+    def parent() -> int:
+        return leaf() + leaf()
+
+    profile = cProfile.Profile()
+    profile.runcall(parent)
+    stats = pstats.Stats(profile)
+
+    document = profiling.to_speedscope(stats, "test", min_weight=0.0)
+    sampled = document["profiles"][0]
+    frames = document["shared"]["frames"]
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert all(0 <= i < len(frames) for stack in sampled["samples"] for i in stack)
+    assert abs(sum(sampled["weights"]) - stats.total_tt) < 1e-6
+    assert any(frames[stack[-1]]["name"] == "leaf" for stack in sampled["samples"])
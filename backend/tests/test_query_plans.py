@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+from sqlalchemy import text
+from app.core.config import Settings
+from app.db.database import create_db_engine
+from benchmarks import query_plans
+
+
+def test_hot_queries_keep_their_indexes() -> None:
+    """Test the hot queries' plans against the committed SQLite snapshot."""
+    dialect, plans = query_plans.run(None, families=200)
+    snapshot = json.loads((query_plans.PLANS_DIR / f"{dialect}.json").read_text())
+    failures, _ = query_plans.compare_plans(plans, snapshot, threshold=0.5, max_cost=None)
+    assert failures == []
+    assert plans.keys() == snapshot.keys()
+
+
+def test_dropped_index_fails_the_comparison(tmp_path: Path) -> None:
+    """Test that a query falling back to a sequential scan is reported."""
+    url = f"sqlite:///{tmp_path}/plans.db"
+    query_plans.prepare(url, families=50)
+    engine = create_db_engine(Settings(database_url=url))
+    queries = {"users.get_by_email": query_plans.HOT_QUERIES["users.get_by_email"]}
+    before = query_plans.explain_all(engine, queries)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_users_email"))
+    # Pooled connections cache the old plan.
+    engine.dispose()
+    after = query_plans.explain_all(engine, queries)
+    engine.dispose()
+
+    failures, changes = query_plans.compare_plans(after, before, threshold=0.5, max_cost=None)
+    assert failures == ["users.get_by_email: users read by sequential scan instead of an index"]
+    assert "SCAN users" in changes[0]
+    pg_plan = {"statement": "", "plan": [], "access": {}, "cost": 2000.0}
+    failures, _ = query_plans.compare_plans(
+        {"q": pg_plan}, {"q": {**pg_plan, "cost": 100.0}}, threshold=0.5, max_cost=1000.0
+    )
+    assert failures == [
+        "q: estimated cost 2000.0 exceeds 1000.0", "q: estimated cost 100.0 -> 2000.0",
+    ]
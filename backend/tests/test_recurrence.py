@@ -0,0 +1,46 @@
+from datetime import date
+from itertools import islice
+from app.core.recurrence import DAILY, MONTHLY, WEEKLY, Rule, WindowCache, expand, occurrences, occurs_on
+
+
+def test_expansion_jumps_to_the_window() -> None:
+    """Test daily and weekly rules with intervals, started mid-rule."""
+    every_other_day = Rule(date(2020, 1, 1), DAILY, interval=2)
+    assert expand(every_other_day, date(2024, 3, 1), date(2024, 3, 6)) == (
+        date(2024, 3, 2), date(2024, 3, 4), date(2024, 3, 6),
+    )
+    weekly = Rule(date(2024, 3, 4), WEEKLY, until=date(2024, 3, 18))
+    assert list(occurrences(weekly)) == [date(2024, 3, 4), date(2024, 3, 11), date(2024, 3, 18)]
+    assert expand(weekly, date(2024, 1, 1), date(2024, 3, 10)) == (date(2024, 3, 4),)
+    assert occurs_on(weekly, date(2024, 3, 11))
+    assert not occurs_on(weekly, date(2024, 3, 12))
+
+
+def test_monthly_rule_keeps_its_day() -> None:
+    """Test that the 31st falls on the last day of short months and comes back."""
+    rule = Rule(date(2024, 1, 31), MONTHLY)
+    assert list(islice(occurrences(rule), 4)) == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30),
+    ]
+    quarterly = Rule(date(2024, 1, 15), MONTHLY, interval=3)
+    assert expand(quarterly, date(2024, 5, 1), date(2025, 1, 31)) == (
+        date(2024, 7, 15), date(2024, 10, 15), date(2025, 1, 15),
+    )
+
+
+def test_window_cache_serves_only_the_same_rule() -> None:
+    """Test hits, eviction of old windows, and that an edited rule is re-expanded."""
+    cache = WindowCache(max_rules=10, windows_per_rule=2)
+    rule = Rule(date(2024, 1, 1), DAILY)
+    march = (date(2024, 3, 1), date(2024, 3, 31))
+    days = cache.get(1, rule, *march)
+    assert len(days) == 31 and cache.get(1, rule, *march) is days
+
+    edited = rule._replace(interval=7)
+    assert len(cache.get(1, edited, *march)) == 4
+    cache.get(1, edited, date(2024, 4, 1), date(2024, 4, 30))
+    cache.get(1, edited, date(2024, 5, 1), date(2024, 5, 31))
+    assert len(cache._rules[1][1]) == 2
+
+    cache.invalidate(1)
+    assert len(cache) == 0
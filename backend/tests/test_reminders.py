@@ -0,0 +1,164 @@
+import json
+import random
+from datetime import datetime, time, timedelta
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core import reminders
+from app.core.reminders import FileNotifier, ReminderDispatcher, TimingWheel
+from app.models.reminder import Reminder
+from tests.conftest import AuthHeaders, MakeFamily, MakeUser, TestingSessionLocal
+
+
+def test_timing_wheel_fires_each_key_once_on_time() -> None:
+    """Test the wheel against a brute-force schedule, across levels and overflow."""
+    rng = random.Random(7)
+    wheel: TimingWheel[int] = TimingWheel(1.0, start=1000.0, slots=8, levels=3)
+    expected = {key: 1000 + rng.choice((0, 1, 7, 9, 63, 65, 511, 600, 5000)) + rng.randrange(5)
+                for key in range(300)}
+    for key, when in expected.items():
+        wheel.schedule(key, when)
+    for key in range(0, 300, 3):
+        assert wheel.cancel(key)
+        del expected[key]
+    for key in range(1, 300, 9):
+        expected[key] += 40
+        wheel.schedule(key, expected[key])
+    assert not wheel.cancel(0) and len(wheel) == len(expected)
+
+    fired = {}
+    for now in range(1000, 6100, 13):
+        for key in wheel.advance(now):
+            assert key not in fired
+            fired[key] = now
+    assert len(wheel) == 0
+    assert fired.keys() == expected.keys()
+    assert all(0 <= fired[key] - when < 13 for key, when in expected.items())
+
+
+def test_reminders_dispatch_once_and_follow_edits(
+    client: TestClient, db: Session, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+    make_user: MakeUser, auth_headers: AuthHeaders, make_family: MakeFamily,
+) -> None:
+    """Test window loading, rescheduling on edit, restarts, and dropping stale reminders."""
+    owner = make_user("Remy")
+    family_id = make_family(owner)
+    headers = auth_headers(owner)
+    url = f"/api/v1/families/{family_id}"
+    day = reminders.utcnow().date() + timedelta(days=2)
+    response = client.post(f"{url}/tasks", json={
+        "title": "Bins", "due_date": day.isoformat(), "repeat": "daily",
+        "assignee_id": owner.id, "remind_before": 60,
+    }, headers=headers)
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+
+    sent_file = tmp_path / "sent.jsonl"
+
+    def dispatcher(at: datetime) -> ReminderDispatcher:
+        return ReminderDispatcher(
+            TestingSessionLocal, FileNotifier(str(sent_file)),
+            tick=1.0, window=300.0, batch_size=2, max_lateness=3600.0,
+            horizon_days=30, day_start_hour=8, clock=lambda: at,
+        )
+
+    def sent() -> list:
+        return [json.loads(line) for line in sent_file.read_text().splitlines()]
+
+    first = datetime.combine(day, time(7))
+    running = dispatcher(first - timedelta(minutes=10))
+    assert running.poll(first - timedelta(minutes=10)) == 0
+    assert running.poll(first + timedelta(seconds=30)) == 1
+    assert [(m["task_id"], m["user_id"], m["title"]) for m in sent()] == [(task_id, owner.id, "Bins")]
+
+    # Tomorrow's reminder is loaded, then moved by an edit before it fires.
+    second = first + timedelta(days=1)
+    assert running.poll(second - timedelta(minutes=2)) == 0
+    monkeypatch.setattr(reminders, "_dispatcher", running)
+    response = client.put(f"{url}/tasks/{task_id}", json={"remind_before": 30}, headers=headers)
+    assert response.status_code == 200
+    assert running.poll(second + timedelta(minutes=1)) == 0
+    assert running.poll(second + timedelta(minutes=31)) == 1
+    assert [m["remind_at"] for m in sent()][1] == (second + timedelta(minutes=30)).isoformat()
+
+    # A restart sends nothing twice; reminders too late for it are dropped.
+    assert dispatcher(second + timedelta(minutes=32)).poll(second + timedelta(minutes=32)) == 0
+    assert dispatcher(second + timedelta(days=3)).poll(second + timedelta(days=3, minutes=40)) == 1
+    assert len(sent()) == 3
+    listed = client.get(f"{url}/reminders", params={
+        "from": first.isoformat(), "to": (second + timedelta(days=4, minutes=30)).isoformat(),
+    }, headers=headers).json()
+    assert len(listed) == 6 and all(r["dispatched_at"] for r in listed[:5])
+    assert listed[5]["dispatched_at"] is None
+
+    assert client.delete(f"{url}/tasks/{task_id}", headers=headers).status_code == 204
+    assert client.get(f"{url}/reminders", params={
+        "from": first.isoformat(), "to": (second + timedelta(days=30)).isoformat(),
+    }, headers=headers).json() == []
+
+
+def test_reminder_moved_by_another_process_is_sent_at_its_new_time(
+    client: TestClient, db: Session, tmp_path: Path,
+    make_user: MakeUser, auth_headers: AuthHeaders, make_family: MakeFamily,
+) -> None:
+    """Test that a stale wheel entry does not claim a reminder that moved later."""
+    owner = make_user("Mona")
+    family_id = make_family(owner)
+    day = reminders.utcnow().date() + timedelta(days=2)
+    client.post(f"/api/v1/families/{family_id}/tasks", json={
+        "title": "Plants", "due_date": day.isoformat(), "assignee_id": owner.id,
+        "remind_before": 60,
+    }, headers=auth_headers(owner))
+    sent_file = tmp_path / "sent.jsonl"
+    at = datetime.combine(day, time(7))
+    running = ReminderDispatcher(
+        TestingSessionLocal, FileNotifier(str(sent_file)),
+        tick=1.0, window=3600.0, batch_size=10, max_lateness=3600.0,
+        horizon_days=30, day_start_hour=8, clock=lambda: at - timedelta(minutes=10),
+    )
+    assert running.poll(at - timedelta(minutes=10)) == 0
+
+    # Moved 30 minutes later where this dispatcher cannot hear about it.
+    (reminder,) = db.query(Reminder).all()
+    reminder.remind_at = at + timedelta(minutes=30)
+    db.commit()
+    assert running.poll(at + timedelta(seconds=5)) == 0
+    assert running.poll(at + timedelta(minutes=20)) == 0
+    assert running.poll(at + timedelta(minutes=30, seconds=5)) == 1
+    assert json.loads(sent_file.read_text())["remind_at"] == (at + timedelta(minutes=30)).isoformat()
+
+
+def test_reminders_added_or_moved_earlier_elsewhere_are_sent_on_time(
+    client: TestClient, db: Session, tmp_path: Path,
+    make_user: MakeUser, auth_headers: AuthHeaders, make_family: MakeFamily,
+) -> None:
+    """Test that changes inside the loaded window made by other processes are picked up."""
+    owner = make_user("Nell")
+    family_id = make_family(owner)
+    day = reminders.utcnow().date() + timedelta(days=2)
+    client.post(f"/api/v1/families/{family_id}/tasks", json={
+        "title": "Bins", "due_date": day.isoformat(), "assignee_id": owner.id,
+        "remind_before": 60,
+    }, headers=auth_headers(owner))
+    sent_file = tmp_path / "sent.jsonl"
+    at = datetime.combine(day, time(7))
+    running = ReminderDispatcher(
+        TestingSessionLocal, FileNotifier(str(sent_file)),
+        tick=1.0, window=3600.0, batch_size=10, max_lateness=3600.0,
+        horizon_days=30, day_start_hour=8, clock=lambda: at - timedelta(minutes=10),
+    )
+    assert running.poll(at - timedelta(minutes=10)) == 0
+
+    # Both well inside the window loaded above, written by another worker.
+    (reminder,) = db.query(Reminder).all()
+    reminder.remind_at = at - timedelta(minutes=5)
+    db.add(Reminder(
+        task_id=reminder.task_id, occurrence_date=day + timedelta(days=1),
+        remind_at=at - timedelta(minutes=3),
+    ))
+    db.commit()
+    assert running.poll(at - timedelta(minutes=6)) == 0
+    assert running.poll(at - timedelta(minutes=5, seconds=-5)) == 1
+    assert running.poll(at - timedelta(minutes=3, seconds=-5)) == 1
+    assert running.poll(at + timedelta(seconds=5)) == 0
@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core.jobs import schedule_rotations
+from app.core.rotation import LoadBalancer
+from app.crud.family import family_crud
+from tests.conftest import AuthHeaders, MakeFamily, MakeUser
+
+
+def test_balancer_weighs_capacity_and_effort() -> None:
+    """Test that loads follow capacities and that unavailable members get nothing."""
+    balancer = LoadBalancer({1: 1.0, 2: 2.0, 3: 0.0})
+    planned = balancer.plan((i, 3 if i % 4 == 0 else 1) for i in range(60))
+    assert len(planned) == 60
+    assert 3 not in {user_id for _, user_id in planned}
+    normalized = [balancer.loads[1] / 1.0, balancer.loads[2] / 2.0]
+    assert max(normalized) - min(normalized) <= 3
+    assert abs(balancer.loads[2] - 2 * balancer.loads[1]) <= 6
+    assert LoadBalancer({1: 0.0}).plan([("x", 1)]) == []
+
+
+def test_rotation_assigns_and_reassigns(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test scheduling, idempotent reruns, a single reassignment, and the board."""
+    owner = make_user("Rota")
+    family_id = make_family(owner, members=2)
+    member_ids = [m.id for m in family_crud.get_members(db, family_id=family_id)]
+    headers = auth_headers(owner)
+    url = f"/api/v1/families/{family_id}"
+    for task in (
+        {"title": "Dishes", "due_date": "2024-03-04", "repeat": "daily", "rotate": True},
+        {"title": "Bathroom", "due_date": "2024-03-04", "repeat": "weekly", "rotate": True, "effort": 3},
+        {"title": "Taxes", "due_date": "2024-03-05", "assignee_id": owner.id},
+    ):
+        assert client.post(f"{url}/tasks", json=task, headers=headers).status_code == 201
+
+    params = {"from": "2024-03-04", "days": 14}
+    assigned = client.post(f"{url}/rotation", params=params, headers=headers).json()
+    assert len(assigned) == 14 + 2
+    loads = Counter()
+    for assignment in assigned:
+        loads[assignment["user_id"]] += assignment["effort"]
+    assert set(loads) == set(member_ids)
+    assert max(loads.values()) - min(loads.values()) <= 3
+    assert client.post(f"{url}/rotation", params=params, headers=headers).json() == []
+
+    window = {"from": "2024-03-04", "to": "2024-03-17"}
+    before = client.get(f"{url}/assignments", params=window, headers=headers).json()
+    first = before[0]
+    other = next(user_id for user_id in member_ids if user_id != first["user_id"])
+    response = client.put(
+        f"{url}/tasks/{first['task_id']}/assignments/{first['occurrence_date']}",
+        json={"user_id": other, "done": True},
+        headers=headers,
+    )
+    assert response.status_code == 200 and response.json()["done"]
+    after = client.get(f"{url}/assignments", params=window, headers=headers).json()
+    assert [a for a in after if a != response.json()] == before[1:]
+
+    board = client.get(f"{url}/board", params=window, headers=headers).json()
+    dishes = [
+        (member["id"], task) for member in board["members"]
+        for task in member["tasks"] if task["title"] == "Dishes"
+    ]
+    assert len(dishes) > 1
+    assert all(task["assignee_id"] == member_id for member_id, task in dishes)
+    on_board = sum(len(task["occurs_on"]) for _, task in dishes)
+    assert on_board == 14
+
+
+def test_unavailable_member_releases_chores(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test that capacity 0 hands a member's pending chores to the others."""
+    owner = make_user("Ava")
+    family_id = make_family(owner, members=1)
+    member_id = family_crud.get_members(db, family_id=family_id)[1].id
+    headers = auth_headers(owner)
+    url = f"/api/v1/families/{family_id}"
+    today = date.today()
+    client.post(f"{url}/tasks", json={
+        "title": "Dishes", "due_date": today.isoformat(), "repeat": "daily", "rotate": True,
+    }, headers=headers)
+    assert schedule_rotations(db, today=today, horizon_days=7, lookback_days=0) == 7
+
+    response = client.put(f"{url}/members/{member_id}", json={"capacity": 0}, headers=headers)
+    assert response.status_code == 200 and response.json()["capacity"] == 0
+    window = {"from": today.isoformat(), "to": (today + timedelta(days=6)).isoformat()}
+    assignments = client.get(f"{url}/assignments", params=window, headers=headers).json()
+    assert len(assignments) == 7
+    assert {a["user_id"] for a in assignments} == {owner.id}
+    assert client.put(
+        f"{url}/members/{member_id}", json={"capacity": 1}, headers=auth_headers(make_user("Eve"))
+    ).status_code == 404
+
+
+def test_removed_member_chores_are_refilled(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test that removing a member reassigns their chores from today on, and keeps past ones."""
+    owner = make_user("Rita")
+    family_id = make_family(owner, members=1)
+    member_id = family_crud.get_members(db, family_id=family_id)[1].id
+    headers = auth_headers(owner)
+    url = f"/api/v1/families/{family_id}"
+    today = date.today()
+    client.post(f"{url}/tasks", json={
+        "title": "Dishes", "due_date": (today - timedelta(days=3)).isoformat(),
+        "repeat": "daily", "rotate": True,
+    }, headers=headers)
+    schedule_rotations(db, today=today - timedelta(days=3), horizon_days=10, lookback_days=0)
+    window = {"from": (today - timedelta(days=3)).isoformat(),
+              "to": (today + timedelta(days=6)).isoformat()}
+    before = client.get(f"{url}/assignments", params=window, headers=headers).json()
+    past = [a for a in before if a["occurrence_date"] < today.isoformat()]
+    assert any(a["user_id"] == member_id for a in past)
+
+    assert client.delete(f"{url}/members/{member_id}", headers=headers).status_code == 204
+    after = client.get(f"{url}/assignments", params=window, headers=headers).json()
+    assert len(after) == 10
+    assert [a for a in after if a["occurrence_date"] < today.isoformat()] == past
+    assert {a["user_id"] for a in after if a["occurrence_date"] >= today.isoformat()} == {owner.id}
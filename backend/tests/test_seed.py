@@ -0,0 +1,61 @@
+import csv
+import io
+from pathlib import Path
+from typing import Any, List
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import Session
+from app.crud.user import user_crud
+from app.models.family import FamilyMember
+from app.models.sync import SyncCounter
+from app.models.user import User
+from app.tools import seed
+
+
+def test_seed_is_deterministic_and_restores_indexes(tmp_path: Path) -> None:
+    """Test seeding two databases alike, with indexes rebuilt and a usable password."""
+    emails = []
+    for name in ("a", "b"):
+        url = f"sqlite:///{tmp_path}/{name}.db"
+        result = seed.load(
+            url, families=30, max_members=4, seed=7, password="secret",
+            reuse_hash=True, batch_size=10,
+        )
+        engine = create_engine(url)
+        with Session(engine) as db:
+            users = db.execute(select(User).order_by(User.id)).scalars().all()
+            emails.append([user.email for user in users])
+            assert result["families"] == 30 and result["users"] == len(users)
+            owners = db.execute(select(FamilyMember).where(FamilyMember.role == "owner")).all()
+            assert len(owners) == 30
+            assert [user.seq for user in users] == list(range(1, len(users) + 1))
+            assert db.get(SyncCounter, 1).value == len(users)
+            assert user_crud.authenticate(db, email=users[-1].email, password="secret")
+        indexes = {index["name"] for index in inspect(engine).get_indexes("users")}
+        assert {"ix_users_email", "ix_users_seq"} <= indexes
+        engine.dispose()
+    assert emails[0] == emails[1]
+
+
+def test_copy_rows_streams_csv() -> None:
+    """Test the Postgres COPY statement and its CSV, NULLs as unquoted empty fields."""
+    calls: List[Any] = []
+
+    class Cursor:
+        def copy_expert(self, sql: str, file: io.StringIO) -> None:
+            calls.append((sql, list(csv.reader(file))))
+
+        def close(self) -> None:
+            pass
+
+    class Connection:
+        connection = type("Raw", (), {"cursor": staticmethod(lambda: Cursor())})()
+
+    rows = [
+        {"id": 1, "first_name": "Ada", "avatar_url": None},
+        {"id": 2, "first_name": 'Say "hi", Bo', "avatar_url": "a.png"},
+    ]
+    seed.copy_rows(Connection(), User.__table__, rows)  # type: ignore[arg-type]
+    assert calls == [(
+        "COPY users (id, first_name, avatar_url) FROM STDIN WITH (FORMAT csv)",
+        [["1", "Ada", ""], ["2", 'Say "hi", Bo', "a.png"]],
+    )]
@@ -0,0 +1,113 @@
+import time
+import uvicorn
+from app import server
+from app.core.config import Settings
+
+
+def _serve_forever(sockets=None) -> None:
+    """Stand-in worker target that idles until terminated."""
+    while True:
+        time.sleep(0.1)
+
+
+def test_worker_count_auto_sizes(monkeypatch) -> None:
+    """Test that zero workers means one per available CPU."""
+    monkeypatch.setattr(server, "available_cpus", lambda: 6)
+    assert server.worker_count(Settings(server_workers=0)) == 6
+    assert server.worker_count(Settings(server_workers=3)) == 3
+
+
+def test_available_cpus_honours_quota(monkeypatch) -> None:
+    """Test that a cgroup CPU quota caps the CPU count."""
+    monkeypatch.setattr(server, "_cgroup_cpu_quota", lambda: 1.5)
+    assert server.available_cpus() <= 2
+    monkeypatch.setattr(server, "_cgroup_cpu_quota", lambda: None)
+    assert server.available_cpus() >= 1
+
+
+def test_resolve_loop_and_http(monkeypatch) -> None:
+    """Test event loop and HTTP parser selection."""
+    monkeypatch.setattr(server, "_installed", lambda module: True)
+    assert server.resolve_loop("auto") == "uvloop"
+    assert server.resolve_http("auto") == "httptools"
+    assert server.resolve_loop("asyncio") == "asyncio"
+
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+    assert server.resolve_loop("auto") == "asyncio"
+    assert server.resolve_http("auto") == "h11"
+
+
+def test_build_config_reads_settings(monkeypatch) -> None:
+    """Test that the uvicorn config mirrors the settings."""
+    monkeypatch.setattr(server, "available_cpus", lambda: 4)
+    app_settings = Settings(
+        server_port=9000,
+        server_keepalive=15,
+        server_backlog=512,
+        server_loop="asyncio",
+        server_http="h11",
+    )
+    config = server.build_config(app_settings)
+    assert config.factory is True
+    assert config.port == 9000
+    assert config.workers == 4
+    assert config.timeout_keep_alive == 15
+    assert config.backlog == 512
+    assert config.loop == "asyncio"
+    assert config.http == "h11"
+
+
+def test_print_config(capsys) -> None:
+    """Test that the effective configuration is printed."""
+    server.print_config(server.effective_config(Settings(server_workers=2)))
+    out = capsys.readouterr().out
+    assert "Effective server configuration" in out
+    assert "workers" in out and "threadpool_size" in out
+
+
+def test_supervisor_restarts_and_reloads_workers() -> None:
+    """Test that dead workers are replaced and reload rolls the pool."""
+    config = uvicorn.Config(server.APP_FACTORY, factory=True, host="127.0.0.1", port=0)
+    supervisor = server.Supervisor(
+        config, workers=2, graceful_timeout=5, target=_serve_forever
+    )
+    supervisor.startup()
+    try:
+        crashed = supervisor.processes[0]
+        crashed.kill()
+        crashed.join()
+        supervisor.check_workers()
+        assert supervisor.restarts == 1
+        assert all(process.is_alive() for process in supervisor.processes)
+
+        before = {process.pid for process in supervisor.processes}
+        supervisor.reload()
+        after = {process.pid for process in supervisor.processes}
+        assert before.isdisjoint(after)
+        assert all(process.is_alive() for process in supervisor.processes)
+    finally:
+        processes = list(supervisor.processes)
+        supervisor.shutdown()
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_supervisor_runs_background_jobs_in_the_first_worker_only(monkeypatch) -> None:
+    """Test that only worker 0 is spawned with background jobs enabled, restarts included."""
+    spawned = []
+
+    class FakeProcess:
+        def start(self) -> None:
+            spawned.append(server.os.environ[server.JOBS_ENV])
+
+    monkeypatch.setattr(server, "get_subprocess", lambda **kwargs: FakeProcess())
+    monkeypatch.delenv(server.JOBS_ENV, raising=False)
+    config = uvicorn.Config(server.APP_FACTORY, factory=True, host="127.0.0.1", port=0)
+    supervisor = server.Supervisor(config, workers=3, graceful_timeout=5, target=_serve_forever)
+    supervisor.sockets = [object()]  # type: ignore[list-item]
+    supervisor.startup()
+    supervisor.spawn(0)
+    assert spawned == ["true", "false", "false", "true"]
+    assert server.JOBS_ENV not in server.os.environ
+
+    server.Supervisor(config, workers=1, graceful_timeout=5, jobs=False).spawn(0)
+    assert spawned[-1] == "false"
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.jobs import compact_stats
+from app.crud.family import family_crud
+from app.models.stats import DAY, CompletionRollup
+from app.models.task import Task, TaskAssignment
+from tests.conftest import AuthHeaders, MakeFamily, MakeUser
+
+
+def test_completions_roll_up_as_status_changes(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test that done, undone and reassigned tasks and chores adjust the member rollups."""
+    owner = make_user("Rolf")
+    family_id = make_family(owner, members=1)
+    member_id = family_crud.get_members(db, family_id=family_id)[1].id
+    headers = auth_headers(owner)
+    url = f"/api/v1/families/{family_id}"
+    today = date.today()
+
+    def stats(range_: str = "week") -> dict:
+        response = client.get(f"{url}/stats", params={"range": range_}, headers=headers)
+        assert response.status_code == 200
+        return {m["user_id"]: (m["done"], m["effort"]) for m in response.json()["members"]}
+
+    ids = [
+        client.post(f"{url}/tasks", json={
+            "title": f"Chore {i}", "due_date": str(today), "assignee_id": owner.id, "effort": i + 1,
+        }, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    assert stats() == {}
+    for task_id in ids:
+        client.put(f"{url}/tasks/{task_id}", json={"status": "done"}, headers=headers)
+    # Edits that leave the task done count nothing twice.
+    client.put(f"{url}/tasks/{ids[0]}", json={"title": "Renamed"}, headers=headers)
+    assert stats() == {owner.id: (3, 6)}
+
+    client.put(f"{url}/tasks/{ids[1]}", json={"status": "todo"}, headers=headers)
+    client.put(f"{url}/tasks/{ids[2]}", json={"assignee_id": member_id}, headers=headers)
+    assert stats() == {owner.id: (1, 1), member_id: (1, 3)}
+
+    db.add(TaskAssignment(
+        task_id=ids[1], occurrence_date=today, family_id=family_id, user_id=member_id, effort=2,
+    ))
+    db.commit()
+    client.put(f"{url}/tasks/{ids[1]}/assignments/{today}", json={"done": True}, headers=headers)
+    assert stats("month") == stats("year") == {owner.id: (1, 1), member_id: (2, 5)}
+    assert client.get(f"{url}/stats", params={"range": "decade"}, headers=headers).status_code == 422
+
+
+def test_compaction_folds_days_without_changing_totals(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test that past days fold into weeks and months, and every range still adds up."""
+    owner = make_user("Cora")
+    family_id = make_family(owner)
+    headers = auth_headers(owner)
+    # Two years of history, a chore done every third day.
+    first = date(2023, 1, 2)
+    days = [first + timedelta(days=d) for d in range(0, 730, 3)]
+    db.add_all([
+        Task(
+            family_id=family_id, assignee_id=owner.id, title="Chore", due_date=day,
+            status="done", completed_on=day, effort=2,
+        )
+        for day in days
+    ])
+    db.commit()
+
+    def stats(range_: str, on: date) -> tuple:
+        response = client.get(
+            f"/api/v1/families/{family_id}/stats",
+            params={"range": range_, "on": str(on)},
+            headers=headers,
+        ).json()
+        (member,) = response["members"]
+        return response["start"], response["end"], member["done"], member["effort"]
+
+    probes = [("week", date(2023, 5, 31)), ("week", date(2024, 1, 1)),
+              ("month", date(2023, 2, 14)), ("month", date(2024, 12, 31)),
+              ("year", date(2023, 7, 1)), ("year", date(2024, 2, 29))]
+    before = [stats(range_, on) for range_, on in probes]
+    february = len([day for day in days if (day.year, day.month) == (2023, 2)])
+    assert before[2] == ("2023-02-01", "2023-02-28", february, 2 * february)
+    assert before[4][2] == len([day for day in days if day.year == 2023])
+
+    # As the job would see it in the middle of a week straddling two months.
+    folded = compact_stats(db, today=date(2024, 5, 1))
+    assert folded == len([day for day in days if day < date(2024, 4, 29)])
+    assert [stats(range_, on) for range_, on in probes] == before
+    remaining = db.execute(
+        select(func.count()).select_from(CompletionRollup).where(CompletionRollup.period == DAY)
+    ).scalar_one()
+    assert remaining == len(days) - folded
+    assert compact_stats(db, today=date(2024, 5, 1)) == 0
@@ -0,0 +1,136 @@
+from pathlib import Path
+from typing import Callable
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.db.database import Base
+from app.models.sync import SyncCounter
+from app.crud.family import family_crud
+from app.models.user import User
+from tests.conftest import AuthHeaders, MakeFamily, MakeUser, RecordStatements
+
+
+@pytest.fixture
+def sync(client: TestClient, auth_headers: AuthHeaders) -> Callable[..., dict]:
+    """Fetch a user's changes since a cursor."""
+    def fetch(user: User, since: int, limit: int = 200) -> dict:
+        response = client.get(
+            "/api/v1/sync/", params={"since": since, "limit": limit}, headers=auth_headers(user)
+        )
+        assert response.status_code == 200
+        return response.json()
+    return fetch
+
+
+def test_sync_returns_only_what_changed(
+    client: TestClient, db: Session, make_user: MakeUser, make_family: MakeFamily,
+    sync: Callable[..., dict],
+) -> None:
+    """Test a full download, then an incremental sync of an update and a delete."""
+    users = [make_user(name) for name in ("Ada", "Bea", "Cy")]
+    family_id = make_family(users[0])
+    for user in users[1:]:
+        family_crud.add_member(db, family_id=family_id, user_id=user.id)
+    full = sync(users[0], 0)
+    assert [u["id"] for u in full["users"]] == [u.id for u in users]
+    assert full["deleted"] == [] and not full["has_more"]
+
+    response = client.put(f"/api/v1/users/{users[1].id}", json={"first_name": "Bee"})
+    assert response.status_code == 200
+    assert client.delete(f"/api/v1/users/{users[2].id}").status_code == 200
+
+    changes = sync(users[0], full["cursor"])
+    assert [(u["id"], u["first_name"]) for u in changes["users"]] == [(users[1].id, "Bee")]
+    assert [(d["entity"], d["entity_id"]) for d in changes["deleted"]] == [("user", users[2].id)]
+    assert changes["cursor"] > full["cursor"]
+    assert sync(users[0], changes["cursor"]) == {
+        "users": [], "deleted": [], "cursor": changes["cursor"], "has_more": False,
+    }
+
+
+def test_sync_is_scoped_to_the_callers_families(
+    client: TestClient, db: Session, make_user: MakeUser, make_family: MakeFamily,
+    sync: Callable[..., dict],
+) -> None:
+    """Test that only family members are synced, and joining or leaving is synced too."""
+    owner, stranger = make_user("Owen"), make_user("Sid")
+    family_id = make_family(owner)
+    assert client.get("/api/v1/sync/").status_code == 403
+    full = sync(owner, 0)
+    assert [u["id"] for u in full["users"]] == [owner.id]
+    assert [u["id"] for u in sync(stranger, 0)["users"]] == [stranger.id]
+
+    family_crud.add_member(db, family_id=family_id, user_id=stranger.id)
+    joined = sync(owner, full["cursor"])
+    assert [u["id"] for u in joined["users"]] == [stranger.id]
+    seen = sync(stranger, 0)
+    assert {u["id"] for u in seen["users"]} == {owner.id, stranger.id}
+
+    # A member who is gone but still shares another family is not deleted.
+    other_family = make_family(owner)
+    family_crud.add_member(db, family_id=other_family, user_id=stranger.id)
+    family_crud.remove_member(db, family_id=family_id, user_id=stranger.id)
+    assert sync(owner, joined["cursor"])["deleted"] == []
+    assert sync(stranger, seen["cursor"])["deleted"] == []
+    family_crud.remove_member(db, family_id=other_family, user_id=stranger.id)
+    left = sync(owner, joined["cursor"])
+    # One tombstone per family left.
+    assert [d["entity_id"] for d in left["deleted"]] == [stranger.id] * 2
+    # The leaver's own clients drop the members they no longer see.
+    gone = sync(stranger, seen["cursor"])
+    assert owner.id not in [u["id"] for u in gone["users"]]
+    assert [d["entity_id"] for d in gone["deleted"]] == [owner.id] * 2
+    assert [u["id"] for u in sync(stranger, 0)["users"]] == [stranger.id]
+
+
+def test_sync_pages_in_sequence_order(
+    client: TestClient, db: Session, make_user: MakeUser, make_family: MakeFamily,
+    sync: Callable[..., dict], statements: RecordStatements,
+) -> None:
+    """Test that paging replays to the current state with a constant query count."""
+    users = [make_user(f"Page{i}") for i in range(7)]
+    family_id = make_family(users[6])
+    for user in users[:6]:
+        family_crud.add_member(db, family_id=family_id, user_id=user.id)
+    client.delete(f"/api/v1/users/{users[0].id}")
+    client.put(f"/api/v1/users/{users[3].id}", json={"last_name": "Moved"})
+
+    state, since, pages = {}, 0, 0
+    with statements(client.app.state.engine) as executed:
+        while True:
+            page = sync(users[6], since, limit=3)
+            pages += 1
+            for user in page["users"]:
+                state[user["id"]] = user["last_name"]
+            for tombstone in page["deleted"]:
+                state.pop(tombstone["entity_id"], None)
+            since = page["cursor"]
+            if not page["has_more"]:
+                break
+    assert pages == 3
+    # The caller, their scope, users and tombstones.
+    assert len(executed) == 4 * pages
+    assert state == {
+        user.id: "Moved" if user is users[3] else "Family" for user in users[1:]
+    }
+
+
+def test_sequence_counter_needs_no_seeded_row(tmp_path: Path) -> None:
+    """Test that a schema without the counter row, as migrations build it, still stamps."""
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        assert db.get(SyncCounter, 1) is None
+        users = [
+            User(first_name=name, last_name="New", email=f"{name}@example.com",
+                 hashed_password="not-a-real-hash")
+            for name in ("a", "b")
+        ]
+        db.add(users[0])
+        db.commit()
+        db.add(users[1])
+        db.commit()
+        assert [user.seq for user in users] == [1, 2]
+        assert db.get(SyncCounter, 1).value == 2
+    engine.dispose()
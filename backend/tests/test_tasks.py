@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.crud.family import family_crud
+from app.models.task import Task
+from tests.conftest import AuthHeaders, MakeFamily, MakeUser, RecordStatements
+
+START = date(2024, 3, 1)
+
+
+def test_task_crud_is_family_scoped(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test creating and updating tasks, and that other families cannot see them."""
+    owner, stranger = make_user("Tara"), make_user("Stan")
+    family_id = make_family(owner)
+    other_family = make_family(stranger)
+    url = f"/api/v1/families/{family_id}/tasks"
+
+    response = client.post(url, json={
+        "title": "Dishes", "due_date": "2024-03-02", "assignee_id": owner.id,
+    }, headers=auth_headers(owner))
+    assert response.status_code == 201
+    task = response.json()
+    assert task["status"] == "todo" and task["family_id"] == family_id
+
+    assert client.post(url, json={
+        "title": "Trash", "due_date": "2024-03-02", "assignee_id": stranger.id,
+    }, headers=auth_headers(owner)).status_code == 400
+    updated = client.put(f"{url}/{task['id']}", json={"status": "done"}, headers=auth_headers(owner))
+    assert updated.json()["status"] == "done"
+    for field in ("title", "status", "due_date", "effort", "repeat_interval", "rotate"):
+        assert client.put(
+            f"{url}/{task['id']}", json={field: None}, headers=auth_headers(owner)
+        ).status_code == 422
+    cleared = client.put(
+        f"{url}/{task['id']}", json={"description": None}, headers=auth_headers(owner)
+    )
+    assert cleared.status_code == 200
+
+    assert client.get(f"{url}/{task['id']}", headers=auth_headers(stranger)).status_code == 404
+    assert client.get(
+        f"/api/v1/families/{other_family}/tasks/{task['id']}", headers=auth_headers(stranger)
+    ).status_code == 404
+    assert client.delete(f"{url}/{task['id']}", headers=auth_headers(owner)).status_code == 204
+
+
+def test_board_groups_tasks_by_member(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test that the board returns members with their tasks in the range."""
+    owner = make_user("Bea")
+    family_id = make_family(owner, members=1)
+    member_id = family_crud.get_members(db, family_id=family_id)[1].id
+    db.add_all([
+        Task(family_id=family_id, assignee_id=owner.id, title="In range", due_date=START),
+        Task(family_id=family_id, assignee_id=member_id, title="Also", due_date=START + timedelta(days=6)),
+        Task(family_id=family_id, assignee_id=None, title="Anyone", due_date=START),
+        Task(family_id=family_id, assignee_id=owner.id, title="Later", due_date=START + timedelta(days=30)),
+    ])
+    db.commit()
+
+    response = client.get(
+        f"/api/v1/families/{family_id}/board",
+        params={"from": "2024-03-01", "to": "2024-03-07"},
+        headers=auth_headers(owner),
+    )
+    assert response.status_code == 200
+    board = response.json()
+    assert [[t["title"] for t in m["tasks"]] for m in board["members"]] == [["In range"], ["Also"]]
+    assert [t["title"] for t in board["unassigned"]] == ["Anyone"]
+
+    assert client.get(
+        f"/api/v1/families/{family_id}/board",
+        params={"from": "2024-03-07", "to": "2024-03-01"},
+        headers=auth_headers(owner),
+    ).status_code == 400
+
+
+def test_board_query_count_is_constant(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily, statements: RecordStatements,
+) -> None:
+    """Test that the board does not issue a query per member or task."""
+    owner = make_user("Cal")
+    counts = []
+    for members, tasks_each in ((1, 2), (8, 20)):
+        family_id = make_family(owner, members=members)
+        member_ids = [m.id for m in family_crud.get_members(db, family_id=family_id)]
+        db.add_all([
+            Task(family_id=family_id, assignee_id=member_id, title=f"T{i}",
+                 due_date=START + timedelta(days=i % 28))
+            for member_id in member_ids for i in range(tasks_each)
+        ])
+        db.commit()
+
+        with statements(client.app.state.engine) as executed:
+            response = client.get(
+                f"/api/v1/families/{family_id}/board",
+                params={"from": "2024-03-01", "to": "2024-03-31"},
+                headers=auth_headers(owner),
+            )
+        assert response.status_code == 200
+        assert sum(len(m["tasks"]) for m in response.json()["members"]) == len(member_ids) * tasks_each
+        counts.append(len(executed))
+    assert counts[0] == counts[1]
+
+
+def test_board_expands_recurring_tasks(
+    client: TestClient, db: Session, make_user: MakeUser, auth_headers: AuthHeaders,
+    make_family: MakeFamily,
+) -> None:
+    """Test recurring tasks on the board with skipped and moved occurrences."""
+    owner = make_user("Rex")
+    family_id = make_family(owner)
+    url = f"/api/v1/families/{family_id}/tasks"
+    headers = auth_headers(owner)
+    task = client.post(url, json={
+        "title": "Trash", "due_date": "2024-02-26", "assignee_id": owner.id, "repeat": "weekly",
+    }, headers=headers).json()
+    exceptions = f"{url}/{task['id']}/exceptions"
+
+    def board_days(start: str = "2024-03-01", end: str = "2024-03-31"):
+        board = client.get(
+            f"/api/v1/families/{family_id}/board", params={"from": start, "to": end}, headers=headers
+        ).json()
+        [trash] = board["members"][0]["tasks"]
+        return trash["occurs_on"]
+
+    assert board_days() == ["2024-03-04", "2024-03-11", "2024-03-18", "2024-03-25"]
+    assert client.put(exceptions, json={"occurrence_date": "2024-03-11"}, headers=headers).status_code == 200
+    assert client.put(exceptions, json={
+        "occurrence_date": "2024-03-18", "moved_to": "2024-03-20",
+    }, headers=headers).status_code == 200
+    # Moved in from the previous month.
+    client.put(exceptions, json={"occurrence_date": "2024-02-26", "moved_to": "2024-03-01"}, headers=headers)
+    assert board_days() == ["2024-03-01", "2024-03-04", "2024-03-20", "2024-03-25"]
+    assert client.put(exceptions, json={"occurrence_date": "2024-03-12"}, headers=headers).status_code == 400
+
+    assert client.delete(f"{exceptions}/2024-03-11", headers=headers).status_code == 204
+    assert client.delete(f"{exceptions}/2024-03-11", headers=headers).status_code == 404
+    assert board_days() == ["2024-03-01", "2024-03-04", "2024-03-11", "2024-03-20", "2024-03-25"]
+
+    # Editing the rule takes effect at once and orphans exceptions for days it dropped.
+    client.put(f"{url}/{task['id']}", json={
+        "due_date": "2024-03-01", "repeat": "daily", "repeat_until": "2024-03-03",
+    }, headers=headers)
+    assert board_days() == ["2024-03-01", "2024-03-02", "2024-03-03"]
@@ -0,0 +1,102 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api.api_v1.endpoints import auth
+from app.core.throttle import LoginThrottle, MemoryBackend, TokenBucket
+from app.crud.user import user_crud
+from app.schemas.user import UserCreate
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_throttle(clock: FakeClock, max_keys: int = 100) -> LoginThrottle:
+    return LoginThrottle(
+        MemoryBackend(max_keys),
+        ip_bucket=TokenBucket(burst=3, per_minute=60),
+        email_bucket=TokenBucket(burst=2, per_minute=60),
+        free_failures=2,
+        backoff_base=1.0,
+        backoff_max=8.0,
+        clock=clock,
+    )
+
+
+def test_token_buckets_per_ip_and_email() -> None:
+    """Test that each key has its own burst and refills over time."""
+    clock = FakeClock()
+    throttle = make_throttle(clock)
+    assert throttle.check("1.1.1.1", "a@example.com") == 0
+    assert throttle.check("1.1.1.1", "A@example.com") == 0
+    # The email bucket is empty, whichever IP the attempt comes from.
+    assert throttle.check("2.2.2.2", "a@example.com") > 0
+    assert throttle.check("1.1.1.1", "b@example.com") == 0
+    # The IP bucket is now empty as well.
+    assert throttle.check("1.1.1.1", "c@example.com") > 0
+
+    clock.now += 1.0
+    assert throttle.check("1.1.1.1", "c@example.com") == 0
+
+
+def test_failures_back_off_exponentially() -> None:
+    """Test the backoff after the free failures and its reset on success."""
+    clock = FakeClock()
+    throttle = make_throttle(clock)
+    delays = []
+    for _ in range(6):
+        throttle.failure("1.1.1.1", "a@example.com")
+        delays.append(throttle.check("9.9.9.9", "a@example.com"))
+        clock.now += 1
+    assert delays[:2] == [0, 0]
+    assert delays[2:] == [1.0, 2.0, 4.0, 8.0]
+
+    throttle.failure("1.1.1.1", "a@example.com")
+    throttle.success("a@example.com")
+    assert throttle.check("9.9.9.9", "a@example.com") == 0
+
+
+def test_state_is_bounded() -> None:
+    """Test that the least recently used keys are evicted."""
+    clock = FakeClock()
+    throttle = make_throttle(clock, max_keys=10)
+    for i in range(100):
+        throttle.check(f"10.0.0.{i}", "a@example.com")
+        clock.now += 1
+    assert len(throttle.backend) == 10
+
+
+def test_login_throttled_before_hashing(client: TestClient, db: Session, monkeypatch) -> None:
+    """Test that repeated failures get 429 without verifying the password."""
+    user_crud.create(db, obj_in=UserCreate(
+        first_name="Stuffed",
+        last_name="User",
+        email="stuffed@example.com",
+        password="correct-password",
+    ))
+    verified = []
+    verify_password = auth.verify_password
+    monkeypatch.setattr(
+        auth, "verify_password", lambda *args: verified.append(1) or verify_password(*args)
+    )
+
+    statuses = [
+        client.post(
+            "/api/v1/auth/login",
+            json={"email": "stuffed@example.com", "password": "wrong-password"},
+        ).status_code
+        for _ in range(6)
+    ]
+    assert statuses[:3] == [401, 401, 401]
+    assert 429 in statuses
+    assert len(verified) == statuses.count(401)
+
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": "stuffed@example.com", "password": "correct-password"},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
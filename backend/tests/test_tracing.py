@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core import tracing
+from app.core.config import Settings
+from app.main import create_app
+from tests.conftest import SQLALCHEMY_DATABASE_URL, MakeUser
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def tracing_app(path: Path, sample_rate: float) -> Any:
+    return create_app(Settings(
+        database_url=SQLALCHEMY_DATABASE_URL,
+        reminders_enabled=False,
+        audit_enabled=False,
+        logging_enabled=False,
+        tracing_enabled=True,
+        trace_sample_rate=sample_rate,
+        trace_exporter="file",
+        trace_file=str(path),
+    ))
+
+
+def read_spans(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_update_user_spans_from_route_to_sql(
+    db: Session, tmp_path: Path, make_user: MakeUser
+) -> None:
+    """Test that an incoming trace is continued down to CRUD, bcrypt, commit and SQL."""
+    user = make_user("Tracy")
+    path = tmp_path / "spans.jsonl"
+    with TestClient(tracing_app(path, sample_rate=0.0)) as client:
+        response = client.put(
+            f"/api/v1/users/{user.id}",
+            json={"first_name": "Traced", "password": "newpassword123"},
+            headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+        )
+    assert response.status_code == 200
+
+    spans = read_spans(path)
+    assert {s["trace_id"] for s in spans} == {TRACE_ID}
+    by_id = {s["span_id"]: s for s in spans}
+    (root,) = [s for s in spans if s["parent_id"] == PARENT_ID]
+    assert root["name"] == "PUT /api/v1/users/{user_id}"
+    assert root["attributes"]["http.status_code"] == 200
+
+    def ancestors(span: Dict[str, Any]) -> List[str]:
+        names = []
+        while span["parent_id"] in by_id:
+            span = by_id[span["parent_id"]]
+            names.append(span["name"])
+        return names
+
+    names = {s["name"] for s in spans}
+    assert {
+        "depends get_db", "endpoint update_user", "crud CRUDBase.get", "crud CRUDUser.update",
+        "crud CRUDBase.update", "password.hash", "session.commit", "session.refresh",
+    } <= names
+    (update,) = [
+        s for s in spans
+        if s["name"] == "sql UPDATE" and s["attributes"]["db.statement"].startswith("UPDATE users")
+    ]
+    assert ancestors(update)[-4:] == [
+        "crud CRUDBase.update", "crud CRUDUser.update", "endpoint update_user", root["name"],
+    ]
+    (hashing,) = [s for s in spans if s["name"] == "password.hash"]
+    assert ancestors(hashing)[0] == "crud CRUDUser.update"
+
+
+def test_head_sampling(db: Session, tmp_path: Path) -> None:
+    """Test that unsampled requests record nothing and sampled parents are followed."""
+    path = tmp_path / "spans.jsonl"
+    with TestClient(tracing_app(path, sample_rate=0.0)) as client:
+        client.get("/api/v1/users/")
+        client.get("/api/v1/users/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        client.get("/api/v1/users/", headers={"traceparent": "00-not-a-trace-01"})
+    assert read_spans(path) == []
+
+    with TestClient(tracing_app(path, sample_rate=1.0)) as client:
+        client.get("/api/v1/users/")
+    spans = read_spans(path)
+    assert spans and len({s["trace_id"] for s in spans}) == 1
+    assert tracing.parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID, PARENT_ID, True
+    )
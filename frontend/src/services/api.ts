@@ -1,5 +1,6 @@
 import axios from 'axios'
 import type { User, UserCreate, UserUpdate } from '../types/user'
+import type { BatchResponse, BatchSubRequest } from '../types/batch'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
@@ -37,4 +38,15 @@ export const userApi = {
   },
 }
 
+// Batch API: several calls in one round trip
+export const batchApi = {
+  execute: async (
+    requests: BatchSubRequest[],
+    transaction = false
+  ): Promise<BatchResponse> => {
+    const response = await api.post<BatchResponse>('/batch', { requests, transaction })
+    return response.data
+  },
+}
+
 export default api
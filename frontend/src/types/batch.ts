@@ -0,0 +1,22 @@
+export interface BatchSubRequest {
+  id: string
+  method?: 'GET' | 'POST' | 'PUT' | 'PATCH' | 'DELETE'
+  url: string
+  headers?: Record<string, string>
+  body?: unknown
+  depends_on?: string[]
+}
+
+export interface BatchSubResponse {
+  id: string
+  status: number
+  headers: Record<string, string>
+  body: unknown
+  duration_ms: number
+}
+
+export interface BatchResponse {
+  responses: BatchSubResponse[]
+  committed: boolean
+  duration_ms: number
+}